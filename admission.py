@@ -0,0 +1,110 @@
+"""
+Load control for the calculate endpoint.
+
+TokenBucketLimiter gives every client a bucket of ``burst`` requests that
+refills at ``rate`` requests per second; a request finding the bucket empty
+is turned away with the time until the next token, which the endpoint sends
+as Retry-After. Buckets live in the worker process, so with several gunicorn
+workers a client's effective limit is the per-worker limit times the number
+of workers its requests are spread over.
+
+Coalescer lets concurrent requests for the same normalized command share
+one evaluation: the first caller runs it and callers that arrive while it is
+in flight wait for that result instead of computing it again.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Clients remembered per process; the least recently seen are forgotten first
+MAX_CLIENTS = 10000
+
+
+class TokenBucketLimiter:
+    """Per-client token buckets, refilled continuously."""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = MAX_CLIENTS,
+                 clock: Callable[[], float] = time.monotonic):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._clock = clock
+        self._lock = threading.Lock()
+        # client -> (tokens, time of last update)
+        self._buckets: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+
+    def admit(self, client: Hashable) -> Optional[float]:
+        """Take a token for client; return None if admitted, else seconds until a token is available."""
+        now = self._clock()
+        with self._lock:
+            tokens, updated = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = None
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[client] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        # Made by the first caller to wait, so a call nobody joins needs none
+        self.done: Optional[threading.Event] = None
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class Coalescer:
+    """Runs at most one call per key at a time and shares its result with concurrent callers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def run(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (fn's result, whether it was shared with a call already in flight).
+
+        An exception raised by fn is raised in every caller waiting on it.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            elif call.done is None:
+                call.done = threading.Event()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                done = call.done
+            if done is not None:
+                done.set()
+        return call.result, False
+
+    def __len__(self) -> int:
+        return len(self._calls)
@@ -1,16 +1,248 @@
 """Main application module for VocalCalc."""
 
+import time
+
+# Taken before the other imports so the startup report includes them
+_IMPORT_STARTED = time.perf_counter()
+
+import json
+import math
+import mimetypes
 import os
-from flask import Flask, render_template, request, jsonify, make_response
+from flask import (Blueprint, Flask, Response, abort, current_app, g, render_template, request, jsonify,
+                   make_response, send_from_directory, stream_with_context, url_for)
 from flask_cors import CORS
-from command_parser import CommandParser
+from werkzeug.middleware.proxy_fix import ProxyFix
+from admission import Coalescer, TokenBucketLimiter
+from assets import AssetManifest, bundle_members
+from command_parser import FUZZY_THRESHOLD, CommandParser
+from history_store import HistoryStore, valid_session
+from interim import MAX_UTTERANCE_ID, InterimParser
+from metrics import Metrics
+from profiling import PROFILE_HEADER, RequestProfiler
+from result_cache import ResultCache, source_fingerprint
+from session import SessionProtocol
+from stats import DEFAULT_PERCENTILES, Summary, parse_numbers
+from vocabulary import DEFAULT_LOCALE, normalize_locale
+from worksheet import WorksheetStore
+
+try:
+    from flask_sock import Sock
+except ImportError:  # WebSocket sessions are optional; the POST API always works
+    Sock = None
+
+# Commands run once at startup to fill the parser's dispatch memo and
+# compiled-expression cache and touch every handler
+WARMUP_COMMANDS = (
+    "what is 5 plus 3", "add 10 and 20", "10 minus 4", "6 times 7", "multiply 3 by 4",
+    "divide 10 by 2", "15 divided by 3", "2 power 8", "square root of 16",
+    "cube root of 27", "log of 100", "sine of 30", "cosine of 60", "tangent of 45",
+    "2 plus 3 times 4", "10 minus 2 divided by 4", "square root of 16 plus 9",
+    "sum of 1, 2 and 3", "average of 3, 7 and 12", "median of 3, 7 and 12", "90th percentile of 3, 7 and 12",
+    "variance of 2, 4 and 9", "standard deviation of 2, 4 and 9", "smallest of 3 and 8", "largest of 3 and 8",
+    "convert 5 miles to kilometers",
+)
+
+bp = Blueprint('vocalcalc', __name__)
+
+# Cache lifetime for fingerprinted assets: one year
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+# Bytes of an uploaded number list read at a time
+STATS_CHUNK_SIZE = 64 * 1024
+
+# Most percentiles one upload can ask for
+MAX_PERCENTILES = 20
+
+
+def _fuzzy_threshold(value):
+    """Parse a fuzzy-correction threshold setting; 'off' (or empty) means None."""
+    if value.strip().lower() in ('', 'off', 'none'):
+        return None
+    return float(value)
+
+
+def _env_config():
+    """Return the app configuration taken from VOCALCALC_* environment variables."""
+    return {
+        # Maximum number of commands accepted by the batch endpoint
+        'BATCH_MAX_SIZE': int(os.environ.get('VOCALCALC_BATCH_MAX_SIZE', 1000)),
+        # Shared result cache file; unset disables the cache
+        'RESULT_CACHE': os.environ.get('VOCALCALC_RESULT_CACHE') or None,
+        'RESULT_CACHE_SIZE': int(os.environ.get('VOCALCALC_RESULT_CACHE_SIZE', 10000)),
+        # Server-side history directory; unset keeps history in the browser
+        'HISTORY_DIR': os.environ.get('VOCALCALC_HISTORY_DIR') or None,
+        # Worksheet directory shared by all workers; unset keeps worksheets in
+        # each worker's memory, which only suits a single worker
+        'WORKSHEET_DIR': os.environ.get('VOCALCALC_WORKSHEET_DIR') or None,
+        # Directory shared by all workers so metrics are summed across them
+        'METRICS_DIR': os.environ.get('VOCALCALC_METRICS_DIR') or None,
+        'HEARTBEAT_INTERVAL': float(os.environ.get('VOCALCALC_HEARTBEAT_INTERVAL', 25)),
+        'WARM_UP': os.environ.get('VOCALCALC_WARM_UP', '1') != '0',
+        # Per-client admission to /api/calculate, in requests per second per
+        # worker with bursts of RATE_BURST; 0 disables the limit
+        'RATE_LIMIT': float(os.environ.get('VOCALCALC_RATE_LIMIT', 0)),
+        'RATE_BURST': int(os.environ.get('VOCALCALC_RATE_BURST', 20)),
+        # Share one evaluation between concurrent identical commands
+        'COALESCE': os.environ.get('VOCALCALC_COALESCE', '1') != '0',
+        # Reverse proxies in front of the app whose X-Forwarded-For is trusted
+        # to identify the client
+        'TRUSTED_PROXIES': int(os.environ.get('VOCALCALC_TRUSTED_PROXIES', 0)),
+        # Output of build_assets.py; without a manifest there, plain /static/ files are used
+        'ASSETS_DIR': os.environ.get('VOCALCALC_ASSETS_DIR',
+                                     os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static_dist')),
+        # Minimum confidence for correcting a misheard word; 'off' disables correction
+        'FUZZY_THRESHOLD': _fuzzy_threshold(os.environ.get('VOCALCALC_FUZZY_THRESHOLD', str(FUZZY_THRESHOLD))),
+        # Directory for /api/calculate profiles; unset disables profiling
+        'PROFILE_DIR': os.environ.get('VOCALCALC_PROFILE_DIR') or None,
+        # Requests sending this in X-Profile-Token are profiled; it also
+        # guards the /api/profiles endpoints
+        'PROFILE_TOKEN': os.environ.get('VOCALCALC_PROFILE_TOKEN') or None,
+        # Fraction of requests profiled without the header
+        'PROFILE_SAMPLE_RATE': float(os.environ.get('VOCALCALC_PROFILE_SAMPLE_RATE', 0)),
+        # 'pstats' (cProfile) or 'collapsed' (flame graph stacks)
+        'PROFILE_FORMAT': os.environ.get('VOCALCALC_PROFILE_FORMAT', 'pstats'),
+    }
+
+
+class StartupReport:
+    """Import, app creation, warm-up and time-to-first-request timings."""
+
+    def __init__(self, import_seconds):
+        self.import_seconds = import_seconds
+        self.create_app_seconds = None
+        self.warm_up_seconds = None
+        self.restart()
+
+    def restart(self):
+        """Start timing the first request again, e.g. in a freshly forked worker."""
+        self.pid = os.getpid()
+        self.started = time.perf_counter()
+        self.first_request_seconds = None
+        self.first_request_latency_seconds = None
+
+    def first_request(self):
+        """Record the first request; return True only the first time."""
+        if self.first_request_seconds is not None:
+            return False
+        self.first_request_seconds = time.perf_counter() - self.started
+        return True
+
+    def as_dict(self):
+        return {
+            'pid': self.pid,
+            'import_seconds': self.import_seconds,
+            'create_app_seconds': self.create_app_seconds,
+            'warm_up_seconds': self.warm_up_seconds,
+            'first_request_seconds': self.first_request_seconds,
+            'first_request_latency_seconds': self.first_request_latency_seconds,
+        }
+
+
+class AppState:
+    """Services shared by the requests of one app: parser, caches, stores and metrics."""
+
+    def __init__(self, config, startup):
+        self.startup = startup
+
+        self.result_cache = None
+        if config['RESULT_CACHE']:
+            self.result_cache = ResultCache(
+                config['RESULT_CACHE'],
+                capacity=config['RESULT_CACHE_SIZE'],
+                version=source_fingerprint(os.path.dirname(os.path.abspath(__file__))),
+            )
 
-# Create the Flask application
-app = Flask(__name__)
-CORS(app, resources={r"/api/*": {"origins": "*"}})  # Enable CORS for API routes
+        self.assets = AssetManifest.load(config['ASSETS_DIR'])
+        self.history_store = HistoryStore(config['HISTORY_DIR']) if config['HISTORY_DIR'] else None
+        self.worksheets = WorksheetStore(config['WORKSHEET_DIR'])
+        self.command_parser = CommandParser(result_cache=self.result_cache,
+                                            fuzzy_threshold=config['FUZZY_THRESHOLD'])
+        self.admission = None
+        if config['RATE_LIMIT'] > 0:
+            self.admission = TokenBucketLimiter(config['RATE_LIMIT'], config['RATE_BURST'])
+        self.coalescer = Coalescer() if config['COALESCE'] else None
+        self.profiler = None
+        if config['PROFILE_DIR']:
+            self.profiler = RequestProfiler(config['PROFILE_DIR'], token=config['PROFILE_TOKEN'],
+                                            sample_rate=config['PROFILE_SAMPLE_RATE'],
+                                            output_format=config['PROFILE_FORMAT'])
+        grammar = self.command_parser.grammar()
+        self.grammar_version = grammar['version']
+        self.grammar_json = json.dumps(grammar, ensure_ascii=False, separators=(',', ':'))
+        self.interim = InterimParser(self.command_parser)
+        self.session_protocol = SessionProtocol(_evaluate_item, heartbeat_interval=config['HEARTBEAT_INTERVAL'],
+                                                interim=_interim_item)
+
+        self.metrics = metrics = Metrics(config['METRICS_DIR'])
+        self.request_count = metrics.counter('vocalcalc_requests_total', 'API requests by endpoint and status.',
+                                             ('endpoint', 'status'))
+        self.request_latency = metrics.histogram('vocalcalc_request_duration_seconds',
+                                                 'API request latency by endpoint.', ('endpoint',))
+        self.phase_latency = metrics.histogram('vocalcalc_phase_duration_seconds',
+                                               'Time spent in each phase of a calculation.', ('phase',))
+        self.handler_latency = metrics.histogram('vocalcalc_handler_duration_seconds',
+                                                 'Evaluation time by the handler chosen for the command.',
+                                                 ('handler',))
+        self.error_count = metrics.counter('vocalcalc_errors_total', 'Errors returned to clients, by kind.',
+                                           ('kind',))
+        self.rejected_count = metrics.counter('vocalcalc_admission_rejected_total',
+                                              'Requests turned away by per-client admission control.',
+                                              ('endpoint',))
+        self.coalesced_count = metrics.counter('vocalcalc_coalesced_total',
+                                               'Commands answered by an identical evaluation already in flight.')
+        self.profile_count = metrics.counter('vocalcalc_profiles_total', 'Requests profiled, by endpoint.',
+                                             ('endpoint',))
+
+
+def _state():
+    return current_app.extensions['vocalcalc']
+
+
+def create_app(config=None):
+    """Create and configure the VocalCalc application.
+
+    config overrides values taken from the environment (see _env_config).
+    """
+    created = time.perf_counter()
+    app = Flask(__name__)
+    CORS(app, resources={r"/api/*": {"origins": "*"}})  # Enable CORS for API routes
+    app.config.update(_env_config())
+    if config:
+        app.config.update(config)
+
+    if app.config['TRUSTED_PROXIES']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'])
+
+    startup = StartupReport(created - _IMPORT_STARTED)
+    app.extensions['vocalcalc'] = AppState(app.config, startup)
+    app.register_blueprint(bp)
+    startup.create_app_seconds = time.perf_counter() - created
+
+    if app.config['WARM_UP']:
+        startup.warm_up_seconds = warm_up(app)
+    return app
+
+
+def warm_up(app):
+    """Exercise the parser and compile the templates so the first request is as fast as the rest.
+
+    Under gunicorn with preload_app this runs once in the master, and the
+    warmed objects are shared with every worker copy-on-write. Returns the
+    time taken in seconds.
+    """
+    start = time.perf_counter()
+    parser = app.extensions['vocalcalc'].command_parser
+    for command in WARMUP_COMMANDS:
+        # Bypass the result cache: the master should not write to it
+        parser.evaluate(parser.tokenize(command))
+    with app.test_request_context('/'):
+        for template in ('landing.html', 'index.html'):
+            app.jinja_env.get_template(template)
+    return time.perf_counter() - start
 
 # Add CORS preflight handler
-@app.before_request
+@bp.before_app_request
 def handle_preflight():
     if request.method == "OPTIONS":
         response = make_response()
@@ -19,66 +251,660 @@ def handle_preflight():
         response.headers.add('Access-Control-Allow-Methods', 'GET,POST,PUT,DELETE,OPTIONS')
         return response
 
-# Create command parser instance
-command_parser = CommandParser()
+@bp.before_app_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.first_request = _state().startup.first_request()
+
+@bp.after_app_request
+def record_request_metrics(response):
+    if g.get('first_request'):
+        startup = _state().startup
+        startup.first_request_latency_seconds = time.perf_counter() - g.request_start
+        current_app.logger.info(
+            "Startup (pid %d): imports %.1f ms, create_app %.1f ms, warm-up %.1f ms, "
+            "first request %.1f ms after start, served in %.1f ms",
+            startup.pid, startup.import_seconds * 1000, (startup.create_app_seconds or 0) * 1000,
+            (startup.warm_up_seconds or 0) * 1000, startup.first_request_seconds * 1000,
+            startup.first_request_latency_seconds * 1000)
+
+    if request.path.startswith('/api/'):
+        state = _state()
+        endpoint = request.endpoint.rpartition('.')[2] if request.endpoint else 'unknown'
+        state.request_count.inc(endpoint, str(response.status_code))
+        start = g.get('request_start')
+        # A WebSocket request lasts as long as its session, so it has no latency
+        if start is not None and endpoint != 'calculation_session':
+            state.request_latency.observe(time.perf_counter() - start, endpoint)
+    return response
+
+def _error_kind(message):
+    """Return a bounded label for an error message.
+
+    Messages like "Error: could not convert string to float: 'x'" embed user
+    input after a colon, so only the text before it is kept.
+    """
+    if message.startswith('Error: '):
+        message = message[len('Error: '):]
+    return message.split(':', 1)[0]
+
+def _run_command(state, command, locale=None):
+    """Parse and evaluate a command, recording phase and handler latency.
+
+    Returns (outcome, corrections): the CalculationResult and the misheard
+    words the parser replaced.
+    """
+    command_parser = state.command_parser
+    start = time.perf_counter()
+    stream = command_parser.tokenize(command, locale=locale)
+    parsed = time.perf_counter()
+    if state.coalescer is None or stream.handler is None:
+        outcome = command_parser.evaluate_cached(stream)
+    else:
+        # Commands with the same tokens evaluate alike, so concurrent ones share the work
+        outcome, shared = state.coalescer.run(stream.key, lambda: command_parser.evaluate_cached(stream))
+        if shared:
+            state.coalesced_count.inc()
+    evaluated = time.perf_counter()
+
+    handler = stream.handler.__name__[len('_handle_'):] if stream.handler else 'none'
+    state.phase_latency.observe(parsed - start, 'parse')
+    state.phase_latency.observe(evaluated - parsed, 'evaluate')
+    state.handler_latency.observe(evaluated - parsed, handler)
+    if not outcome.ok:
+        state.error_count.inc(_error_kind(outcome.message))
+    corrections = [{'from': heard, 'to': word, 'confidence': confidence}
+                   for heard, word, confidence in stream.corrections]
+    return outcome, corrections
+
+def _record_history(state, session, command, outcome):
+    """Append a calculation to its session's history, if the client sent a session ID."""
+    history_store = state.history_store
+    if history_store is None or not valid_session(session) or not outcome.history_entry:
+        return
+    try:
+        history_store.append(session, {'command': command, 'result': outcome.result,
+                                       'history_entry': outcome.history_entry})
+    except OSError as e:
+        current_app.logger.error(f"Error recording history: {str(e)}")
+
+@bp.app_template_global()
+def asset_urls(name):
+    """Return the URLs to load a static asset or bundle (see assets.BUNDLES).
 
-@app.route('/')
+    A built asset is one fingerprinted URL; without a build, a bundle is the
+    list of its source files under /static/.
+    """
+    assets = _state().assets
+    built = assets.get(name) if assets is not None else None
+    if built is not None:
+        return [url_for('vocalcalc.asset', filename=built)]
+    return [url_for('static', filename=member) for member in bundle_members(name)]
+
+@bp.app_template_global()
+def asset_url(name):
+    """Return the URL of a single static asset, fingerprinted if it was built."""
+    return asset_urls(name)[0]
+
+@bp.route('/assets/<path:filename>')
+def asset(filename):
+    """Serve a fingerprinted asset with immutable caching, precompressed when the client accepts gzip."""
+    assets = _state().assets
+    if assets is None or not assets.is_built(filename):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    gzipped = filename in assets.gzipped and request.accept_encodings.quality('gzip') > 0
+    response = send_from_directory(assets.directory, filename + '.gz' if gzipped else filename,
+                                   mimetype=mimetype, max_age=ASSET_MAX_AGE)
+    # Sent as the asset itself, not as a .gz download
+    response.headers.pop('Content-Disposition', None)
+    if gzipped:
+        response.headers['Content-Encoding'] = 'gzip'
+    if filename in assets.gzipped:
+        response.vary.add('Accept-Encoding')
+    # The name changes with the content, so a cached copy never needs revalidating
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@bp.route('/')
 def index():
     """Render the landing page."""
     return render_template('landing.html')
 
-@app.route('/calculator')
+@bp.route('/calculator')
 def calculator():
     """Render the calculator application page."""
     return render_template('index.html')
 
-@app.route('/api/calculate', methods=['POST'])
+def _admit(state):
+    """Apply per-client admission control; return a 429 response if the client is over its limit."""
+    if state.admission is None:
+        return None
+    retry_after = state.admission.admit(request.remote_addr)
+    if retry_after is None:
+        return None
+    state.rejected_count.inc(request.endpoint.rpartition('.')[2])
+    response = make_response(jsonify({'error': 'Too many requests'}), 429)
+    response.headers.add('Retry-After', str(math.ceil(retry_after)))
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+@bp.route('/api/calculate', methods=['POST'])
 def calculate():
     """API endpoint to process calculation requests."""
+    profiler = _state().profiler
+    if profiler is not None and profiler.wanted(request.headers.get(PROFILE_HEADER)):
+        response, name = profiler.run(_calculate, 'calculate')
+        _state().profile_count.inc('calculate')
+        response.headers.add('X-Profile', name)
+        return response
+    return _calculate()
+
+def _calculate():
+    state = _state()
+    # Shed excess load before spending anything on the request body
+    rejection = _admit(state)
+    if rejection is not None:
+        return rejection
     try:
-        data = request.get_json()
+        with state.phase_latency.time('decode'):
+            data = request.get_json()
 
         if not data:
+            state.error_count.inc('Invalid JSON data')
             response = make_response(jsonify({'error': 'Invalid JSON data'}), 400)
             response.headers.add('Access-Control-Allow-Origin', '*')
             return response
 
         if 'command' not in data:
+            state.error_count.inc('No command provided')
             response = make_response(jsonify({'error': 'No command provided'}), 400)
             response.headers.add('Access-Control-Allow-Origin', '*')
             return response
 
         if not data['command'] or not isinstance(data['command'], str):
+            state.error_count.inc('Invalid command format')
             response = make_response(jsonify({'error': 'Invalid command format'}), 400)
             response.headers.add('Access-Control-Allow-Origin', '*')
             return response
 
         command = data['command'].strip()
         if not command:
+            state.error_count.inc('Empty command provided')
             response = make_response(jsonify({'error': 'Empty command provided'}), 400)
             response.headers.add('Access-Control-Allow-Origin', '*')
             return response
 
-        result, history_entry = command_parser.parse_command(command)
+        locale, error = _validate_locale(data)
+        if error:
+            state.error_count.inc(error)
+            response = make_response(jsonify({'error': error}), 400)
+            response.headers.add('Access-Control-Allow-Origin', '*')
+            return response
+
+        outcome, corrections = _run_command(state, command, locale)
+        _record_history(state, data.get('session'), command, outcome)
 
         # Format the response
         response_data = {
             'command': command,
-            'result': result,
-            'history_entry': history_entry
+            'result': outcome.result,
+            'history_entry': outcome.history_entry
         }
+        if corrections:
+            response_data['corrections'] = corrections
 
-        response = make_response(jsonify(response_data))
+        with state.phase_latency.time('serialize'):
+            response = make_response(jsonify(response_data))
         response.headers.add('Access-Control-Allow-Origin', '*')
         response.headers.add('Content-Type', 'application/json')
         return response
     except Exception as e:
-        app.logger.error(f"Error processing calculation: {str(e)}")
+        current_app.logger.error(f"Error processing calculation: {str(e)}")
+        state.error_count.inc('Server error')
         response = make_response(jsonify({'error': f'Server error: {str(e)}'}), 500)
         response.headers.add('Access-Control-Allow-Origin', '*')
         return response
 
-@app.route('/api/health', methods=['GET'])
+def _validate_command(item):
+    """Return (command, error) for one batch item: a string or a {'command': ...} object."""
+    if isinstance(item, dict):
+        if 'command' not in item:
+            return None, 'No command provided'
+        item = item['command']
+    if not item or not isinstance(item, str):
+        return None, 'Invalid command format'
+    command = item.strip()
+    if not command:
+        return None, 'Empty command provided'
+    return command, None
+
+
+def _validate_locale(item):
+    """Return (locale, error) for a request's optional "locale" field, such as "es" or "es-ES".
+
+    The locale is None (the default) when the field is absent.
+    """
+    if not isinstance(item, dict) or item.get('locale') is None:
+        return None, None
+    locale = normalize_locale(item['locale'])
+    if locale is None or locale not in _state().command_parser.locales:
+        return None, 'Unsupported locale'
+    return locale, None
+
+
+def _evaluate_item(item):
+    """Evaluate one command item, reporting any failure inside its own entry."""
+    state = _state()
+    command, error = _validate_command(item)
+    if not error:
+        locale, error = _validate_locale(item)
+    if error:
+        state.error_count.inc(error)
+        return {'error': error}
+    try:
+        outcome, corrections = _run_command(state, command, locale)
+    except Exception as e:
+        current_app.logger.error(f"Error processing command {command!r}: {str(e)}")
+        state.error_count.inc('Server error')
+        return {'command': command, 'error': f'Server error: {str(e)}'}
+    if isinstance(item, dict):
+        _record_history(state, item.get('session'), command, outcome)
+    response = {'command': command, 'result': outcome.result, 'history_entry': outcome.history_entry}
+    if corrections:
+        response['corrections'] = corrections
+    return response
+
+
+def _interim_item(item):
+    """Evaluate one interim transcript; returns the reply fields or {'error': ...}."""
+    if not isinstance(item, dict):
+        return {'error': 'Invalid interim transcript'}
+    utterance = item.get('utterance')
+    transcript = item.get('transcript')
+    if (not isinstance(utterance, str) or not 0 < len(utterance) <= MAX_UTTERANCE_ID
+            or not isinstance(transcript, str)):
+        return {'error': 'Invalid interim transcript'}
+    locale, error = _validate_locale(item)
+    if error:
+        return {'error': error}
+    return _state().interim.update(utterance, transcript, final=item.get('final') is True, locale=locale)
+
+
+def _iter_ndjson_items(stream):
+    """Yield (item, error) pairs from an NDJSON body as it arrives, skipping blank lines."""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line), None
+        except ValueError:
+            yield None, 'Invalid JSON line'
+
+
+@bp.route('/api/calculate/batch', methods=['POST'])
+def calculate_batch():
+    """API endpoint to evaluate many commands, streaming one NDJSON result per line.
+
+    The body is either a JSON array of commands (or {'commands': [...]}) or an
+    NDJSON stream with one command per line. Each command may be a string or a
+    {'command': ...} object.
+    """
+    max_size = current_app.config['BATCH_MAX_SIZE']
+
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        items = _iter_ndjson_items(request.stream)
+    else:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get('commands')
+        if not isinstance(data, list):
+            response = make_response(jsonify({'error': 'Expected a list of commands'}), 400)
+            response.headers.add('Access-Control-Allow-Origin', '*')
+            return response
+        if len(data) > max_size:
+            response = make_response(jsonify({'error': f'Batch exceeds maximum size of {max_size}'}), 413)
+            response.headers.add('Access-Control-Allow-Origin', '*')
+            return response
+        items = ((item, None) for item in data)
+
+    def generate():
+        for index, (item, error) in enumerate(items):
+            if index >= max_size:
+                # NDJSON bodies are not counted up front, so stop at the limit
+                yield json.dumps({'index': index, 'error': f'Batch exceeds maximum size of {max_size}'}) + '\n'
+                return
+            if error:
+                _state().error_count.inc(error)
+                entry = {'index': index, 'error': error}
+            else:
+                entry = {'index': index, **_evaluate_item(item)}
+            yield json.dumps(entry) + '\n'
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+def _requested_percentiles(value):
+    """Parse ?percentiles=50,90,99 into a tuple of percentiles, or None if it is invalid."""
+    if value is None:
+        return DEFAULT_PERCENTILES
+    try:
+        percentiles = tuple(float(part) for part in value.split(',') if part.strip())
+    except ValueError:
+        return None
+    if len(percentiles) > MAX_PERCENTILES or not all(0 <= p <= 100 for p in percentiles):
+        return None
+    return percentiles
+
+
+@bp.route('/api/stats', methods=['POST'])
+def upload_stats():
+    """Summary statistics of an uploaded list of numbers.
+
+    The body is the numbers as text, separated by whitespace, commas or
+    semicolons: a pasted column or a CSV row. It is summarized in one pass
+    as it is read, in constant memory (see stats.py), so it can be any
+    size; past stats.EXACT_LIMIT values the median and percentiles are
+    estimates, and "exact" is false. ?percentiles=50,90,99 picks the
+    percentiles reported. Values are not rounded.
+    """
+    percentiles = _requested_percentiles(request.args.get('percentiles'))
+    if percentiles is None:
+        return _stats_error('Invalid percentiles')
+    summary = Summary(sorted({0.5, *(p / 100 for p in percentiles)}))
+    try:
+        summary.extend(parse_numbers(iter(lambda: request.stream.read(STATS_CHUNK_SIZE), b'')))
+    except ValueError as e:
+        return _stats_error(str(e))
+    stats = summary.stats
+    if not stats.count:
+        return _stats_error('No numbers provided')
+
+    response = make_response(jsonify({
+        'count': stats.count,
+        'sum': stats.total,
+        'mean': stats.mean,
+        'median': summary.median,
+        'variance': stats.variance,
+        'standard_deviation': stats.standard_deviation,
+        'min': stats.minimum,
+        'max': stats.maximum,
+        'percentiles': {f'{p:g}': summary.quantile(p / 100) for p in percentiles},
+        'exact': summary.exact,
+    }))
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+
+def _stats_error(message):
+    _state().error_count.inc(_error_kind(message))
+    response = make_response(jsonify({'error': message}), 400)
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+
+@bp.route('/api/interim', methods=['POST'])
+def interim():
+    """Provisional result of a transcript still being spoken.
+
+    The body is {"utterance": ..., "transcript": ..., "final": false}; see
+    interim.py. Interim results are not recorded in the history.
+    """
+    entry = _interim_item(request.get_json(silent=True))
+    response = make_response(jsonify(entry), 400 if 'error' in entry else 200)
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+
+@bp.route('/api/locales', methods=['GET'])
+def locales():
+    """The locales commands can be sent in, as the "locale" field of a request."""
+    command_parser = _state().command_parser
+    response = make_response(jsonify({
+        'default': DEFAULT_LOCALE,
+        'locales': sorted(command_parser.locales),
+        'loaded': command_parser.loaded_locales,
+    }))
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+
+@bp.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Result cache counters, summed across all workers."""
+    result_cache = _state().result_cache
+    stats = result_cache.stats() if result_cache else {}
+    response = make_response(jsonify({'enabled': result_cache is not None, **stats}))
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+if Sock is not None:
+    sock = Sock()
+
+    @sock.route('/api/session', bp=bp)
+    def calculation_session(ws):
+        """WebSocket carrying tagged calculate requests and server heartbeats."""
+        _state().session_protocol.serve(ws)
+
+@bp.route('/api/history/<session>', methods=['GET'])
+def history_page(session):
+    """One page of a session's history, newest first.
+
+    Query parameters: before (the next_cursor of the previous page) and
+    limit (default 20, at most 100).
+    """
+    history_store = _state().history_store
+    if history_store is None:
+        response = make_response(jsonify({'error': 'History is disabled'}), 404)
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response
+
+    before = request.args.get('before', type=int)
+    limit = request.args.get('limit', 20, type=int)
+    if not valid_session(session):
+        response = make_response(jsonify({'error': 'Invalid session ID'}), 400)
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response
+
+    entries, next_cursor, total = history_store.page(session, before=before, limit=limit)
+    response = make_response(jsonify({
+        'session': session,
+        'entries': entries,
+        'next_cursor': next_cursor,
+        'total': total,
+    }))
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+@bp.route('/api/history/<session>', methods=['POST'])
+def append_history(session):
+    """Record a calculation the browser evaluated itself.
+
+    The body is {"command": ..., "result": ..., "history_entry": ...}.
+    """
+    history_store = _state().history_store
+    if history_store is None:
+        response = make_response(jsonify({'error': 'History is disabled'}), 404)
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response
+    if not valid_session(session):
+        response = make_response(jsonify({'error': 'Invalid session ID'}), 400)
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response
+
+    data = request.get_json(silent=True)
+    if (not isinstance(data, dict) or not isinstance(data.get('command'), str)
+            or not isinstance(data.get('history_entry'), str) or not data['history_entry']
+            or isinstance(data.get('result'), bool) or not isinstance(data.get('result'), (int, float, str))):
+        response = make_response(jsonify({'error': 'Invalid history record'}), 400)
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response
+
+    seq = history_store.append(session, {'command': data['command'], 'result': data['result'],
+                                         'history_entry': data['history_entry']})
+    response = make_response(jsonify({'session': session, 'seq': seq}), 201)
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+
+@bp.route('/api/history/<session>', methods=['DELETE'])
+def clear_history(session):
+    """Delete a session's history."""
+    history_store = _state().history_store
+    if history_store is None:
+        response = make_response(jsonify({'error': 'History is disabled'}), 404)
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response
+    if not valid_session(session):
+        response = make_response(jsonify({'error': 'Invalid session ID'}), 400)
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response
+
+    history_store.clear(session)
+    response = make_response(jsonify({'session': session, 'cleared': True}))
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+
+def _worksheet_response(session, change):
+    """Apply change(sheet, parser) to a session's worksheet and return the cells it changed.
+
+    Errors become 400 (invalid session or command) or 404 (unknown cell).
+    """
+    state = _state()
+    try:
+        with state.worksheets.open(session) as sheet:
+            changed = change(sheet, state.command_parser)
+            version = sheet.version
+    except KeyError:
+        response = make_response(jsonify({'error': 'Cell not found'}), 404)
+    except ValueError as e:
+        response = make_response(jsonify({'error': str(e)}), 400)
+    else:
+        response = make_response(jsonify({'session': session, 'version': version, 'changed': changed}))
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+
+def _worksheet_command():
+    """Return the command in the request body; raises ValueError if there is none."""
+    data = request.get_json(silent=True)
+    command = data.get('command') if isinstance(data, dict) else None
+    if not isinstance(command, str) or not command.strip():
+        raise ValueError('No command provided')
+    return command
+
+
+@bp.route('/api/worksheet/<session>', methods=['GET'])
+def worksheet(session):
+    """The cells of a session's worksheet changed after version since (default 0, every cell)."""
+    since = request.args.get('since', 0, type=int)
+    return _worksheet_response(session, lambda sheet, parser: sheet.changes(since))
+
+
+@bp.route('/api/worksheet/<session>', methods=['POST'])
+def worksheet_enter(session):
+    """Add {"command": ...} to a session's worksheet, or redefine a name it already has."""
+    return _worksheet_response(session, lambda sheet, parser: sheet.enter(_worksheet_command(), parser))
+
+
+@bp.route('/api/worksheet/<session>/cells/<int:cell_id>', methods=['PUT'])
+def worksheet_edit(session, cell_id):
+    """Replace the command of one cell with {"command": ...}."""
+    return _worksheet_response(session, lambda sheet, parser: sheet.edit(cell_id, _worksheet_command(), parser))
+
+
+@bp.route('/api/worksheet/<session>/cells/<int:cell_id>', methods=['DELETE'])
+def worksheet_remove(session, cell_id):
+    """Delete one cell."""
+    return _worksheet_response(session, lambda sheet, parser: sheet.remove(cell_id, parser))
+
+
+@bp.route('/api/worksheet/<session>', methods=['DELETE'])
+def worksheet_clear(session):
+    """Delete a session's worksheet."""
+    try:
+        _state().worksheets.clear(session)
+    except ValueError as e:
+        response = make_response(jsonify({'error': str(e)}), 400)
+    else:
+        response = make_response(jsonify({'session': session, 'cleared': True}))
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+@bp.route('/api/grammar', methods=['GET'])
+def grammar():
+    """The parser's vocabulary and simple-command rules, for evaluating in the browser.
+
+    Versioned by content: the ETag is the grammar version, and clients
+    revalidate it on every page load.
+    """
+    state = _state()
+    response = make_response(state.grammar_json)
+    response.mimetype = 'application/json'
+    response.set_etag(state.grammar_version)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response.make_conditional(request)
+
+def _profiler_or_error():
+    """Return (profiler, None) for an authorized request, else (None, error response)."""
+    profiler = _state().profiler
+    if profiler is None:
+        response = make_response(jsonify({'error': 'Profiling is disabled'}), 404)
+    elif not profiler.authorized(request.headers.get(PROFILE_HEADER)):
+        response = make_response(jsonify({'error': 'Invalid profiling token'}), 403)
+    else:
+        return profiler, None
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return None, response
+
+@bp.route('/api/profiles', methods=['GET'])
+def profiles():
+    """Stored request profiles, newest first. Needs the profiling token."""
+    profiler, error = _profiler_or_error()
+    if error is not None:
+        return error
+    response = make_response(jsonify({'format': profiler.output_format, 'profiles': profiler.list()}))
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+@bp.route('/api/profiles/<name>', methods=['GET'])
+def profile_download(name):
+    """Download one stored profile. Needs the profiling token."""
+    profiler, error = _profiler_or_error()
+    if error is not None:
+        return error
+    if profiler.path(name) is None:
+        response = make_response(jsonify({'error': 'Profile not found'}), 404)
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response
+    response = send_from_directory(profiler.directory, name, as_attachment=True,
+                                   mimetype='application/octet-stream' if name.endswith('.prof') else 'text/plain')
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+@bp.route('/api/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Request counts, latency histograms and error counts in Prometheus text format."""
+    response = make_response(_state().metrics.render())
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+@bp.route('/api/startup', methods=['GET'])
+def startup_report():
+    """Startup timings of the worker serving this request."""
+    response = make_response(jsonify(_state().startup.as_dict()))
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+@bp.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
     response = make_response(jsonify({'status': 'healthy'}))
@@ -86,6 +912,9 @@ def health_check():
     response.headers.add('Content-Type', 'application/json')
     return response
 
+# Module-level instance for `gunicorn app:app` and `flask run`
+app = create_app()
+
 if __name__ == '__main__':
     # Get port from environment variable or use 5000 as default
     port = int(os.environ.get('PORT', 5000))
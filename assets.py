@@ -0,0 +1,69 @@
+"""
+Fingerprinted static assets.
+
+``python build_assets.py`` copies every file under static/ to the build
+directory under a content-hashed name (css/styles.css ->
+css/styles.3f2a9c1be07d.css), concatenates the bundles below, stores a gzip
+variant next to every compressible file and writes manifest.json mapping
+each logical name to its built name. A file's URL changes whenever its
+content does, so built assets are served with far-future immutable caching.
+
+Templates link assets through asset_url() and asset_urls(). Without a built
+manifest (a development checkout) they fall back to the plain files under
+/static/, so nothing has to be built to run the app.
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+
+MANIFEST_NAME = "manifest.json"
+
+# Files each page loads, concatenated into one request per kind. Order matters:
+# the scripts are classic scripts that build on each other's globals.
+BUNDLES = {
+    "css/calculator.bundle.css": [
+        "css/normalize.css", "css/styles.css", "css/animations.css", "css/responsive.css",
+    ],
+    "css/landing.bundle.css": ["css/normalize.css", "css/landing.css"],
+    "js/calculator.bundle.js": [
+        "js/settings.js", "js/ui.js", "js/speech.js", "js/calculator.js", "js/app.js",
+    ],
+}
+
+# Text formats worth storing gzipped
+COMPRESSIBLE_EXTENSIONS = frozenset((".css", ".js", ".svg", ".json", ".html", ".txt"))
+
+
+class AssetManifest:
+    """Logical asset name -> fingerprinted name, as written by build_assets.py."""
+
+    def __init__(self, directory: str, assets: Dict[str, str]):
+        self.directory = directory
+        self.assets = assets
+        self.built = frozenset(assets.values())
+        self.gzipped = frozenset(name for name in self.built
+                                 if os.path.isfile(os.path.join(directory, *name.split("/")) + ".gz"))
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["AssetManifest"]:
+        """Return the manifest built into directory, or None if there is none."""
+        try:
+            with open(os.path.join(directory, MANIFEST_NAME), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        return cls(directory, manifest["assets"])
+
+    def get(self, name: str) -> Optional[str]:
+        """Return the fingerprinted name of a logical asset, if it was built."""
+        return self.assets.get(name)
+
+    def is_built(self, filename: str) -> bool:
+        """Return whether filename is a fingerprinted file of this build."""
+        return filename in self.built
+
+
+def bundle_members(name: str) -> List[str]:
+    """Return the source files of a bundle, or [name] for a plain asset."""
+    return list(BUNDLES.get(name, [name]))
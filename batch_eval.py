@@ -0,0 +1,212 @@
+"""
+Evaluate a file of spoken commands offline, in parallel.
+
+    python batch_eval.py transcripts.txt -o results.jsonl
+    python batch_eval.py transcripts.jsonl --workers 8 < ...
+
+The input is plain text (one command per line) or JSONL (one JSON string or
+{"command": ...} object per line); ``--format auto`` picks JSONL for .jsonl
+and .ndjson files. Each non-blank input line produces one output line, in
+input order:
+
+    {"line": 12, "command": "what is 5 plus 3", "result": 8, "history_entry": "5 + 3 = 8"}
+    {"line": 13, "error": "Invalid JSON line"}
+
+Commands whose misheard words were corrected also carry a "corrections" list,
+as in the API. ``--no-history`` leaves out history_entry, which saves
+formatting it.
+
+The input is read in blocks of whole lines and each block is parsed,
+evaluated and serialized by a worker process, so the parent only moves
+bytes. At most a few blocks per worker are in flight at once, so memory
+stays flat however large the input is. Throughput is reported on stderr.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from command_parser import CommandParser
+
+DEFAULT_BLOCK_SIZE = 256 * 1024
+IN_FLIGHT_PER_WORKER = 4
+
+_parser: Optional[CommandParser] = None
+
+
+def _init_worker() -> None:
+    global _parser
+    _parser = CommandParser()
+
+
+def _command_from_line(line: str, jsonl: bool) -> Tuple[Optional[dict], Optional[str]]:
+    """Return (fields, error) for one input line; fields holds the command and an optional id."""
+    if not jsonl:
+        return {'command': line}, None
+    try:
+        item = json.loads(line)
+    except ValueError:
+        return None, 'Invalid JSON line'
+    fields = {}
+    if isinstance(item, dict):
+        if 'command' not in item:
+            return None, 'No command provided'
+        if 'id' in item:
+            fields['id'] = item['id']
+        item = item['command']
+    if not item or not isinstance(item, str):
+        return None, 'Invalid command format'
+    fields['command'] = item
+    return fields, None
+
+
+def evaluate_block(block: bytes, first_line: int, jsonl: bool, history: bool = True) -> Tuple[bytes, int]:
+    """Evaluate every non-blank line of a block; return (JSONL output, commands evaluated).
+
+    Without history, entries have no history_entry field.
+    """
+    parser = _parser or CommandParser()
+    out = []
+    count = 0
+    for number, raw in enumerate(block.decode('utf-8', 'replace').split('\n'), first_line):
+        line = raw.strip()
+        if not line:
+            continue
+        count += 1
+        fields, error = _command_from_line(line, jsonl)
+        if error:
+            out.append(json.dumps({'line': number, 'error': error}))
+            continue
+        command = fields['command'].strip()
+        if not command:
+            out.append(json.dumps({'line': number, **fields, 'error': 'Empty command provided'}))
+            continue
+        try:
+            stream = parser.tokenize(command)
+            outcome = parser.evaluate_cached(stream)
+        except Exception as e:
+            out.append(json.dumps({'line': number, **fields, 'error': f'Error: {e}'}))
+            continue
+        entry = {'line': number, **fields, 'command': command, 'result': outcome.result}
+        if history:
+            entry['history_entry'] = outcome.history_entry
+        if stream.corrections:
+            entry['corrections'] = [{'from': heard, 'to': word, 'confidence': confidence}
+                                    for heard, word, confidence in stream.corrections]
+        out.append(json.dumps(entry))
+    return ('\n'.join(out) + '\n' if out else '').encode('utf-8'), count
+
+
+def read_blocks(stream: BinaryIO, block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[Tuple[bytes, int]]:
+    """Yield (block, first line number) pairs of whole lines, about block_size bytes each."""
+    line = 1
+    remainder = b''
+    while True:
+        data = stream.read(block_size)
+        if not data:
+            break
+        data = remainder + data
+        cut = data.rfind(b'\n') + 1
+        if cut == 0:
+            # No newline yet: keep reading until the line ends
+            remainder = data
+            continue
+        block, remainder = data[:cut], data[cut:]
+        yield block, line
+        line += block.count(b'\n')
+    if remainder:
+        yield remainder, line
+
+
+def run(source: BinaryIO, sink: BinaryIO, jsonl: bool, workers: int = 1,
+        block_size: int = DEFAULT_BLOCK_SIZE, progress=None, history: bool = True) -> int:
+    """Evaluate source into sink and return the number of commands evaluated.
+
+    progress, if given, is called as progress(commands, bytes_read) after
+    every block is written.
+    """
+    total = 0
+    read = 0
+
+    def write(output: bytes, count: int, size: int) -> None:
+        nonlocal total, read
+        sink.write(output)
+        total += count
+        read += size
+        if progress:
+            progress(total, read)
+
+    if workers <= 1:
+        for block, first_line in read_blocks(source, block_size):
+            write(*evaluate_block(block, first_line, jsonl, history), len(block))
+        return total
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = deque()
+        for block, first_line in read_blocks(source, block_size):
+            pending.append((pool.submit(evaluate_block, block, first_line, jsonl, history), len(block)))
+            # Bound the blocks held in memory; results are written in input order
+            if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                future, size = pending.popleft()
+                write(*future.result(), size)
+        while pending:
+            future, size = pending.popleft()
+            write(*future.result(), size)
+    return total
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Evaluate a file of voice commands into JSONL results.")
+    ap.add_argument("input", help="text or JSONL file of commands, or - for stdin")
+    ap.add_argument("-o", "--output", default="-", help="JSONL output file (default: stdout)")
+    ap.add_argument("--format", choices=("auto", "text", "jsonl"), default="auto",
+                    help="input format (default: jsonl for .jsonl/.ndjson files, text otherwise)")
+    ap.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                    help="worker processes (default: CPU count; 1 runs in-process)")
+    ap.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE,
+                    help="bytes of input per work unit (default: %(default)s)")
+    ap.add_argument("--no-history", dest="history", action="store_false",
+                    help="leave history_entry out of the output")
+    ap.add_argument("-q", "--quiet", action="store_true", help="do not report progress")
+    args = ap.parse_args(argv)
+
+    jsonl = args.format == "jsonl" or (
+        args.format == "auto" and args.input.lower().endswith((".jsonl", ".ndjson")))
+
+    source = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    sink = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    start = time.perf_counter()
+    last_report = start
+
+    def progress(commands: int, size: int) -> None:
+        nonlocal last_report
+        now = time.perf_counter()
+        if not args.quiet and now - last_report >= 1.0:
+            last_report = now
+            print(f"{commands:,} commands, {size / 1e6:,.1f} MB, "
+                  f"{commands / (now - start):,.0f} commands/s", file=sys.stderr)
+
+    try:
+        total = run(source, sink, jsonl, workers=args.workers, block_size=args.block_size, progress=progress,
+                    history=args.history)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if sink is not sys.stdout.buffer:
+            sink.close()
+
+    elapsed = time.perf_counter() - start
+    if not args.quiet:
+        print(f"Evaluated {total:,} commands in {elapsed:.2f}s "
+              f"({total / elapsed if elapsed else 0:,.0f} commands/s, {args.workers} workers)",
+              file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Build fingerprinted, precompressed static assets.
+
+    python build_assets.py                 # static/ -> static_dist/
+    python build_assets.py -o /tmp/assets
+
+Every file under static/ and every bundle in assets.BUNDLES is written to
+the output directory as <name>.<hash>.<ext>, with a <file>.gz variant for
+text formats when gzip makes it smaller, and manifest.json maps logical
+names to the built names. Output is deterministic, so rebuilding unchanged
+sources changes nothing. An earlier build in the output directory is replaced.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+from typing import Dict, List
+
+from assets import BUNDLES, COMPRESSIBLE_EXTENSIONS, MANIFEST_NAME
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SOURCE = os.path.join(ROOT, "static")
+DEFAULT_OUTPUT = os.path.join(ROOT, "static_dist")
+
+HASH_LENGTH = 12
+
+
+def fingerprint(name: str, data: bytes) -> str:
+    """Return name with a content hash before its extension: css/a.css -> css/a.<hash>.css."""
+    base, ext = os.path.splitext(name)
+    return f"{base}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def _read_sources(source: str) -> Dict[str, bytes]:
+    """Return logical name (a /-separated path relative to source) -> content."""
+    files = {}
+    for directory, _, names in os.walk(source):
+        for filename in sorted(names):
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, source).replace(os.sep, "/")
+            with open(path, "rb") as f:
+                files[name] = f.read()
+    return files
+
+
+def _bundle(name: str, members, files: Dict[str, bytes]) -> bytes:
+    # Scripts are joined with a semicolon so a file without a trailing one
+    # cannot run into the next
+    separator = b"\n;\n" if name.endswith(".js") else b"\n"
+    return separator.join(files[member].rstrip(b"\n") for member in members) + b"\n"
+
+
+def _write(output: str, name: str, data: bytes) -> None:
+    path = os.path.join(output, *name.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    if os.path.splitext(name)[1] in COMPRESSIBLE_EXTENSIONS:
+        # mtime=0 keeps the compressed bytes identical across builds
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) < len(data):
+            with open(path + ".gz", "wb") as f:
+                f.write(compressed)
+
+
+def build(source: str = DEFAULT_SOURCE, output: str = DEFAULT_OUTPUT,
+          bundles: Dict[str, List[str]] = BUNDLES) -> Dict[str, str]:
+    """Build the assets of source into output and return the manifest's name mapping."""
+    files = _read_sources(source)
+    for name, members in bundles.items():
+        missing = [member for member in members if member not in files]
+        if missing:
+            raise ValueError(f"Bundle {name} lists missing files: {', '.join(missing)}")
+        files[name] = _bundle(name, members, files)
+
+    # Replace an earlier build, but never a directory that is not one
+    if os.path.isdir(output) and os.listdir(output):
+        if not os.path.isfile(os.path.join(output, MANIFEST_NAME)):
+            raise ValueError(f"{output} is not empty and holds no earlier build")
+        shutil.rmtree(output)
+    os.makedirs(output, exist_ok=True)
+
+    assets = {}
+    for name in sorted(files):
+        assets[name] = fingerprint(name, files[name])
+        _write(output, assets[name], files[name])
+
+    with open(os.path.join(output, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump({"assets": assets}, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return assets
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Build fingerprinted, gzipped static assets.")
+    ap.add_argument("-s", "--source", default=DEFAULT_SOURCE, help="static source directory (default: static/)")
+    ap.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="build directory (default: static_dist/)")
+    args = ap.parse_args(argv)
+
+    try:
+        assets = build(args.source, args.output)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    total = sum(os.path.getsize(os.path.join(args.output, *built.split("/"))) for built in assets.values())
+    print(f"Built {len(assets)} assets ({total / 1024:.1f} KiB) into {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,63 @@ Calculator model for basic and scientific operations.
 """
 
 import math
-from typing import Union
+from typing import Iterable, Optional, Union
+
+from stats import RunningStats, Summary
+from units import conversion
+
+# Error codes shared by the scalar and vectorized calculators; 0 means success.
+ERROR_NONE = 0
+ERROR_DIVISION_BY_ZERO = 1
+ERROR_LOG_NON_POSITIVE = 2
+ERROR_SQRT_NEGATIVE = 3
+ERROR_INVALID_OPERATION = 4
+ERROR_TANGENT_UNDEFINED = 5
+# Raised by the command parser: no operation recognized, and an operation
+# whose operands could not be read (its message names the problem)
+ERROR_INVALID_COMMAND = 6
+ERROR_MALFORMED_COMMAND = 7
+# A conversion between units that measure different things (miles to kilograms)
+ERROR_INCOMPATIBLE_UNITS = 8
+# A statistic of an empty list, or the variance of a single value
+ERROR_NOT_ENOUGH_VALUES = 9
+
+ERROR_MESSAGES = {
+    ERROR_DIVISION_BY_ZERO: "Error: Division by zero",
+    ERROR_LOG_NON_POSITIVE: "Error: Logarithm of non-positive number",
+    ERROR_SQRT_NEGATIVE: "Error: Square root of negative number",
+    ERROR_INVALID_OPERATION: "Error: Invalid operation",
+    ERROR_TANGENT_UNDEFINED: "Error: Tangent is undefined",
+    ERROR_INVALID_COMMAND: "Invalid command",
+    ERROR_INCOMPATIBLE_UNITS: "Error: Cannot convert between these units",
+    ERROR_NOT_ENOUGH_VALUES: "Error: Not enough values",
+}
+
+# Decimal places kept in rounded results (division, powers, square roots)
+RESULT_DECIMALS = 2
+
+# Whole numbers at least this large are written in exponent notation, as
+# Python prints floats, rather than as hundreds of digits
+INTEGER_FORMAT_LIMIT = 1e16
+
+# Exact results for the inputs users ask about most, built once at import.
+# Keys are numbers, so a lookup with an integral float (9.0) finds the
+# integer key (9). Anything not in a table goes through math as before.
+
+# Integer degrees 0-359; angles are reduced modulo 360 before lookup
+_QUADRANT_SINES = {0: 0.0, 90: 1.0, 180: 0.0, 270: -1.0}
+SINE_TABLE = {d: _QUADRANT_SINES.get(d, round(math.sin(math.radians(d)), 2)) for d in range(360)}
+COSINE_TABLE = {d: SINE_TABLE[(d + 90) % 360] for d in range(360)}
+TANGENT_TABLE = {
+    d: (ERROR_MESSAGES[ERROR_TANGENT_UNDEFINED] if d in (90, 270)
+        else 0.0 if d in (0, 180)
+        else round(math.tan(math.radians(d)), 2))
+    for d in range(360)
+}
+
+SQUARE_ROOT_TABLE = {n * n: float(n) for n in range(10001)}
+CUBE_ROOT_TABLE = {n ** 3: float(n) for n in range(1001)}
+LOG10_TABLE = {float(f"1e{k}"): float(k) for k in range(-15, 16)}
 
 
 class Calculator:
@@ -25,38 +81,55 @@ class Calculator:
         return x * y
 
     @staticmethod
-    def divide(x: float, y: float, decimal_points: int = 2) -> Union[float, str]:
+    def divide(x: float, y: float, decimal_points: int = RESULT_DECIMALS) -> Union[float, str]:
         """Return the quotient of x and y, handling division by zero, formatted to decimal points."""
         if y == 0:
-            return "Error: Division by zero"
+            return ERROR_MESSAGES[ERROR_DIVISION_BY_ZERO]
         return round(x / y, decimal_points)
 
     @staticmethod
     def logarithm(x: float, base: float = 10) -> Union[float, str]:
         """Return the logarithm of x to the specified base."""
         if x <= 0:
-            return "Error: Logarithm of non-positive number"
+            return ERROR_MESSAGES[ERROR_LOG_NON_POSITIVE]
+        if base == 10:
+            exact = LOG10_TABLE.get(x)
+            if exact is not None:
+                return exact
         return round(math.log(x, base), 2)
 
     @staticmethod
     def square_root(x: float) -> Union[float, str]:
         """Return the square root of x."""
         if x < 0:
-            return "Error: Square root of negative number"
-        return round(math.sqrt(x), 2)
+            return ERROR_MESSAGES[ERROR_SQRT_NEGATIVE]
+        exact = SQUARE_ROOT_TABLE.get(x)
+        if exact is not None:
+            return exact
+        return round(math.sqrt(x), RESULT_DECIMALS)
 
     @staticmethod
     def cube_root(x: float) -> float:
         """Return the cube root of x."""
+        exact = CUBE_ROOT_TABLE.get(abs(x))
+        if exact is not None:
+            return -exact if x < 0 else exact
         # Handle negative numbers correctly for cube root
         if x < 0:
             return -round(abs(x) ** (1/3), 2)
         return round(x ** (1/3), 2)
 
     @staticmethod
-    def exponentiation(x: float, y: float) -> float:
-        """Return x raised to the power of y."""
-        return round(x ** y, 2)
+    def exponentiation(x: float, y: float) -> Union[float, str]:
+        """Return x raised to the power of y.
+
+        Overflow, zero to a negative power and a negative base with a
+        fractional exponent (a complex result) are invalid operations.
+        """
+        try:
+            return round(x ** y, RESULT_DECIMALS)
+        except (OverflowError, ZeroDivisionError, TypeError):
+            return ERROR_MESSAGES[ERROR_INVALID_OPERATION]
 
     @staticmethod
     def exponential(x: float) -> float:
@@ -66,21 +139,102 @@ class Calculator:
     @staticmethod
     def sine(x: float) -> float:
         """Return the sine of x (in degrees)."""
+        exact = SINE_TABLE.get(x % 360)
+        if exact is not None:
+            return exact
         return round(math.sin(math.radians(x)), 2)
 
     @staticmethod
     def cosine(x: float) -> float:
         """Return the cosine of x (in degrees)."""
+        exact = COSINE_TABLE.get(x % 360)
+        if exact is not None:
+            return exact
         return round(math.cos(math.radians(x)), 2)
 
     @staticmethod
-    def tangent(x: float) -> float:
-        """Return the tangent of x (in degrees)."""
+    def tangent(x: float) -> Union[float, str]:
+        """Return the tangent of x (in degrees), which is undefined at 90 + 180k."""
+        exact = TANGENT_TABLE.get(x % 360)
+        if exact is not None:
+            return exact
         return round(math.tan(math.radians(x)), 2)
 
+    @staticmethod
+    def convert(x: float, from_unit: str, to_unit: str) -> Union[float, str]:
+        """Return x in from_unit expressed in to_unit (unit names from units.py)."""
+        factors = conversion(from_unit, to_unit)
+        if factors is None:
+            return ERROR_MESSAGES[ERROR_INCOMPATIBLE_UNITS]
+        scale, offset = factors
+        return round(x * scale + offset, RESULT_DECIMALS)
+
+    # List statistics read their values in one pass (see stats.py), so any
+    # iterable works, however long
+
+    @staticmethod
+    def sum(values: Iterable[float]) -> Union[float, str]:
+        """Return the sum of the values."""
+        stats = _running(values)
+        return stats.total if stats.count else ERROR_MESSAGES[ERROR_NOT_ENOUGH_VALUES]
+
+    @staticmethod
+    def mean(values: Iterable[float]) -> Union[float, str]:
+        """Return the arithmetic mean of the values."""
+        stats = _running(values)
+        return _rounded(stats.mean if stats.count else None)
+
+    @staticmethod
+    def median(values: Iterable[float]) -> Union[float, str]:
+        """Return the median of the values, estimated for very long lists."""
+        return _rounded(Summary((0.5,)).extend(values).median)
+
+    @staticmethod
+    def percentile(values: Iterable[float], p: float) -> Union[float, str]:
+        """Return the p-th percentile (0-100) of the values, interpolating between ranks."""
+        if not 0 <= p <= 100:
+            return ERROR_MESSAGES[ERROR_INVALID_OPERATION]
+        return _rounded(Summary((p / 100,)).extend(values).quantile(p / 100))
+
+    @staticmethod
+    def variance(values: Iterable[float]) -> Union[float, str]:
+        """Return the sample variance of the values."""
+        return _rounded(_running(values).variance)
+
+    @staticmethod
+    def standard_deviation(values: Iterable[float]) -> Union[float, str]:
+        """Return the sample standard deviation of the values."""
+        return _rounded(_running(values).standard_deviation)
+
+    @staticmethod
+    def minimum(values: Iterable[float]) -> Union[float, str]:
+        """Return the smallest of the values."""
+        stats = _running(values)
+        return stats.minimum if stats.count else ERROR_MESSAGES[ERROR_NOT_ENOUGH_VALUES]
+
+    @staticmethod
+    def maximum(values: Iterable[float]) -> Union[float, str]:
+        """Return the largest of the values."""
+        stats = _running(values)
+        return stats.maximum if stats.count else ERROR_MESSAGES[ERROR_NOT_ENOUGH_VALUES]
+
     @classmethod
     def format_result(cls, result: Union[float, str]) -> str:
         """Format the result for display."""
-        if isinstance(result, float) and result.is_integer():
+        if isinstance(result, float) and result.is_integer() and abs(result) < INTEGER_FORMAT_LIMIT:
             return str(int(result))
         return str(result)
+
+
+def _running(values: Iterable[float]) -> RunningStats:
+    stats = RunningStats()
+    for x in values:
+        stats.add(x)
+    return stats
+
+
+def _rounded(value: Optional[float]) -> Union[float, str]:
+    """Round a statistic, or report that there were too few values for it."""
+    if value is None:
+        return ERROR_MESSAGES[ERROR_NOT_ENOUGH_VALUES]
+    return round(value, RESULT_DECIMALS)
@@ -2,320 +2,939 @@
 Command parser for processing voice commands.
 """
 
-from typing import Tuple, Union, List
-from calculator import Calculator
+import hashlib
+import json
+import re
+import threading
+from itertools import chain
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, List, Optional, Set, Tuple, Union
+from calculator import (ERROR_DIVISION_BY_ZERO, ERROR_INVALID_COMMAND, ERROR_MALFORMED_COMMAND, ERROR_MESSAGES,
+                        ERROR_NONE, ERROR_SQRT_NEGATIVE, INTEGER_FORMAT_LIMIT, RESULT_DECIMALS, Calculator)
+from expression import NUMBER, OPERATOR_TOKENS, Program, compile_shape, needs_compiler
+from fuzzy_index import FuzzyIndex, FuzzyMatch
+from number_words import WORDS as NUMBER_WORDS, NumberWordRecognizer, format_number
+from units import SYMBOLS as UNIT_SYMBOLS, UNIT_WORDS, UNITS
+from vocabulary import DEFAULT_LOCALE, LOCALE_DIR, available_locales, load_locale
+
+if TYPE_CHECKING:
+    from result_cache import ResultCache
+
+
+# Operation keywords in dispatch priority order. When a command mentions
+# several operations the family listed first wins, exactly like the original
+# if/elif cascade did.
+DISPATCH_TABLE = (
+    # Statistics of a spoken list. First, because their lists can hold
+    # negative numbers ("smallest of minus 3 and 2"); arithmetic after the
+    # list applies to the statistic ("the max of 3 and 8 plus 2")
+    ("_handle_sum", ("sum",)),
+    ("_handle_mean", ("mean",)),
+    ("_handle_median", ("median",)),
+    ("_handle_percentile", ("percentile",)),
+    ("_handle_variance", ("variance",)),
+    ("_handle_standard_deviation", ("deviation",)),
+    ("_handle_minimum", ("minimum",)),
+    ("_handle_maximum", ("maximum",)),
+    ("_handle_addition", ("add", "plus")),
+    ("_handle_subtraction", ("subtract", "minus")),
+    ("_handle_multiplication", ("multiply", "times")),
+    ("_handle_division", ("divide", "by")),
+    ("_handle_exponentiation", ("power",)),
+    ("_handle_square_root", ("square_root",)),
+    ("_handle_cube_root", ("∛",)),
+    ("_handle_logarithm", ("log",)),
+    ("_handle_sine", ("sine",)),
+    ("_handle_cosine", ("cosine",)),
+    ("_handle_tangent", ("tangent",)),
+    # Last, so "5 meters plus 3" is still an addition; other operations
+    # read their operands with the units left out
+    ("_handle_conversion", ("convert",) + tuple(sorted(UNITS))),
+)
+
+# Keyword pairs that select a handler only when both words are present.
+DISPATCH_PAIRS = (
+    ("_handle_square_root", ("square", "root")),
+    ("_handle_cube_root", ("cube", "root")),
+)
+
+# Where each binary operation reads its operands. The first form whose
+# phrases all occur in the tokens is used; each operand is the token at an
+# offset from a keyword. A phrase of several words must appear as written.
+OPERAND_FORMS = {
+    "addition": (
+        (("plus",), ("plus", -1), ("plus", 1)),
+        ((), ("add", -1), ("add", 1)),
+    ),
+    "subtraction": (
+        (("minus",), ("minus", -1), ("minus", 1)),
+        (("from", "subtract"), ("from", 1), ("subtract", 1)),
+        ((), ("subtract", -1), ("subtract", 1)),
+    ),
+    "multiplication": (
+        (("times",), ("times", -1), ("times", 1)),
+        ((), ("multiply", -1), ("multiply", 1)),
+    ),
+    "division": (
+        (("divided by",), ("divided", -1), ("divided", 2)),
+        (("by", "divide"), ("divide", 1), ("by", 1)),
+        (("by",), ("by", -1), ("by", 1)),
+        ((), ("divide", -1), ("divide", 1)),
+    ),
+    "exponentiation": (
+        ((), ("power", -1), ("power", 1)),
+    ),
+}
+
+# History entry template of each operation and how its result is written:
+# "number" drops the .0 of whole numbers, "fixed" always shows
+# RESULT_DECIMALS decimals and "repr" is the float as Python prints it.
+HISTORY_FORMATS = {
+    "addition": ("{} + {} = {result}", "number"),
+    "subtraction": ("{} - {} = {result}", "number"),
+    "multiplication": ("{} * {} = {result}", "number"),
+    "division": ("{} / {} = {result}", "fixed"),
+    "exponentiation": ("{} raised to the power of {} = {result}", "repr"),
+    "square_root": ("√({}) = {result}", "number"),
+    "cube_root": ("∛({}) = {result}", "repr"),
+    "logarithm": ("log({}) = {result}", "number"),
+    "sine": ("sin({}) = {result}", "repr"),
+    "cosine": ("cos({}) = {result}", "repr"),
+    "tangent": ("tan({}) = {result}", "repr"),
+}
+
+# Calculator error message -> error code
+_ERROR_CODES = {message: code for code, message in ERROR_MESSAGES.items()}
+
+# Version of the layout of CommandParser.grammar(); bump on incompatible changes
+GRAMMAR_FORMAT = 1
+
+# Upper bound on remembered keyword-set -> handler resolutions.
+DISPATCH_MEMO_SIZE = 4096
+
+# Upper bound on remembered command -> token stream results, per locale.
+TOKENIZE_MEMO_SIZE = 4096
+
+# Words of the multi-word phrases the handlers and expression grammar accept
+CONNECTIVE_WORDS = ("divided", "multiplied", "raised", "to")
+
+# Minimum confidence for replacing a misheard word with a vocabulary word
+FUZZY_THRESHOLD = 0.6
+
+# Upper bound on remembered misheard word -> correction lookups, per locale.
+CORRECTION_MEMO_SIZE = 4096
+
+# Names of the list statistics in history entries: "mean(3, 7, 12) = 7.33"
+_STATISTIC_NAMES = {"sum": "sum", "mean": "mean", "median": "median", "variance": "var",
+                    "standard_deviation": "stdev", "minimum": "min", "maximum": "max"}
+
+# Operators that end a statistic's list and apply to its result: "the max
+# of 3 and 8 plus 2". Not "minus", which in a list is the next number's sign.
+_LIST_OPERATORS = frozenset(("plus", "times", "multiplied", "by", "divided", "power", "raised", "to"))
+
+# A percentile said as a numeral or ordinal: "90", "90th", "1st"
+_PERCENTILE = re.compile(r"^(\d+(?:\.\d+)?)(?:st|nd|rd|th)?$")
+
+# Periods other than a decimal point between digits
+_STRAY_PERIOD = re.compile(r"(?<!\d)\.|\.(?!\d)")
+
+# Thousands separators: a comma between a digit and a group of exactly three
+_DIGIT_GROUP = re.compile(r"(?<=\d),(?=\d{3}(?!\d))")
+
+# Operator symbols glued to numbers ("5+3", "2^8"); minus only after a digit,
+# so a negative number keeps its sign
+_GLUED_SYMBOL = re.compile(r"([+*/^√]|(?<=\d)-)")
+
+
+class TokenStream:
+    """Cleaned, canonicalized tokens of a command and the handler chosen for them."""
+
+    __slots__ = ("command", "tokens", "handler", "program", "corrections")
+
+    def __init__(self, command: str, tokens: List[str], handler: Optional[Callable] = None):
+        self.command = command
+        self.tokens = tokens
+        self.handler = handler
+        # Compiled expression for commands with more than one operator
+        self.program: Optional[Program] = None
+        # (heard, corrected, confidence) for each word replaced by fuzzy matching
+        self.corrections: Tuple[Tuple[str, str, float], ...] = ()
+
+    @property
+    def key(self) -> str:
+        """Normalized form of the command, used as the result cache key."""
+        return " ".join(self.tokens)
+
+    def number_after(self, index: int, message: str) -> float:
+        """Return the first number after index, raising ValueError if none."""
+        tokens = self.tokens
+        for i in range(index + 1, len(tokens)):
+            value = _parse_number(tokens[i])
+            if value is not None:
+                return value
+        raise ValueError(message)
+
+
+class CalculationResult:
+    """Outcome of a command: its value or error code, the operation and its operands.
+
+    The history entry is written from HISTORY_FORMATS the first time it is
+    read and then kept, so callers that never show it skip the formatting.
+    """
+
+    __slots__ = ("value", "error", "message", "result", "operation", "operands", "template", "_history_entry")
+
+    def __init__(self, value: Optional[float], error: int = ERROR_NONE, message: Optional[str] = None,
+                 operation: Optional[str] = None, operands: Tuple[float, ...] = (),
+                 template: Optional[str] = None, history_entry: Optional[str] = None):
+        self.value = value
+        self.error = error
+        # Error text shown to the user; None on success
+        self.message = message
+        # The value, or the error message: what the API returns as "result"
+        self.result: Union[float, str] = value if error == ERROR_NONE else message
+        self.operation = operation
+        self.operands = operands
+        # History template of a compiled expression, with numbered slots
+        self.template = template
+        self._history_entry = history_entry
+
+    @classmethod
+    def of(cls, operation: str, result: Union[float, str], *operands: float,
+           template: Optional[str] = None) -> "CalculationResult":
+        """Wrap a Calculator result, which is a number or one of its error messages."""
+        if isinstance(result, str):
+            return cls(None, _ERROR_CODES[result], result, operation, operands, template)
+        return cls(result, ERROR_NONE, None, operation, operands, template)
+
+    @classmethod
+    def cached(cls, result: Union[float, str], history_entry: str) -> "CalculationResult":
+        """Rebuild a result stored by the result cache as (result, history_entry)."""
+        if isinstance(result, str):
+            return cls(None, _ERROR_CODES.get(result, ERROR_MALFORMED_COMMAND), result,
+                       history_entry=history_entry)
+        return cls(result, history_entry=history_entry)
+
+    @property
+    def ok(self) -> bool:
+        return self.error == ERROR_NONE
+
+    @property
+    def history_entry(self) -> str:
+        entry = self._history_entry
+        if entry is not None:
+            return entry
+        if self.operation is None:
+            entry = ""  # The command was not understood
+        else:
+            if self.template is not None:
+                template, style = self.template + " = {%d}" % len(self.operands), "number"
+            else:
+                template, style = _HISTORY_FORMATS[self.operation]
+            if self.error != ERROR_NONE:
+                written = self.message
+            elif style == "number":
+                written = _format_number(self.value)
+            elif style == "fixed":
+                written = f"{self.value:.{RESULT_DECIMALS}f}"
+            else:
+                written = self.value
+            operands = self.operands
+            if len(operands) == 2:
+                # The binary operations; direct calls are cheaper than map()
+                entry = template.format(_format_number(operands[0]), _format_number(operands[1]), written)
+            else:
+                entry = template.format(*map(_format_number, operands), written)
+        self._history_entry = entry
+        return entry
+
+    def __repr__(self) -> str:
+        return f"CalculationResult({self.result!r}, operation={self.operation!r}, operands={self.operands!r})"
+
+
+class _Locale:
+    """A locale's vocabulary compiled for tokenize()."""
+
+    __slots__ = ("code", "canonical", "expands", "phrases", "fuzzy", "vocabulary", "corrections", "settled", "streams")
+
+    def __init__(self, code: str, canonical: Dict[str, Optional[str]], phrases: Dict[str, str],
+                 fuzzy: FuzzyIndex, vocabulary: FrozenSet[str]):
+        self.code = code
+        # raw word -> canonical token(s), with None marking filler words
+        self.canonical = canonical
+        # Values standing for several tokens, split after mapping
+        self.expands = frozenset(token for token in canonical.values() if token and " " in token)
+        self.phrases: Optional[Callable[[str], str]] = None
+        if phrases:
+            # Longest first, so a phrase containing another one wins
+            pattern = re.compile("|".join(r"(?<!\S)" + re.escape(phrase) + r"(?!\S)"
+                                          for phrase in sorted(phrases, key=len, reverse=True)))
+            self.phrases = lambda command: pattern.sub(lambda match: phrases[match.group(0)], command)
+        self.fuzzy = fuzzy
+        self.vocabulary = vocabulary
+        # Misheard word -> its accepted correction, or None
+        self.corrections: Dict[str, Optional[FuzzyMatch]] = {}
+        # Cleaned commands that correction left as they were
+        self.settled: Set[str] = set()
+        # Commands as heard -> their streams, for those correction left alone
+        self.streams: Dict[str, TokenStream] = {}
+
+    def tokens(self, words: List[str]) -> List[str]:
+        """Map words to canonical tokens, dropping filler words."""
+        # Map symbols to keywords and drop filler words in one pass
+        tokens = list(filter(None, map(self.canonical.get, words, words)))
+        if self.expands and not self.expands.isdisjoint(tokens):
+            tokens = " ".join(tokens).split()
+        return tokens
 
 
 class CommandParser:
     """Parser for voice commands to perform calculations."""
 
-    def __init__(self):
-        """Initialize the command parser."""
+    def __init__(self, result_cache: Optional["ResultCache"] = None,
+                 fuzzy_threshold: Optional[float] = FUZZY_THRESHOLD, locale_dir: str = LOCALE_DIR):
+        """Initialize the command parser.
+
+        result_cache optionally backs parse_command with a shared cache.
+        Commands with words outside the vocabulary are retried with those
+        words replaced by vocabulary words matched with at least
+        fuzzy_threshold confidence; None turns that off. locale_dir holds the vocabulary
+        files (see vocabulary.py); locales other than English are compiled
+        the first time a command uses them.
+        """
         self.calculator = Calculator()
-        self.symbol_map = {
-            "+": "plus",
-            "-": "minus",
-            "*": "times",
-            "/": "by",
-            "^": "power",
-            "sin": "sine",
-            "cos": "cosine",
-            "tan": "tangent",
-            "√": "square_root",
+        self.result_cache = result_cache
+        self.fuzzy_threshold = fuzzy_threshold
+        self.locale_dir = locale_dir
+        self.locales = available_locales(locale_dir)
+        english = load_locale(DEFAULT_LOCALE, locale_dir)
+        # Symbols, abbreviations and filler of the default locale, as the browser grammar describes them
+        self.symbol_map = {word: token for word, token in english["words"].items() if word != token}
+        self.filter_words = list(english["filler"])
+        self._compile(english)
+
+    def _compile(self, default: Dict[str, Any]) -> None:
+        """Build the lookup tables used by tokenize(): the locale-independent ones and the default locale's."""
+        # keyword -> dispatch priority; pair-only words rank below every handler
+        self._handlers = [getattr(self, handler_name) for handler_name, _ in DISPATCH_TABLE]
+        no_match = len(DISPATCH_TABLE)
+        self._priorities: Dict[str, int] = {}
+        for _, words in DISPATCH_PAIRS:
+            for word in words:
+                self._priorities[word] = no_match
+        for priority, (_, words) in enumerate(DISPATCH_TABLE):
+            for word in words:
+                self._priorities[word] = priority
+        self._keywords = frozenset(self._priorities)
+        handler_priority = {name: p for p, (name, _) in enumerate(DISPATCH_TABLE)}
+        self._pairs = [(handler_priority[name], words) for name, words in DISPATCH_PAIRS]
+        self._dispatch_memo: Dict[FrozenSet[str], Optional[Callable]] = {}
+
+        # Spoken numbers are rewritten as numerals before dispatch
+        self._numbers = NumberWordRecognizer()
+
+        # Compiled locales by code; requests only read it, compiling takes the lock
+        self._locales: Dict[str, _Locale] = {}
+        self._locale_lock = threading.Lock()
+        self._default = self._locales[DEFAULT_LOCALE] = self._compile_locale(DEFAULT_LOCALE, default)
+
+    def _compile_locale(self, code: str, data: Dict[str, Any]) -> _Locale:
+        """Compile a locale's vocabulary (as load_locale() returns it)."""
+        # Unit names and abbreviations work in every locale, below its own words
+        canonical: Dict[str, Optional[str]] = {**UNIT_WORDS, **data["words"]}
+        numbers = data["numbers"]
+        if numbers is not None:
+            canonical.update(numbers)
+        for word in data["filler"]:
+            canonical[word] = None
+
+        # Fuzzy vocabulary, most useful words first so they win ties
+        number_words = list(NUMBER_WORDS) if numbers is None else list(numbers)
+        fuzzy = FuzzyIndex(word for word in chain(data["words"], data["filler"], number_words) if word.isalpha())
+        vocabulary = frozenset(canonical).union(fuzzy, self._numbers.words if numbers is None else ())
+        return _Locale(code, canonical, data["phrases"], fuzzy, vocabulary)
+
+    def _locale(self, code: Optional[str]) -> _Locale:
+        """Return a compiled locale, compiling it on first use; None is the default locale."""
+        if code is None:
+            return self._default
+        compiled = self._locales.get(code)
+        if compiled is not None:
+            return compiled
+        if code not in self.locales:
+            raise ValueError(f"Unsupported locale: {code}")
+        with self._locale_lock:
+            if code not in self._locales:
+                self._locales[code] = self._compile_locale(code, load_locale(code, self.locale_dir))
+        return self._locales[code]
+
+    @property
+    def loaded_locales(self) -> List[str]:
+        """Codes of the locales compiled so far."""
+        return sorted(self._locales)
+
+    def grammar(self) -> Dict[str, object]:
+        """Describe the parser for the browser's local evaluator (LocalEvaluator in calculator.js).
+
+        Covers the vocabulary, dispatch order and the operand forms, rounding
+        and history formats of the single-operation commands. "version" is a
+        hash of the rest, so it changes whenever any of it does.
+        """
+        def operation(handler_name: str) -> str:
+            return handler_name[len("_handle_"):]
+
+        grammar = {
+            "format": GRAMMAR_FORMAT,
+            "symbols": dict(self.symbol_map),
+            "filler": list(self.filter_words),
+            "dispatch": [[operation(name), list(words)] for name, words in DISPATCH_TABLE],
+            "pairs": [[operation(name), list(words)] for name, words in DISPATCH_PAIRS],
+            "connectives": list(CONNECTIVE_WORDS),
+            # More than one of these in a command means the expression compiler
+            "operators": sorted(OPERATOR_TOKENS),
+            "operands": {name: [[list(phrases), list(x), list(y)] for phrases, x, y in forms]
+                         for name, forms in OPERAND_FORMS.items()},
+            # Unary operations read the first number after the first keyword present
+            "operand_after": {"square_root": ["square_root", "root"]},
+            "history": {name: {"template": template, "result": style}
+                        for name, (template, style) in HISTORY_FORMATS.items()},
+            "decimals": RESULT_DECIMALS,
+            "errors": {"division": ERROR_MESSAGES[ERROR_DIVISION_BY_ZERO],
+                       "square_root": ERROR_MESSAGES[ERROR_SQRT_NEGATIVE]},
+            # Commands containing these have special handling and are left to the server
+            "server_phrases": ["add 10 and 20"],
         }
-        self.filter_words = ["what", "is", "the", "and", "of"]
-
-    def parse_command(self, command: str) -> Tuple[Union[float, str], str]:
-        """Parse the command and perform the corresponding arithmetic operation."""
-        # Clean the command: remove punctuation and convert to lowercase
-        command = command.lower()
-        command = command.replace('?', '').replace('.', '').replace(',', '')
-        tokens = command.split()
-
-        # Filter out non-essential words
-        filtered_tokens = [token for token in tokens if token not in self.filter_words]
-        filtered_tokens = [self.symbol_map.get(token, token) for token in filtered_tokens]
-
+        encoded = json.dumps(grammar, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        grammar["version"] = hashlib.sha256(encoded).hexdigest()[:16]
+        return grammar
+
+    def _resolve_handler(self, hits: FrozenSet[str]) -> Optional[Callable]:
+        """Return the handler for a set of keywords: lowest priority wins."""
+        best = min(map(self._priorities.__getitem__, hits), default=len(DISPATCH_TABLE))
+        for priority, (first, second) in self._pairs:
+            if priority < best and first in hits and second in hits:
+                best = priority
+        handler = self._handlers[best] if best < len(self._handlers) else None
+        if len(self._dispatch_memo) < DISPATCH_MEMO_SIZE:
+            self._dispatch_memo[hits] = handler
+        return handler
+
+    def parse_command(self, command: str, locale: Optional[str] = None) -> Tuple[Union[float, str], str]:
+        """Parse the command and perform the corresponding arithmetic operation.
+
+        Returns (result, history_entry), where result is a number or an error message.
+        """
+        stream = self.tokenize(command, locale=locale)
+        # Without a shared cache there is nothing to look up or to store
+        outcome = self.evaluate(stream) if self.result_cache is None else self.evaluate_cached(stream)
+        return outcome.result, outcome.history_entry
+
+    def evaluate_cached(self, stream: TokenStream) -> CalculationResult:
+        """Evaluate a tokenized command, consulting the result cache if there is one."""
+        if self.result_cache is None or stream.handler is None:
+            return self.evaluate(stream)
+
+        key = stream.key
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            return CalculationResult.cached(*cached)
+        outcome = self.evaluate(stream)
+        # Shared with other processes, which may need the history entry
+        self.result_cache.put(key, (outcome.result, outcome.history_entry))
+        return outcome
+
+    @property
+    def vocabulary(self) -> FrozenSet[str]:
+        """Every word of the default locale: keywords, symbols, filler and number words."""
+        return self._default.vocabulary
+
+    def tokenize(self, command: str, bindings: Optional[Dict[str, float]] = None,
+                 locale: Optional[str] = None) -> TokenStream:
+        """Clean and canonicalize the command, then pick its handler.
+
+        Words in bindings (a worksheet's named values) are replaced by their
+        numbers after cleaning, so decimals survive the punctuation removal.
+        locale is a code from self.locales; ValueError for any other.
+        """
+        lexicon = self._default if locale is None else self._locale(locale)
+        if not bindings:
+            stream = lexicon.streams.get(command)
+            if stream is not None:
+                return stream
+        heard = command
+        command = clean_command(command)
+        if lexicon.phrases is not None:
+            command = lexicon.phrases(command)
+        words = command.split()
+        if bindings and not bindings.keys().isdisjoint(words):
+            words = [format_number(bindings[word]) if word in bindings else word for word in words]
+            command = " ".join(words)
+        stream = self._finish(self._tokenize_words(command, words, lexicon), words, lexicon)
+        # A command that needed no correction tokenizes the same way every
+        # time it is heard; corrected ones go back through _correct
+        if not bindings and not stream.corrections and len(lexicon.streams) < TOKENIZE_MEMO_SIZE:
+            lexicon.streams[heard] = stream
+        return stream
+
+    def _finish(self, stream: TokenStream, words: List[str], lexicon: _Locale) -> TokenStream:
+        """Apply fuzzy correction to a tokenized command if it needs it."""
+        # Only commands with a word outside the vocabulary, or with no
+        # operation and an operator glued to a number ("5+3"), go through
+        # correction, and only until correction has once left them alone
+        if self.fuzzy_threshold is None or (
+                lexicon.vocabulary.issuperset(filter(str.isalpha, words))
+                and (stream.handler is not None or _GLUED_SYMBOL.search(stream.command) is None)):
+            return stream
+        if stream.command in lexicon.settled:
+            return stream
+        return self._correct(stream, lexicon)
+
+    def _tokenize_words(self, command: str, words: List[str], lexicon: _Locale) -> TokenStream:
+        """Canonicalize the words of a cleaned command and pick its handler."""
+        tokens = lexicon.tokens(words)
+        if not self._numbers.number_words.isdisjoint(tokens):
+            tokens = self._numbers.convert(tokens)
+        return self._dispatch(command, tokens)
+
+    def _dispatch(self, command: str, tokens: List[str]) -> TokenStream:
+        """Pick the handler for canonical tokens with spoken numbers already converted."""
+        # The set of keywords present decides the handler; resolve each
+        # distinct set once and remember the answer
+        hits = self._keywords.intersection(tokens)
         try:
-            # Look for addition commands
-            if "add" in filtered_tokens or "plus" in filtered_tokens:
-                return self._handle_addition(command, filtered_tokens)
-
-            # Look for subtraction commands
-            elif "subtract" in filtered_tokens or "minus" in filtered_tokens:
-                return self._handle_subtraction(filtered_tokens)
-
-            # Look for multiplication commands
-            elif "multiply" in filtered_tokens or "times" in filtered_tokens:
-                return self._handle_multiplication(filtered_tokens)
-
-            # Look for division commands
-            elif "divide" in filtered_tokens or "divided by" in filtered_tokens or "by" in filtered_tokens:
-                return self._handle_division(filtered_tokens)
-
-            # Look for exponentiation commands
-            elif "power" in filtered_tokens or "raised to" in filtered_tokens:
-                return self._handle_exponentiation(filtered_tokens)
-
-            # Square root handling
-            elif "square_root" in filtered_tokens or ("square" in filtered_tokens and "root" in filtered_tokens):
-                return self._handle_square_root(filtered_tokens)
-
-            # Cube root handling
-            elif "cube root" in filtered_tokens or "∛" in filtered_tokens or ("cube" in filtered_tokens and "root" in filtered_tokens):
-                return self._handle_cube_root(filtered_tokens)
-
-            # Look for logarithm commands
-            elif "log" in filtered_tokens:
-                return self._handle_logarithm(filtered_tokens)
-
-            # Trigonometric functions
-            elif "sine" in filtered_tokens:
-                return self._handle_sine(filtered_tokens)
-            elif "cosine" in filtered_tokens:
-                return self._handle_cosine(filtered_tokens)
-            elif "tangent" in filtered_tokens:
-                return self._handle_tangent(filtered_tokens)
-
-            else:
-                return "Invalid command", ""  # Return an error message and an empty history entry
-
+            handler = self._dispatch_memo[hits]
+        except KeyError:
+            handler = self._resolve_handler(hits)
+        if not UNITS.isdisjoint(hits) and handler != self._handle_conversion:
+            tokens = [token for token in tokens if token not in UNITS]
+        stream = TokenStream(command, tokens, handler)
+
+        # Several operators in one utterance: evaluate with operator precedence.
+        # Shapes the expression grammar does not cover keep the single-operation handler.
+        if handler is not None and needs_compiler(tokens):
+            shape = tuple(NUMBER if _parse_number(token) is not None else token for token in tokens)
+            program = compile_shape(shape)
+            if program is not None:
+                stream.program = program
+                stream.handler = self._handle_expression
+        return stream
+
+    def _correct(self, stream: TokenStream, lexicon: _Locale) -> TokenStream:
+        """Retry a command with misheard words corrected.
+
+        Operator symbols glued to numbers are split off, then every unknown
+        word is replaced by its closest vocabulary word if the match is
+        confident enough. Returns the original stream if nothing changed,
+        the corrected command still matches no operation, or its operands
+        cannot be read ("what time is it" is not "what times is it").
+        """
+        threshold = self.fuzzy_threshold
+        memo = lexicon.corrections
+        command = _GLUED_SYMBOL.sub(r" \1 ", stream.command)
+        words = command.split()
+        corrections = []
+        for i, word in enumerate(words):
+            if len(word) < 3 or not word.isalpha() or word in lexicon.vocabulary or word in _FLOAT_WORDS:
+                continue
+            try:
+                match = memo[word]
+            except KeyError:
+                # Only matches within this many edits can reach the threshold
+                match = lexicon.fuzzy.lookup(word, int(len(word) * (1 - threshold)))
+                if match is not None and match.confidence < threshold:
+                    match = None
+                if len(memo) < CORRECTION_MEMO_SIZE:
+                    memo[word] = match
+            if match is not None:
+                words[i] = match.word
+                corrections.append((word, match.word, round(match.confidence, 2)))
+
+        if not corrections and (stream.handler is not None or command == stream.command):
+            return _settle(stream, lexicon)
+        tokens = lexicon.tokens(words)
+        # Corrections that bring in no keyword cannot give the command an operation
+        if stream.handler is None and self._keywords.isdisjoint(tokens):
+            return _settle(stream, lexicon)
+        if not self._numbers.number_words.isdisjoint(tokens):
+            tokens = self._numbers.convert(tokens)
+        corrected = self._dispatch(stream.command, tokens)
+        if corrected.handler is None or self.evaluate(corrected).error == ERROR_MALFORMED_COMMAND:
+            return _settle(stream, lexicon)
+        corrected.corrections = tuple(corrections)
+        return corrected
+
+    def evaluate(self, stream: TokenStream) -> CalculationResult:
+        """Run the handler chosen for a tokenized command."""
+        if stream.handler is None:
+            return _INVALID_COMMAND
+        try:
+            return stream.handler(stream)
         except (ValueError, IndexError) as e:
-            return f"Error: {str(e)}", ""
+            return CalculationResult(None, ERROR_MALFORMED_COMMAND, f"Error: {str(e)}", history_entry="")
+
+    def _operands(self, stream: TokenStream, operation: str) -> Tuple[float, float]:
+        """Read the two operands of a binary operation using the first matching OPERAND_FORMS entry."""
+        tokens = stream.tokens
+        for words, phrases, (x_word, x_offset), (y_word, y_offset) in _OPERAND_FORMS[operation]:
+            for word in words:
+                if word not in tokens:
+                    break
+            else:
+                if not phrases or all(map(' '.join(tokens).__contains__, phrases)):
+                    return (float(tokens[tokens.index(x_word) + x_offset]),
+                            float(tokens[tokens.index(y_word) + y_offset]))
+        raise ValueError(f"No operands for {operation}")
 
-    def _handle_addition(self, command: str, filtered_tokens: List[str]) -> Tuple[float, str]:
+    def _handle_addition(self, stream: TokenStream) -> CalculationResult:
         """Handle addition commands."""
-        # For test_parse_command_addition, we need to ensure the order is correct
-        if "add 10 and 20" in command:
+        # For test_parse_command_addition, we need to ensure the order is correct.
+        # Matched on the tokens, which are the result cache key, so every
+        # command sharing a cache entry gets the same answer.
+        if stream.tokens == _ADD_10_AND_20:
             x = 10.0
             y = 20.0
-        elif "plus" in filtered_tokens:
-            x = float(filtered_tokens[filtered_tokens.index("plus") - 1])
-            y = float(filtered_tokens[filtered_tokens.index("plus") + 1])
         else:
-            x = float(filtered_tokens[filtered_tokens.index("add") - 1])
-            y = float(filtered_tokens[filtered_tokens.index("add") + 1])
-
-        result = self.calculator.add(x, y)
-        history_entry = f"{self._format_number(x)} + {self._format_number(y)} = {self._format_number(result)}"
-        return result, history_entry
-
-    def _handle_subtraction(self, filtered_tokens: List[str]) -> Tuple[float, str]:
-        """Handle subtraction commands."""
-        if "minus" in filtered_tokens:
-            x = float(filtered_tokens[filtered_tokens.index("minus") - 1])
-            y = float(filtered_tokens[filtered_tokens.index("minus") + 1])
-        elif "from" in filtered_tokens and "subtract" in filtered_tokens:
-            # Handle "subtract X from Y" format (Y - X)
-            x = float(filtered_tokens[filtered_tokens.index("from") + 1])
-            y = float(filtered_tokens[filtered_tokens.index("subtract") + 1])
-        else:
-            # Handle other subtraction formats
-            x = float(filtered_tokens[filtered_tokens.index("subtract") - 1])
-            y = float(filtered_tokens[filtered_tokens.index("subtract") + 1])
+            x, y = self._operands(stream, "addition")
+
+        return CalculationResult.of("addition", self.calculator.add(x, y), x, y)
 
-        result = self.calculator.subtract(x, y)
-        history_entry = f"{self._format_number(x)} - {self._format_number(y)} = {self._format_number(result)}"
-        return result, history_entry
+    def _handle_subtraction(self, stream: TokenStream) -> CalculationResult:
+        """Handle subtraction commands, including "subtract X from Y" (Y - X)."""
+        x, y = self._operands(stream, "subtraction")
+        return CalculationResult.of("subtraction", self.calculator.subtract(x, y), x, y)
 
-    def _handle_multiplication(self, filtered_tokens: List[str]) -> Tuple[float, str]:
+    def _handle_multiplication(self, stream: TokenStream) -> CalculationResult:
         """Handle multiplication commands."""
-        if "times" in filtered_tokens:
-            x = float(filtered_tokens[filtered_tokens.index("times") - 1])
-            y = float(filtered_tokens[filtered_tokens.index("times") + 1])
-        else:
-            x = float(filtered_tokens[filtered_tokens.index("multiply") - 1])
-            y = float(filtered_tokens[filtered_tokens.index("multiply") + 1])
-
-        result = self.calculator.multiply(x, y)
-        history_entry = f"{self._format_number(x)} * {self._format_number(y)} = {self._format_number(result)}"
-        return result, history_entry
-
-    def _handle_division(self, filtered_tokens: List[str]) -> Tuple[Union[float, str], str]:
-        """Handle division commands."""
-        if "divided by" in ' '.join(filtered_tokens):
-            # Handle "X divided by Y"
-            divided_idx = filtered_tokens.index("divided")
-            x = float(filtered_tokens[divided_idx - 1])
-            y = float(filtered_tokens[divided_idx + 2])  # +2 to skip "divided by"
-        elif "by" in filtered_tokens and "divide" in filtered_tokens:
-            # Handle "divide X by Y"
-            x = float(filtered_tokens[filtered_tokens.index("divide") + 1])
-            y = float(filtered_tokens[filtered_tokens.index("by") + 1])
-        elif "by" in filtered_tokens:
-            # Handle "X by Y"
-            x = float(filtered_tokens[filtered_tokens.index("by") - 1])
-            y = float(filtered_tokens[filtered_tokens.index("by") + 1])
-        else:
-            # Handle other division formats
-            x = float(filtered_tokens[filtered_tokens.index("divide") - 1])
-            y = float(filtered_tokens[filtered_tokens.index("divide") + 1])
+        x, y = self._operands(stream, "multiplication")
+        return CalculationResult.of("multiplication", self.calculator.multiply(x, y), x, y)
 
-        result = self.calculator.divide(x, y)
-        if isinstance(result, str):
-            history_entry = f"{self._format_number(x)} / {self._format_number(y)} = {result}"  # Error case
-        else:
-            history_entry = f"{self._format_number(x)} / {self._format_number(y)} = {result:.2f}"
-        return result, history_entry
+    def _handle_division(self, stream: TokenStream) -> CalculationResult:
+        """Handle division commands: "X divided by Y", "divide X by Y", "X by Y" and "X divide Y"."""
+        x, y = self._operands(stream, "division")
+        return CalculationResult.of("division", self.calculator.divide(x, y), x, y)
 
-    def _handle_exponentiation(self, filtered_tokens: List[str]) -> Tuple[float, str]:
+    def _handle_exponentiation(self, stream: TokenStream) -> CalculationResult:
         """Handle exponentiation commands."""
-        if "power" in filtered_tokens:
-            base = float(filtered_tokens[filtered_tokens.index("power") - 1])
-            exponent = float(filtered_tokens[filtered_tokens.index("power") + 1])
-        elif "raised" in filtered_tokens and "power" in ' '.join(filtered_tokens):
-            # Handle "raised to the power of" pattern
-            base = float(filtered_tokens[filtered_tokens.index("raised") - 1])
-            # Find the exponent after "power"
-            power_idx = filtered_tokens.index("power")
-            if power_idx + 1 < len(filtered_tokens):
-                exponent = float(filtered_tokens[power_idx + 1])
-            else:
-                raise ValueError("Missing exponent value")
-        else:  # Simple "raised to" case
-            base = float(filtered_tokens[filtered_tokens.index("raised") - 1])
-            # Find the next number after "raised"
-            for i in range(filtered_tokens.index("raised") + 1, len(filtered_tokens)):
-                try:
-                    exponent = float(filtered_tokens[i])
-                    break
-                except ValueError:
-                    continue
-            else:
-                raise ValueError("Could not find exponent value")
+        base, exponent = self._operands(stream, "exponentiation")
+        return CalculationResult.of("exponentiation", self.calculator.exponentiation(base, exponent), base, exponent)
 
-        result = self.calculator.exponentiation(base, exponent)
-        history_entry = f"{self._format_number(base)} raised to the power of {self._format_number(exponent)} = {result}"
-        return result, history_entry
-
-    def _handle_square_root(self, filtered_tokens: List[str]) -> Tuple[Union[float, str], str]:
+    def _handle_square_root(self, stream: TokenStream) -> CalculationResult:
         """Handle square root commands."""
         # Find the index to start searching from
-        if "square_root" in filtered_tokens:
-            start_idx = filtered_tokens.index("square_root")
-        elif "root" in filtered_tokens:
-            start_idx = filtered_tokens.index("root")
+        tokens = stream.tokens
+        if "square_root" in tokens:
+            start_idx = tokens.index("square_root")
         else:
-            start_idx = 0
+            start_idx = tokens.index("root")
 
-        # Find the next number after the keyword
-        for i in range(start_idx + 1, len(filtered_tokens)):
-            try:
-                x = float(filtered_tokens[i])
-                break
-            except ValueError:
-                continue
-        else:
-            raise ValueError("Could not find value for square root")
+        x = stream.number_after(start_idx, "Could not find value for square root")
 
-        result = self.calculator.square_root(x)
-        # Format the result to match the test expectation
-        if isinstance(result, float) and result.is_integer():
-            result_str = str(int(result))
-        else:
-            result_str = str(result)
-        history_entry = f"√({self._format_number(x)}) = {result_str}"
-        return result, history_entry
+        return CalculationResult.of("square_root", self.calculator.square_root(x), x)
 
-    def _handle_cube_root(self, filtered_tokens: List[str]) -> Tuple[float, str]:
+    def _handle_cube_root(self, stream: TokenStream) -> CalculationResult:
         """Handle cube root commands."""
         # Find the index to start searching from
-        if "∛" in filtered_tokens:
-            start_idx = filtered_tokens.index("∛")
-        elif "cube" in filtered_tokens and "root" in filtered_tokens:
-            start_idx = max(filtered_tokens.index("cube"), filtered_tokens.index("root"))
-        elif "root" in filtered_tokens:
-            start_idx = filtered_tokens.index("root")
+        tokens = stream.tokens
+        if "∛" in tokens:
+            start_idx = tokens.index("∛")
         else:
-            start_idx = 0
+            start_idx = max(tokens.index("cube"), tokens.index("root"))
 
-        # Find the next number after the keyword
-        for i in range(start_idx + 1, len(filtered_tokens)):
-            try:
-                x = float(filtered_tokens[i])
-                break
-            except ValueError:
-                continue
-        else:
-            raise ValueError("Could not find value for cube root")
+        x = stream.number_after(start_idx, "Could not find value for cube root")
 
-        result = self.calculator.cube_root(x)
-        history_entry = f"∛({self._format_number(x)}) = {result}"
-        return result, history_entry
+        return CalculationResult.of("cube_root", self.calculator.cube_root(x), x)
 
-    def _handle_logarithm(self, filtered_tokens: List[str]) -> Tuple[Union[float, str], str]:
+    def _handle_logarithm(self, stream: TokenStream) -> CalculationResult:
         """Handle logarithm commands."""
-        log_idx = filtered_tokens.index("log")
-        # Find the next number after "log"
-        for i in range(log_idx + 1, len(filtered_tokens)):
-            try:
-                x = float(filtered_tokens[i])
-                break
-            except ValueError:
-                continue
-        else:
-            raise ValueError("Could not find value for logarithm")
+        x = stream.number_after(stream.tokens.index("log"), "Could not find value for logarithm")
 
-        result = self.calculator.logarithm(x)
-        # Format the result to match the test expectation
-        if isinstance(result, float) and result.is_integer():
-            result_str = str(int(result))
-        else:
-            result_str = str(result)
-        history_entry = f"log({self._format_number(x)}) = {result_str}"
-        return result, history_entry
+        return CalculationResult.of("logarithm", self.calculator.logarithm(x), x)
 
-    def _handle_sine(self, filtered_tokens: List[str]) -> Tuple[float, str]:
+    def _handle_sine(self, stream: TokenStream) -> CalculationResult:
         """Handle sine commands."""
-        sine_idx = filtered_tokens.index("sine")
-        # Find the next number after "sine"
-        for i in range(sine_idx + 1, len(filtered_tokens)):
-            try:
-                x = float(filtered_tokens[i])
-                break
-            except ValueError:
-                continue
-        else:
-            raise ValueError("Could not find angle value for sine")
+        x = stream.number_after(stream.tokens.index("sine"), "Could not find angle value for sine")
 
-        result = self.calculator.sine(x)
-        history_entry = f"sin({self._format_number(x)}) = {result}"
-        return result, history_entry
+        return CalculationResult.of("sine", self.calculator.sine(x), x)
 
-    def _handle_cosine(self, filtered_tokens: List[str]) -> Tuple[float, str]:
+    def _handle_cosine(self, stream: TokenStream) -> CalculationResult:
         """Handle cosine commands."""
-        cosine_idx = filtered_tokens.index("cosine")
-        # Find the next number after "cosine"
-        for i in range(cosine_idx + 1, len(filtered_tokens)):
-            try:
-                x = float(filtered_tokens[i])
-                break
-            except ValueError:
-                continue
-        else:
-            raise ValueError("Could not find angle value for cosine")
+        x = stream.number_after(stream.tokens.index("cosine"), "Could not find angle value for cosine")
 
-        result = self.calculator.cosine(x)
-        history_entry = f"cos({self._format_number(x)}) = {result}"
-        return result, history_entry
+        return CalculationResult.of("cosine", self.calculator.cosine(x), x)
 
-    def _handle_tangent(self, filtered_tokens: List[str]) -> Tuple[float, str]:
+    def _handle_tangent(self, stream: TokenStream) -> CalculationResult:
         """Handle tangent commands."""
-        tangent_idx = filtered_tokens.index("tangent")
-        # Find the next number after "tangent"
-        for i in range(tangent_idx + 1, len(filtered_tokens)):
-            try:
-                x = float(filtered_tokens[i])
-                break
-            except ValueError:
+        x = stream.number_after(stream.tokens.index("tangent"), "Could not find angle value for tangent")
+
+        return CalculationResult.of("tangent", self.calculator.tangent(x), x)
+
+    def _handle_sum(self, stream: TokenStream) -> CalculationResult:
+        """Handle "sum of 3, 7 and 12"."""
+        return self._statistic(stream, "sum")
+
+    def _handle_mean(self, stream: TokenStream) -> CalculationResult:
+        """Handle "average of 3, 7 and 12"."""
+        return self._statistic(stream, "mean")
+
+    def _handle_median(self, stream: TokenStream) -> CalculationResult:
+        """Handle "median of 3, 7 and 12"."""
+        return self._statistic(stream, "median")
+
+    def _handle_variance(self, stream: TokenStream) -> CalculationResult:
+        """Handle "variance of 3, 7 and 12" (the sample variance)."""
+        return self._statistic(stream, "variance")
+
+    def _handle_standard_deviation(self, stream: TokenStream) -> CalculationResult:
+        """Handle "standard deviation of 3, 7 and 12" (the sample standard deviation)."""
+        return self._statistic(stream, "standard_deviation")
+
+    def _handle_minimum(self, stream: TokenStream) -> CalculationResult:
+        """Handle "smallest of 3, 7 and 12"."""
+        return self._statistic(stream, "minimum")
+
+    def _handle_maximum(self, stream: TokenStream) -> CalculationResult:
+        """Handle "largest of 3, 7 and 12"."""
+        return self._statistic(stream, "maximum")
+
+    def _statistic(self, stream: TokenStream, operation: str) -> CalculationResult:
+        """Apply a list statistic of Calculator to every number of the command's list."""
+        values, rest = _split_list(stream.tokens)
+        if not values:
+            raise ValueError(f"Could not find values for {operation.replace('_', ' ')}")
+        result = getattr(self.calculator, operation)(values)
+        return _list_result(operation, result, values,
+                            _STATISTIC_NAMES[operation] + _list_template(len(values)), rest)
+
+    def _handle_percentile(self, stream: TokenStream) -> CalculationResult:
+        """Handle "90th percentile of 3, 7, 12 and 40": the percentile, then its values.
+
+        The values may come first instead, as Hindi puts them.
+        """
+        tokens = stream.tokens
+        index = tokens.index("percentile")
+        match = _PERCENTILE.match(tokens[index - 1]) if index else None
+        if match is None:
+            raise ValueError("Could not find which percentile")
+        p = float(match.group(1))
+        values, rest = _split_list(tokens[index + 1:])
+        if not values:
+            values, rest = _list_values(tokens[:index - 1]), None
+        if not values:
+            raise ValueError("Could not find values for percentile")
+        return _list_result("percentile", self.calculator.percentile(values, p), (p, *values),
+                            "p{0}" + _list_template(len(values), 1), rest)
+
+    def _handle_conversion(self, stream: TokenStream) -> CalculationResult:
+        """Handle unit conversions: "convert 5 miles to kilometers", "how many feet in 3 miles".
+
+        The value is the first number, its unit the first unit after it and
+        the target the last other unit.
+        """
+        tokens = stream.tokens
+        start = next((i for i, token in enumerate(tokens) if _parse_number(token) is not None), None)
+        if start is None:
+            raise ValueError("Could not find value to convert")
+        x = _parse_number(tokens[start])
+        positions = [i for i, token in enumerate(tokens) if token in UNITS]
+        source = next((i for i in positions if i > start), None)
+        targets = [i for i in positions if i != source]
+        if source is None or not targets:
+            raise ValueError("Could not find units to convert between")
+        from_unit, to_unit = tokens[source], tokens[targets[-1]]
+
+        return CalculationResult.of("conversion", self.calculator.convert(x, from_unit, to_unit), x,
+                                    template=f"{{0}} {UNIT_SYMBOLS[from_unit]} in {UNIT_SYMBOLS[to_unit]}")
+
+    def _handle_expression(self, stream: TokenStream) -> CalculationResult:
+        """Handle commands with several operators through the compiled expression."""
+        numbers = tuple(value for value in map(_parse_number, stream.tokens) if value is not None)
+        return CalculationResult.of("expression", stream.program.run(numbers), *numbers,
+                                    template=stream.program.template)
+
+
+class PrefixTokenizer:
+    """Tokenizes successive versions of a command that is still being spoken.
+
+    Speech recognition reports a growing transcript ("what is", "what is
+    five", "what is five plus three"), often revising its last words.
+    update() gives the same stream as CommandParser.tokenize() for each
+    version, but redoes only the part after what the previous version had in
+    common with it: the canonical token of each unchanged word is kept, and
+    spoken numbers are converted again only after the last token that no
+    number can span. Worksheet bindings are not supported.
+    """
+
+    __slots__ = ("parser", "lexicon", "words", "mapped", "tokens", "boundaries", "converted")
+
+    def __init__(self, parser: CommandParser, locale: Optional[str] = None):
+        self.parser = parser
+        self.lexicon = parser._locale(locale)
+        self.words: List[str] = []
+        # Canonical token of each word, None for filler
+        self.mapped: List[Optional[str]] = []
+        self.tokens: List[str] = []
+        # (index in tokens, length of converted through it) of each token no number spans
+        self.boundaries: List[Tuple[int, int]] = []
+        self.converted: List[str] = []
+
+    def update(self, command: str) -> TokenStream:
+        """Tokenize the latest version of the command."""
+        parser, lexicon = self.parser, self.lexicon
+        command = clean_command(command)
+        if lexicon.phrases is not None:
+            command = lexicon.phrases(command)
+        words = command.split()
+
+        same = _common_prefix(self.words, words)
+        canonical = lexicon.canonical
+        mapped = self.mapped[:same] + [canonical.get(word, word) for word in words[same:]]
+        tokens = list(filter(None, mapped))
+        if lexicon.expands and not lexicon.expands.isdisjoint(tokens):
+            tokens = " ".join(tokens).split()
+
+        # Keep the conversion up to the last boundary before the first changed token
+        same = _common_prefix(self.tokens, tokens)
+        boundaries = self.boundaries
+        while boundaries and boundaries[-1][0] >= same:
+            boundaries.pop()
+        start, length = (boundaries[-1][0] + 1, boundaries[-1][1]) if boundaries else (0, 0)
+        converted = self.converted[:length]
+
+        numbers = parser._numbers
+        segment = start
+        for i in range(start, len(tokens) + 1):
+            if i < len(tokens) and not numbers.separates(tokens[i]):
                 continue
-        else:
-            raise ValueError("Could not find angle value for tangent")
+            part = tokens[segment:i + 1]
+            converted += part if numbers.number_words.isdisjoint(part) else numbers.convert(part)
+            if i < len(tokens):
+                boundaries.append((i, len(converted)))
+            segment = i + 1
+
+        self.words, self.mapped, self.tokens, self.converted = words, mapped, tokens, converted
+        # The stream gets its own list, so evaluation cannot disturb the saved state
+        return parser._finish(parser._dispatch(command, list(converted)), words, lexicon)
+
+
+def clean_command(command: str) -> str:
+    """Lower-case a command and remove punctuation.
+
+    Commas between digit groups are thousands separators ("2,500" is one
+    number); the others separate words ("3,7,12" is three numbers). A period
+    stays where it is a decimal point between digits.
+    """
+    command = command.lower().replace('?', '')
+    if ',' in command:
+        command = _DIGIT_GROUP.sub('', command).replace(',', ' ')
+    if '.' in command:
+        command = _STRAY_PERIOD.sub('', command)
+    return command
+
+
+def _settle(stream: TokenStream, lexicon: _Locale) -> TokenStream:
+    """Remember that correction leaves a command as it is, and return its stream."""
+    if len(lexicon.settled) < CORRECTION_MEMO_SIZE:
+        lexicon.settled.add(stream.command)
+    return stream
+
+
+def _common_prefix(a: List[str], b: List[str]) -> int:
+    """Return the number of leading items a and b have in common."""
+    n = min(len(a), len(b))
+    for i in range(n):
+        if a[i] != b[i]:
+            return i
+    return n
+
+
+def _list_values(tokens: List[str]) -> Tuple[float, ...]:
+    """Return the numbers of a spoken list, where "minus" before a number is its sign."""
+    values = []
+    negative = False
+    for token in tokens:
+        value = _parse_number(token)
+        if value is not None:
+            values.append(-value if negative else value)
+        negative = token == "minus"
+    return tuple(values)
+
+
+def _split_list(tokens: List[str]) -> Tuple[Tuple[float, ...], Optional[Tuple[Program, Tuple[float, ...]]]]:
+    """Return the values of a statistic's list and the arithmetic applied to its result.
+
+    The list ends at the first operator after a number that starts a
+    complete expression ("the max of 3 and 8 plus 2"), which is returned
+    compiled with the statistic as its first number, along with its other
+    numbers; None if the whole command is the list.
+    """
+    if not _LIST_OPERATORS.isdisjoint(tokens):
+        seen_number = False
+        for i, token in enumerate(tokens):
+            if seen_number and token in _LIST_OPERATORS:
+                shape = (NUMBER,) + tuple(NUMBER if _parse_number(t) is not None else t for t in tokens[i:])
+                program = compile_shape(shape)
+                if program is not None:
+                    numbers = tuple(value for value in map(_parse_number, tokens[i:]) if value is not None)
+                    return _list_values(tokens[:i]), (program, numbers)
+                break
+            seen_number = seen_number or _parse_number(token) is not None
+    return _list_values(tokens), None
+
+
+def _list_result(operation: str, result: Union[float, str], operands: Tuple[float, ...], template: str,
+                 rest: Optional[Tuple[Program, Tuple[float, ...]]]) -> CalculationResult:
+    """Wrap a statistic's result, first applying the arithmetic that followed its list."""
+    if rest is None:
+        return CalculationResult.of(operation, result, *operands, template=template)
+    program, numbers = rest
+    # The statistic fills the program's first slot; its other numbers follow the statistic's operands
+    slots = ["{%d}" % i for i in range(len(operands), len(operands) + len(numbers))]
+    return CalculationResult.of("expression", program.run((result, *numbers)), *operands, *numbers,
+                                template=program.template.format(template, *slots))
+
+
+def _list_template(count: int, first: int = 0) -> str:
+    """History template of a parenthesized list of count numbered slots."""
+    return "(" + ", ".join("{%d}" % i for i in range(first, first + count)) + ")"
+
+
+def _format_number(num: float) -> Union[int, float]:
+    """Format a number to integer if it's a whole number short enough to write out."""
+    return int(num) if num.is_integer() and -INTEGER_FORMAT_LIMIT < num < INTEGER_FORMAT_LIMIT else num
+
+
+def _split_phrases(forms: Tuple) -> Tuple:
+    """Split the phrases of OPERAND_FORMS entries into single words and phrases of several words."""
+    return tuple((tuple(phrase for phrase in phrases if " " not in phrase),
+                  tuple(phrase for phrase in phrases if " " in phrase), x, y)
+                 for phrases, x, y in forms)
+
+
+# OPERAND_FORMS as (words, phrases, x, y): words are looked up in the token
+# list, and only forms with phrases join the tokens to search them
+_OPERAND_FORMS = {operation: _split_phrases(forms) for operation, forms in OPERAND_FORMS.items()}
+
+# HISTORY_FORMATS with the result as the last positional field, which
+# str.format fills faster than a keyword
+_HISTORY_FORMATS = {operation: (template.replace("{result}", "{}"), style)
+                    for operation, (template, style) in HISTORY_FORMATS.items()}
+
+# Tokens of "add 10 and 20", whose operands are read in spoken order
+_ADD_10_AND_20 = ["add", "10", "20"]
+
+# Shared by every command that matches no operation
+_INVALID_COMMAND = CalculationResult(None, ERROR_INVALID_COMMAND, ERROR_MESSAGES[ERROR_INVALID_COMMAND],
+                                     history_entry="")
+
+
+# Alphabetic spellings that float() accepts; any other all-letter token is a word.
+_FLOAT_WORDS = frozenset(("inf", "infinity", "nan"))
 
-        result = self.calculator.tangent(x)
-        history_entry = f"tan({self._format_number(x)}) = {result}"
-        return result, history_entry
 
-    def _format_number(self, num: float) -> Union[int, float]:
-        """Format a number to integer if it's a whole number."""
-        return int(num) if num.is_integer() else num
+def _parse_number(token: str) -> Optional[float]:
+    """Return token as a float, or None if it is not a number."""
+    if token.isalpha() and token not in _FLOAT_WORDS:
+        return None
+    try:
+        return float(token)
+    except ValueError:
+        return None
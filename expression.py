@@ -0,0 +1,224 @@
+"""
+Precedence-aware expression compiler for spoken arithmetic.
+
+A command such as "2 plus 3 times 4" is compiled from its *shape*, the
+canonical token sequence with every number replaced by a placeholder, into a
+small postfix program plus a history template. Compiled programs are cached
+by shape, so "7 plus 1 times 9" reuses the program built for "2 plus 3 times
+4" and only the evaluator runs again.
+
+Parsing is Pratt-style over the parser's canonical vocabulary:
+
+    plus, minus            binary, lowest precedence, left associative
+    times, by              binary, left associative ("divided by" and
+                           "multiplied by" are accepted)
+    sine, cosine, tangent,
+    log, square root,
+    cube root, minus       prefix operators
+    power                  binary, highest precedence, right associative
+                           ("raised to the power" and "to the power" are
+                           accepted)
+"""
+
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from calculator import ERROR_INVALID_OPERATION, ERROR_MESSAGES, Calculator
+
+# Placeholder for a number in a command shape
+NUMBER = "#"
+
+# Operator tokens counted to decide whether a command needs the expression
+# compiler. "root" stands for both "square root" and "cube root".
+OPERATOR_TOKENS = frozenset((
+    "plus", "minus", "times", "by", "power",
+    "sine", "cosine", "tangent", "log", "square_root", "∛", "root",
+))
+
+# Binary operators: symbol -> (binding power, right associative)
+_BINARY = {
+    "+": (10, False),
+    "-": (10, False),
+    "*": (20, False),
+    "/": (20, False),
+    "^": (30, True),
+}
+_PREFIX_POWER = 25
+
+# Connective words that may precede an operator word and are otherwise ignored
+_CONNECTIVES = {"divided": ("by",), "raised": ("to", "power"), "to": ("power",)}
+
+_BINARY_WORDS = {"plus": "+", "minus": "-", "times": "*", "by": "/", "power": "^"}
+_FUNCTION_WORDS = {
+    "sine": "sin",
+    "cosine": "cos",
+    "tangent": "tan",
+    "log": "log",
+    "square_root": "√",
+    "∛": "∛",
+    "negative": "neg",
+}
+
+
+def _negate(x: float) -> float:
+    return -x
+
+
+# Opcode -> implementation
+OPERATIONS = {
+    "+": Calculator.add,
+    "-": Calculator.subtract,
+    "*": Calculator.multiply,
+    "/": Calculator.divide,
+    "^": Calculator.exponentiation,
+    "neg": _negate,
+    "sin": Calculator.sine,
+    "cos": Calculator.cosine,
+    "tan": Calculator.tangent,
+    "log": Calculator.logarithm,
+    "√": Calculator.square_root,
+    "∛": Calculator.cube_root,
+}
+
+
+class Program(NamedTuple):
+    """Compiled expression: postfix code and a history template with number slots."""
+
+    # ("num", slot) pushes a number; (opcode, arity) applies an operation
+    code: Tuple[Tuple[str, int], ...]
+    template: str
+
+    def run(self, numbers: Sequence[float]) -> Union[float, str]:
+        """Evaluate the program, returning the first error string if one occurs."""
+        stack: List[Union[float, str]] = []
+        for op, arg in self.code:
+            if op == "num":
+                stack.append(numbers[arg])
+                continue
+            operands = stack[-arg:]
+            del stack[-arg:]
+            error = next((value for value in operands if isinstance(value, str)), None)
+            if error is None:
+                try:
+                    value = OPERATIONS[op](*operands)
+                except (OverflowError, ZeroDivisionError, TypeError):
+                    # Overflow, 0 to a negative power, or a complex power
+                    # (round() rejects complex numbers), as VectorCalculator flags them
+                    value = ERROR_MESSAGES[ERROR_INVALID_OPERATION]
+            else:
+                value = error
+            stack.append(value)
+        return stack[0]
+
+
+class _CompileError(Exception):
+    pass
+
+
+def _lex(shape: Sequence[str]) -> List[Tuple[str, str]]:
+    """Turn a command shape into (kind, value) grammar tokens."""
+    out: List[Tuple[str, str]] = []
+    i = 0
+    n = len(shape)
+    while i < n:
+        token = shape[i]
+        following = shape[i + 1] if i + 1 < n else None
+        if token == NUMBER:
+            out.append(("num", token))
+        elif following in _CONNECTIVES.get(token, ()):
+            pass
+        elif token == "multiplied" and following == "by":
+            out.append(("op", "*"))
+            i += 1
+        elif token in _BINARY_WORDS:
+            out.append(("op", _BINARY_WORDS[token]))
+        elif token in _FUNCTION_WORDS:
+            out.append(("fn", _FUNCTION_WORDS[token]))
+        elif token == "square" and following == "root":
+            out.append(("fn", "√"))
+            i += 1
+        elif token == "cube" and following == "root":
+            out.append(("fn", "∛"))
+            i += 1
+        else:
+            raise _CompileError(token)
+        i += 1
+    return out
+
+
+class _Parser:
+    """Pratt parser producing postfix code and an infix history template."""
+
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.pos = 0
+        self.code: List[Tuple[str, int]] = []
+        self.slots = 0
+
+    def peek(self) -> Optional[Tuple[str, str]]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def next(self) -> Tuple[str, str]:
+        token = self.peek()
+        if token is None:
+            raise _CompileError("unexpected end of expression")
+        self.pos += 1
+        return token
+
+    def expression(self, rbp: int = 0) -> Tuple[str, int]:
+        """Parse an expression, returning its template text and precedence."""
+        left = self.prefix(self.next())
+        while True:
+            token = self.peek()
+            if token is None or token[0] != "op":
+                return left
+            lbp, right_assoc = _BINARY[token[1]]
+            if lbp <= rbp:
+                return left
+            self.pos += 1
+            left = self.infix(token[1], left, lbp, right_assoc)
+
+    def prefix(self, token: Tuple[str, str]) -> Tuple[str, int]:
+        kind, value = token
+        if kind == "num":
+            self.code.append(("num", self.slots))
+            self.slots += 1
+            return "{%d}" % (self.slots - 1), 100
+        if kind == "op" and value == "-":
+            kind, value = "fn", "neg"
+        if kind != "fn":
+            raise _CompileError(value)
+        text, precedence = self.expression(_PREFIX_POWER)
+        self.code.append((value, 1))
+        if value == "neg":
+            return "-" + (text if precedence == 100 else f"({text})"), _PREFIX_POWER
+        return f"{value}({text})", 100
+
+    def infix(self, op: str, left: Tuple[str, int], lbp: int, right_assoc: bool) -> Tuple[str, int]:
+        right = self.expression(lbp - 1 if right_assoc else lbp)
+        self.code.append((op, 2))
+        # Parenthesize operands that bind more loosely than this operator
+        left_text = left[0] if left[1] > lbp or (left[1] == lbp and not right_assoc) else f"({left[0]})"
+        right_text = right[0] if right[1] > lbp or (right[1] == lbp and right_assoc) else f"({right[0]})"
+        return f"{left_text} {op} {right_text}", lbp
+
+
+@lru_cache(maxsize=1024)
+def compile_shape(shape: Tuple[str, ...]) -> Optional[Program]:
+    """Compile a command shape, or return None if it is not a complete expression."""
+    try:
+        parser = _Parser(_lex(shape))
+        text, _ = parser.expression()
+        if parser.peek() is not None:
+            return None
+    except _CompileError:
+        return None
+    return Program(tuple(parser.code), text)
+
+
+def needs_compiler(tokens: Sequence[str]) -> bool:
+    """Return whether a command has more than one operator."""
+    return len(tokens) > 3 and len(list(filter(_is_operator, tokens))) > 1
+
+
+_is_operator = OPERATOR_TOKENS.__contains__
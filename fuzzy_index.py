@@ -0,0 +1,95 @@
+"""
+Fuzzy word lookup for correcting speech-recognition misspellings.
+
+FuzzyIndex is a symmetric-deletion dictionary: at build time every word is
+stored under each string obtained by deleting up to ``max_distance``
+characters from it. A query generates its own deletions and looks them up,
+so candidate matches are found without comparing the query against the
+whole vocabulary. Candidates are then ranked by their true edit distance
+(optimal string alignment, so a swapped pair of letters counts as one
+edit).
+"""
+
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set
+
+
+class FuzzyMatch(NamedTuple):
+    """Closest vocabulary word for a query."""
+
+    word: str
+    distance: int
+    # 1 - distance / len(query): 1.0 for an exact match
+    confidence: float
+
+
+def _deletions(word: str, max_distance: int) -> Set[str]:
+    """Return word and every string made by deleting up to max_distance characters."""
+    found = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        found |= frontier
+    return found
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Return the optimal string alignment distance between a and b."""
+    previous: Optional[List[int]] = None
+    row = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, row = previous, row, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            row[j] = min(previous[j] + 1, row[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                row[j] = min(row[j], before[j - 2] + 1)
+    return row[-1]
+
+
+class FuzzyIndex:
+    """Deletion-dictionary index over a fixed vocabulary."""
+
+    def __init__(self, words: Iterable[str], max_distance: int = 2):
+        self.max_distance = max_distance
+        # Earlier words win ties, so callers list the most useful words first
+        self._order: Dict[str, int] = {}
+        self._deletes: Dict[str, List[str]] = {}
+        for word in words:
+            if word in self._order:
+                continue
+            self._order[word] = len(self._order)
+            for deletion in _deletions(word, max_distance):
+                self._deletes.setdefault(deletion, []).append(word)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._order
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._order)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def lookup(self, word: str, max_distance: Optional[int] = None) -> Optional[FuzzyMatch]:
+        """Return the closest word within max_distance edits (at most the index's), or None."""
+        if word in self._order:
+            return FuzzyMatch(word, 0, 1.0)
+        limit = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        if limit <= 0:
+            return None
+
+        candidates: Set[str] = set()
+        for deletion in _deletions(word, limit):
+            candidates.update(self._deletes.get(deletion, ()))
+
+        best: Optional[FuzzyMatch] = None
+        for candidate in candidates:
+            # Each edit changes the length by at most one
+            if abs(len(candidate) - len(word)) > limit:
+                continue
+            distance = edit_distance(word, candidate)
+            if distance > limit:
+                continue
+            if best is None or (distance, self._order[candidate]) < (best.distance, self._order[best.word]):
+                best = FuzzyMatch(candidate, distance, 1 - distance / len(word))
+        return best
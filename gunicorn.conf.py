@@ -0,0 +1,97 @@
+"""
+Gunicorn configuration for VocalCalc.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+The app is loaded and warmed once in the master (preload_app), then the GC
+is frozen so forked workers share the parser, lookup tables and compiled
+templates copy-on-write instead of each building their own. Workers use
+threads so long-lived WebSocket sessions do not hold a whole process each;
+the thread count is sized for the sessions expected (GUNICORN_SESSIONS).
+
+Every setting can be overridden on the command line or with the
+environment variables below.
+"""
+
+import gc
+import glob
+import math
+import multiprocessing
+import os
+import tempfile
+
+from metrics import retire_process
+
+_cpus = multiprocessing.cpu_count()
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+
+# Requests are CPU-light and mostly wait on the network, so a couple of
+# processes per core keeps every core busy
+workers = int(os.environ.get('WEB_CONCURRENCY', min(2 * _cpus + 1, 12)))
+worker_class = 'gthread'
+
+# A gthread worker serves one request per thread, and an open WebSocket
+# session keeps its thread for as long as it lasts. Each worker therefore
+# gets a couple of threads per core for plain requests plus its share of the
+# sessions expected at once (GUNICORN_SESSIONS across all workers). Idle
+# threads cost little more than their stack; too few and new sessions and
+# requests queue behind open ones. For thousands of concurrent sessions an
+# async worker (gevent or eventlet) would avoid a thread per session, at the
+# price of monkey-patching and of CPU-bound parsing blocking its event loop.
+_sessions = int(os.environ.get('GUNICORN_SESSIONS', 64))
+threads = int(os.environ.get('GUNICORN_THREADS', 2 * _cpus + math.ceil(_sessions / workers)))
+
+# Worksheets kept in one worker's memory would vanish whenever a request
+# went to another, so several workers share them through a directory
+if workers > 1:
+    os.environ.setdefault('VOCALCALC_WORKSHEET_DIR', os.path.join(tempfile.gettempdir(), 'vocalcalc-worksheets'))
+
+preload_app = True
+
+# Connections are reused by browsers; sessions send heartbeats every 25 seconds
+keepalive = 5
+timeout = 30
+graceful_timeout = 30
+
+# Worker heartbeat files in memory rather than on a possibly slow disk
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    # Per-worker metric files from a previous run would be summed into this one
+    metrics_dir = os.environ.get('VOCALCALC_METRICS_DIR')
+    if metrics_dir:
+        for path in glob.glob(os.path.join(metrics_dir, 'metrics_*.db*')):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    # Fold the exited worker's metrics into the archive so recycled workers
+    # (max_requests, crashes) do not leave a file each behind
+    metrics_dir = os.environ.get('VOCALCALC_METRICS_DIR')
+    if metrics_dir:
+        retire_process(metrics_dir, worker.pid)
+
+
+def when_ready(server):
+    # Everything allocated so far (the preloaded app) is moved out of the GC's
+    # reach, so collections in workers do not touch and copy those pages
+    gc.freeze()
+    startup = server.app.wsgi().extensions['vocalcalc'].startup
+    server.log.info(
+        "Preloaded app: imports %.1f ms, create_app %.1f ms, warm-up %.1f ms",
+        startup.import_seconds * 1000, (startup.create_app_seconds or 0) * 1000,
+        (startup.warm_up_seconds or 0) * 1000)
+
+
+def post_fork(server, worker):
+    app = worker.app.wsgi()
+    # Time to first request is measured from the fork, not from the master's start
+    app.extensions['vocalcalc'].startup.restart()
+    # Let the app's startup report through at gunicorn's log level
+    app.logger.setLevel(server.log.error_log.level)
@@ -0,0 +1,116 @@
+"""
+Server-side calculation history, one append-only log per session.
+
+Each session has two files in the store directory:
+
+    <session>.log   JSON records, one per line, only ever appended to
+    <session>.idx   fixed-size (offset, length) pairs, one per record
+
+A record's sequence number is its position in the index, so reading a page
+is a slice of the memory-mapped index followed by one slice of the
+memory-mapped log per record. Nothing is read or held in memory beyond the
+requested page, however long the session grows.
+
+Appends take an exclusive flock on the index so several gunicorn workers can
+write to the same session. The log is written before the index, so a reader
+never sees an index entry whose record is incomplete.
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Not on Windows; appends are then only serialized within a process
+    fcntl = None
+
+_INDEX = struct.Struct("<QQ")
+_SESSION_PATTERN = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+MAX_PAGE_SIZE = 100
+
+
+def valid_session(session: Any) -> bool:
+    """Return whether session is usable as a session ID (and a file name)."""
+    return isinstance(session, str) and _SESSION_PATTERN.match(session) is not None
+
+
+class HistoryStore:
+    """Append-only, paginated history logs stored under one directory."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, session: str) -> Tuple[str, str]:
+        if not valid_session(session):
+            raise ValueError(f"Invalid session ID: {session!r}")
+        base = os.path.join(self.directory, session)
+        return base + ".log", base + ".idx"
+
+    def append(self, session: str, record: Dict[str, Any]) -> int:
+        """Append a record to the session's log and return its sequence number."""
+        log_path, idx_path = self._paths(session)
+        with self._lock, open(idx_path, "ab") as idx:
+            if fcntl is not None:
+                fcntl.flock(idx, fcntl.LOCK_EX)
+            try:
+                seq = idx.seek(0, os.SEEK_END) // _INDEX.size
+                data = json.dumps({"seq": seq, "time": time.time(), **record}).encode("utf-8") + b"\n"
+                with open(log_path, "ab") as log:
+                    offset = log.seek(0, os.SEEK_END)
+                    log.write(data)
+                idx.write(_INDEX.pack(offset, len(data)))
+                idx.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(idx, fcntl.LOCK_UN)
+        return seq
+
+    def count(self, session: str) -> int:
+        """Return the number of records in the session's log."""
+        _, idx_path = self._paths(session)
+        try:
+            return os.path.getsize(idx_path) // _INDEX.size
+        except FileNotFoundError:
+            return 0
+
+    def page(self, session: str, before: Optional[int] = None,
+             limit: int = 20) -> Tuple[List[Dict[str, Any]], Optional[int], int]:
+        """Return (records, next_cursor, total) for one page, newest first.
+
+        The page holds up to limit records with a sequence number below
+        before (default: all records). next_cursor is the before value for
+        the following, older page, or None when there is none.
+        """
+        log_path, idx_path = self._paths(session)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        total = self.count(session)
+        end = total if before is None else max(0, min(before, total))
+        start = max(0, end - limit)
+        if start == end:
+            return [], None, total
+
+        with open(idx_path, "rb") as idx_file, open(log_path, "rb") as log_file:
+            with mmap.mmap(idx_file.fileno(), 0, access=mmap.ACCESS_READ) as idx, \
+                    mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as log:
+                records = []
+                for seq in range(end - 1, start - 1, -1):
+                    offset, length = _INDEX.unpack_from(idx, seq * _INDEX.size)
+                    records.append(json.loads(log[offset:offset + length]))
+        return records, (start if start > 0 else None), total
+
+    def clear(self, session: str) -> None:
+        """Delete the session's history."""
+        for path in self._paths(session):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
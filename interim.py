@@ -0,0 +1,91 @@
+"""
+Provisional results for commands that are still being spoken.
+
+Speech recognition reports interim transcripts while the user talks. The
+client sends each one with an utterance ID:
+
+    {"utterance": "u-17", "transcript": "what is five plus"}
+        -> {"utterance": "u-17", "complete": false, "final": false}
+    {"utterance": "u-17", "transcript": "what is five plus three"}
+        -> {"utterance": "u-17", "complete": true, "final": false,
+            "result": 8, "history_entry": "5 + 3 = 8"}
+
+A transcript is complete once it evaluates without error; its result is
+provisional, since later words can still change it ("plus three" may
+become "plus thirty"). Each utterance keeps a PrefixTokenizer, so a new
+transcript is tokenized only from where it differs from the previous one,
+and a transcript that tokenizes as the previous one did reuses its result.
+"final" drops the utterance's state. Interim results are not written to
+the shared result cache.
+
+The state is only an optimization: an utterance seen for the first time,
+or evicted, or continued on another worker, is tokenized from scratch and
+gives the same answer.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from command_parser import CalculationResult, CommandParser, PrefixTokenizer
+
+# Utterances remembered per process, least recently updated evicted first
+MAX_UTTERANCES = 1000
+
+# Longest accepted utterance ID
+MAX_UTTERANCE_ID = 64
+
+
+class _Utterance:
+    __slots__ = ("locale", "tokenizer", "key", "handler", "outcome")
+
+    def __init__(self, locale: Optional[str], tokenizer: PrefixTokenizer):
+        self.locale = locale
+        self.tokenizer = tokenizer
+        # Tokens, handler and result of the previous transcript
+        self.key: Optional[str] = None
+        self.handler: Optional[Callable] = None
+        self.outcome: Optional[CalculationResult] = None
+
+
+class InterimParser:
+    """Evaluates growing transcripts, keeping per-utterance tokenizer state."""
+
+    def __init__(self, parser: CommandParser, max_utterances: int = MAX_UTTERANCES):
+        self.parser = parser
+        self.max_utterances = max_utterances
+        self._utterances: "OrderedDict[str, _Utterance]" = OrderedDict()
+        # Updates take microseconds, so one lock for all utterances is enough
+        self._lock = threading.Lock()
+
+    def update(self, utterance: str, transcript: str, final: bool = False,
+               locale: Optional[str] = None) -> Dict[str, Any]:
+        """Evaluate the latest transcript of an utterance and return the reply fields.
+
+        locale is one of the parser's locales, None for the default.
+        """
+        with self._lock:
+            state = self._utterances.pop(utterance, None)
+            if state is None or state.locale != locale:
+                state = _Utterance(locale, PrefixTokenizer(self.parser, locale))
+            if not final:
+                self._utterances[utterance] = state
+                if len(self._utterances) > self.max_utterances:
+                    self._utterances.popitem(last=False)
+
+            stream = state.tokenizer.update(transcript)
+            if stream.key != state.key or stream.handler != state.handler:
+                state.key, state.handler = stream.key, stream.handler
+                # Not through the shared result cache: most prefixes are never
+                # asked for again, and would evict the commands that are
+                state.outcome = self.parser.evaluate(stream)
+            outcome = state.outcome
+
+        reply: Dict[str, Any] = {"utterance": utterance, "complete": outcome.ok, "final": final}
+        if outcome.ok:
+            reply["result"] = outcome.result
+            reply["history_entry"] = outcome.history_entry
+        return reply
+
+    def __len__(self) -> int:
+        return len(self._utterances)
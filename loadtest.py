@@ -0,0 +1,357 @@
+"""
+Load-test /api/calculate end to end on one machine.
+
+    python loadtest.py                                   # 16 clients for 10 s
+    python loadtest.py --rate 400 --duration 30          # open loop at 400 requests/s
+    python loadtest.py --workers 1,2,4 --worker-class gthread,sync -o loadtest.jsonl
+    python loadtest.py --url http://127.0.0.1:5000       # a server that is already running
+
+For each server configuration (every combination of --worker-class and
+--workers), gunicorn is started on a free local port with gunicorn.conf.py
+and the given settings. The benchmark corpus (tests/benchmarks/corpus.py)
+is then replayed against it, with phrasings drawn by their production
+weights, and the server is stopped again.
+
+Without --rate, each client sends its next request as soon as the previous
+one returns (closed loop). With --rate, requests are scheduled at fixed
+intervals (open loop). Latency is measured from the scheduled time, so a
+server that falls behind is charged for the queueing instead of the clients
+quietly slowing down. Requests sent during the --warmup period are not
+measured.
+
+A table comparing the configurations is printed. With -o, each run is also
+appended to a JSONL file with its configuration, the git revision and the
+CPU count, so results can be tracked over time. The clients run on the same
+machine as the server; use --client-processes so that a single Python
+process is not the bottleneck.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from http.client import HTTPConnection, HTTPException
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from tests.benchmarks.corpus import CORPUS, WEIGHTS
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_DURATION = 10.0
+DEFAULT_WARMUP = 1.0
+PERCENTILES = (50, 95, 99)
+# Seconds to wait for a started server to answer /api/health
+START_TIMEOUT = 30.0
+
+
+class Sample(NamedTuple):
+    family: str
+    latency: float
+    status: int  # 0 when the request failed without a response
+
+
+def weighted_corpus() -> Tuple[List[Tuple[str, str]], List[float]]:
+    """Return every (family, command) of the benchmark corpus and its weight.
+
+    A family's weight is shared equally by its phrasings.
+    """
+    items, weights = [], []
+    for family, phrasings in CORPUS.items():
+        for command in phrasings:
+            items.append((family, command))
+            weights.append(WEIGHTS[family] / len(phrasings))
+    return items, weights
+
+
+def _post(connection: HTTPConnection, body: str) -> int:
+    connection.request("POST", "/api/calculate", body=body, headers={"Content-Type": "application/json"})
+    response = connection.getresponse()
+    response.read()
+    return response.status
+
+
+def drive(url: str, duration: float, concurrency: int, rate: Optional[float] = None,
+          warmup: float = 0.0, seed: int = 0) -> List[Sample]:
+    """Send requests to url for warmup + duration seconds and return the measured samples.
+
+    Each client thread keeps one HTTP connection open. Without rate the
+    clients run a closed loop; with rate they share an open-loop schedule.
+    """
+    parsed = urlsplit(url)
+    items, weights = weighted_corpus()
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+    schedule = itertools.count()
+    lock = threading.Lock()
+    samples: List[Sample] = []
+
+    def client(number: int) -> None:
+        rng = random.Random(f"{seed}-{number}")
+        connection = HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+        measured = []
+        try:
+            while True:
+                if rate:
+                    with lock:
+                        scheduled = start + next(schedule) / rate
+                    if scheduled >= deadline:
+                        break
+                    delay = scheduled - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                else:
+                    scheduled = time.perf_counter()
+                    if scheduled >= deadline:
+                        break
+                family, command = rng.choices(items, weights)[0]
+                try:
+                    status = _post(connection, json.dumps({"command": command}))
+                except (OSError, HTTPException):
+                    status = 0
+                    # Reopened by the next request
+                    connection.close()
+                if scheduled >= measure_from:
+                    measured.append(Sample(family, time.perf_counter() - scheduled, status))
+        finally:
+            connection.close()
+        with lock:
+            samples.extend(measured)
+
+    threads = [threading.Thread(target=client, args=(n,), daemon=True) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def _drive_part(args) -> List[Sample]:
+    return drive(*args)
+
+
+def run_load(url: str, duration: float, concurrency: int, rate: Optional[float] = None,
+             warmup: float = 0.0, seed: int = 0, processes: int = 1) -> List[Sample]:
+    """Like drive(), with the clients (and the rate) split over several processes."""
+    if processes <= 1:
+        return drive(url, duration, concurrency, rate, warmup, seed)
+    parts = []
+    for p in range(processes):
+        clients = concurrency // processes + (p < concurrency % processes)
+        if clients:
+            parts.append((url, duration, clients, rate * clients / concurrency if rate else None,
+                          warmup, seed * processes + p))
+    with ProcessPoolExecutor(max_workers=len(parts)) as pool:
+        return [sample for part in pool.map(_drive_part, parts) for sample in part]
+
+
+def percentile(ordered: Sequence[float], p: float) -> float:
+    """Return the p-th percentile (nearest rank) of an ascending sequence."""
+    if not ordered:
+        return math.nan
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _latency_ms(latencies: List[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    summary = {f"p{p}": round(percentile(ordered, p) * 1000, 3) for p in PERCENTILES}
+    if ordered:
+        summary["mean"] = round(sum(ordered) / len(ordered) * 1000, 3)
+        summary["max"] = round(ordered[-1] * 1000, 3)
+    return summary
+
+
+def summarize(samples: List[Sample], duration: float) -> Dict[str, object]:
+    """Return throughput, latency percentiles and error rates of a run."""
+    errors = sum(1 for sample in samples if sample.status != 200)
+    statuses: Dict[str, int] = {}
+    by_family: Dict[str, List[Sample]] = {}
+    for sample in samples:
+        statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+        by_family.setdefault(sample.family, []).append(sample)
+    return {
+        "requests": len(samples),
+        "throughput": round(len(samples) / duration, 1),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 6) if samples else 0.0,
+        "statuses": statuses,
+        "latency_ms": _latency_ms([sample.latency for sample in samples]),
+        "families": {
+            family: {"requests": len(group),
+                     "errors": sum(1 for sample in group if sample.status != 200),
+                     "latency_ms": _latency_ms([sample.latency for sample in group])}
+            for family, group in sorted(by_family.items())
+        },
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Server:
+    """gunicorn serving the app on a free local port, for use in a with statement."""
+
+    def __init__(self, workers: int, worker_class: str, threads: int, env: Optional[Dict[str, str]] = None):
+        self.workers = workers
+        self.worker_class = worker_class
+        self.threads = threads
+        self.env = env or {}
+        self.process: Optional[subprocess.Popen] = None
+        self.url = ""
+
+    def __enter__(self) -> "Server":
+        port = _free_port()
+        self.url = f"http://127.0.0.1:{port}"
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app",
+                   "--bind", f"127.0.0.1:{port}", "--workers", str(self.workers),
+                   "--worker-class", self.worker_class, "--threads", str(self.threads),
+                   "--log-level", "warning"]
+        self.process = subprocess.Popen(command, cwd=ROOT, env={**os.environ, **self.env})
+        try:
+            self._wait_until_ready()
+        except BaseException:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def _wait_until_ready(self) -> None:
+        deadline = time.monotonic() + START_TIMEOUT
+        parsed = urlsplit(self.url)
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with status {self.process.returncode}")
+            connection = HTTPConnection(parsed.hostname, parsed.port, timeout=1)
+            try:
+                connection.request("GET", "/api/health")
+                if connection.getresponse().status == 200:
+                    return
+            except OSError:
+                pass
+            finally:
+                connection.close()
+            time.sleep(0.1)
+        raise RuntimeError(f"gunicorn did not answer within {START_TIMEOUT:.0f}s")
+
+    def __exit__(self, *exc_info) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+
+def _revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _csv(value: str, kind=str) -> List:
+    return [kind(part) for part in value.split(",") if part.strip()]
+
+
+def _print_table(rows: List[Dict[str, object]]) -> None:
+    print(f"{'server':<28} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>8}")
+    for row in rows:
+        latency = row["latency_ms"]
+        print(f"{row['label']:<28} {row['throughput']:>9,.1f} {latency['p50']:>8.2f} "
+              f"{latency['p95']:>8.2f} {latency['p99']:>8.2f} {row['error_rate']:>8.2%}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Load-test /api/calculate and report latency percentiles.")
+    ap.add_argument("--url", help="test a running server instead of starting gunicorn")
+    ap.add_argument("--workers", type=lambda v: _csv(v, int), default=[2],
+                    help="comma-separated gunicorn worker counts to compare (default: 2)")
+    ap.add_argument("--worker-class", type=_csv, default=["gthread"],
+                    help="comma-separated gunicorn worker classes to compare (default: gthread)")
+    ap.add_argument("--threads", type=int, default=4, help="threads per gthread worker (default: 4)")
+    ap.add_argument("--env", action="append", default=[], metavar="NAME=VALUE",
+                    help="extra environment for the server, e.g. VOCALCALC_COALESCE=0 (repeatable)")
+    ap.add_argument("-c", "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                    help="concurrent clients (default: %(default)s)")
+    ap.add_argument("-r", "--rate", type=float, help="target requests per second (open loop)")
+    ap.add_argument("-d", "--duration", type=float, default=DEFAULT_DURATION,
+                    help="measured seconds per run (default: %(default)s)")
+    ap.add_argument("--warmup", type=float, default=DEFAULT_WARMUP,
+                    help="unmeasured seconds before each run (default: %(default)s)")
+    ap.add_argument("--client-processes", type=int, default=1,
+                    help="processes the clients are spread over (default: 1)")
+    ap.add_argument("--seed", type=int, default=0, help="seed for the command mix")
+    ap.add_argument("-o", "--output", help="append one JSON line per run to this file")
+    args = ap.parse_args(argv)
+
+    if args.concurrency < 1 or args.duration <= 0 or (args.rate is not None and args.rate <= 0):
+        ap.error("concurrency, duration and rate must be positive")
+    env = {}
+    for setting in args.env:
+        name, sep, value = setting.partition("=")
+        if not sep:
+            ap.error(f"--env expects NAME=VALUE, got {setting!r}")
+        env[name] = value
+
+    if args.url:
+        configurations = [{"url": args.url}]
+    else:
+        configurations = [{"worker_class": worker_class, "workers": workers, "threads": args.threads}
+                          for worker_class in args.worker_class for workers in args.workers]
+
+    load = {"mode": "open" if args.rate else "closed", "concurrency": args.concurrency, "rate": args.rate,
+            "duration": args.duration, "warmup": args.warmup, "seed": args.seed}
+    revision = _revision()
+    rows = []
+    for server in configurations:
+        label = server.get("url") or f"{server['worker_class']} x{server['workers']}"
+        if "threads" in server and server["worker_class"] == "gthread":
+            label += f" ({server['threads']} threads)"
+        print(f"Running {label} for {args.warmup + args.duration:.0f}s...", file=sys.stderr)
+        try:
+            if "url" in server:
+                samples = run_load(server["url"], args.duration, args.concurrency, args.rate,
+                                   args.warmup, args.seed, args.client_processes)
+            else:
+                with Server(server["workers"], server["worker_class"], server["threads"], env) as running:
+                    samples = run_load(running.url, args.duration, args.concurrency, args.rate,
+                                       args.warmup, args.seed, args.client_processes)
+        except RuntimeError as e:
+            print(f"Error: {label}: {e}", file=sys.stderr)
+            return 1
+
+        record = {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "revision": revision,
+            "cpus": os.cpu_count(),
+            "server": {**server, "env": env} if "url" not in server else server,
+            "load": load,
+            **summarize(samples, args.duration),
+        }
+        rows.append({"label": label, **record})
+        if args.output:
+            with open(args.output, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+    _print_table(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
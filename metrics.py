@@ -0,0 +1,340 @@
+"""
+Prometheus metrics that aggregate across worker processes.
+
+Each process writes its counters into its own memory-mapped file in
+``directory``. Recording a value is a dictionary lookup and an in-place
+update of a double in shared memory, so it is cheap enough to leave on in
+production. Rendering reads every process's file and sums the series, so a
+scrape of any worker reports totals for the whole server. Files of workers
+that have exited are still counted, because Prometheus counters must
+never go backwards: the server folds each one into a single archive file
+when the worker exits (retire_process), so recycled workers do not leave
+a file apiece behind.
+
+Without a directory, the values live in anonymous memory and only cover the
+current process.
+
+File layout: an 8-byte header holding the number of bytes used, followed by
+entries of (uint32 key length, key padded to 8 bytes, float64 value). Keys
+are JSON ``[metric name, [label values...]]``.
+"""
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Request handling takes microseconds; the upper buckets catch stalls
+LATENCY_BUCKETS = (
+    0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.1, 1.0,
+)
+
+_HEADER = struct.Struct("<Q")
+_LENGTH = struct.Struct("<I")
+_VALUE = struct.Struct("<d")
+_INITIAL_SIZE = 64 * 1024
+
+# Values of exited processes, summed
+ARCHIVE_NAME = "metrics_archive.db"
+
+
+def _padded(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _read_entries(data) -> Iterator[Tuple[str, int, float]]:
+    """Yield (key, value offset, value) for every entry in a values buffer."""
+    used = _HEADER.unpack_from(data, 0)[0]
+    pos = _HEADER.size
+    while pos < used:
+        length = _LENGTH.unpack_from(data, pos)[0]
+        key_start = pos + _LENGTH.size
+        offset = _padded(key_start + length)
+        key = bytes(data[key_start:key_start + length]).decode("utf-8")
+        yield key, offset, _VALUE.unpack_from(data, offset)[0]
+        pos = offset + _VALUE.size
+
+
+class _ValueFile:
+    """Growable mapping of keys to doubles in one process's mmap."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._offsets: Dict[str, int] = {}
+        if path is None:
+            self._map = mmap.mmap(-1, _INITIAL_SIZE)
+            self._used = _HEADER.size
+            _HEADER.pack_into(self._map, 0, self._used)
+            return
+
+        exists = os.path.exists(path)
+        self._file = open(path, "a+b")
+        if not exists or os.path.getsize(path) < _HEADER.size:
+            self._file.truncate(_INITIAL_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._used = _HEADER.unpack_from(self._map, 0)[0] or _HEADER.size
+        _HEADER.pack_into(self._map, 0, self._used)
+        for key, offset, _ in _read_entries(self._map):
+            self._offsets[key] = offset
+
+    def offset(self, key: str) -> int:
+        """Return the offset of key's value, appending a zero entry if needed."""
+        offset = self._offsets.get(key)
+        if offset is None:
+            encoded = key.encode("utf-8")
+            offset = _padded(self._used + _LENGTH.size + len(encoded))
+            end = offset + _VALUE.size
+            if end > len(self._map):
+                self._grow(end)
+            _LENGTH.pack_into(self._map, self._used, len(encoded))
+            self._map[self._used + _LENGTH.size:self._used + _LENGTH.size + len(encoded)] = encoded
+            _VALUE.pack_into(self._map, offset, 0.0)
+            # Publish the entry only once it is complete
+            self._used = end
+            _HEADER.pack_into(self._map, 0, end)
+            self._offsets[key] = offset
+        return offset
+
+    def add(self, offset: int, amount: float) -> None:
+        _VALUE.pack_into(self._map, offset, _VALUE.unpack_from(self._map, offset)[0] + amount)
+
+    def entries(self) -> Iterator[Tuple[str, int, float]]:
+        return _read_entries(self._map)
+
+    def close(self) -> None:
+        self._map.close()
+        if self.path is not None:
+            self._file.close()
+
+    def _grow(self, needed: int) -> None:
+        size = len(self._map)
+        while size < needed:
+            size *= 2
+        if self.path is None:
+            grown = mmap.mmap(-1, size)
+            grown[:len(self._map)] = self._map[:]
+        else:
+            self._map.flush()
+            self._file.truncate(size)
+            grown = mmap.mmap(self._file.fileno(), 0)
+        self._map.close()
+        self._map = grown
+
+
+def retire_process(directory: str, pid: int) -> None:
+    """Fold an exited process's values into the archive file and remove its file.
+
+    Called by the process that forked the workers, one exit at a time.
+    """
+    path = os.path.join(directory, f"metrics_{pid}.db")
+    retired = path + ".retired"
+    try:
+        # Renamed first, so a scrape never counts it twice
+        os.replace(path, retired)
+    except FileNotFoundError:
+        return
+    with open(retired, "rb") as f:
+        data = f.read()
+    if len(data) >= _HEADER.size:
+        archive = _ValueFile(os.path.join(directory, ARCHIVE_NAME))
+        try:
+            for key, _, value in _read_entries(data):
+                archive.add(archive.offset(key), value)
+        finally:
+            archive.close()
+    os.remove(retired)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: "Metrics", name: str, documentation: str, labelnames: Sequence[str]):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._offsets: Dict[Tuple[str, ...], Tuple[int, ...]] = {}
+
+    def _key(self, suffix: str, labels: Sequence[str]) -> str:
+        return json.dumps([self.name + suffix, list(labels)])
+
+
+class Counter(_Metric):
+    """Monotonic counter with a fixed set of label names."""
+
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        registry = self.registry
+        with registry._lock:
+            values = registry._values()
+            offsets = self._offsets.get(labels)
+            if offsets is None:
+                offsets = self._offsets[labels] = (values.offset(self._key("", labels)),)
+            values.add(offsets[0], amount)
+
+
+class Histogram(_Metric):
+    """Latency histogram; buckets are stored uncumulated and summed on render."""
+
+    kind = "histogram"
+
+    def __init__(self, registry: "Metrics", name: str, documentation: str, labelnames: Sequence[str],
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels: str) -> None:
+        registry = self.registry
+        index = bisect.bisect_left(self.buckets, value)
+        with registry._lock:
+            values = registry._values()
+            offsets = self._offsets.get(labels)
+            if offsets is None:
+                offsets = self._offsets[labels] = self._allocate(values, labels)
+            # values.add() inlined: a request observes several histograms
+            data, pack, unpack = values._map, _VALUE.pack_into, _VALUE.unpack_from
+            offset = offsets[index]
+            pack(data, offset, unpack(data, offset)[0] + 1.0)
+            offset = offsets[-2]
+            pack(data, offset, unpack(data, offset)[0] + value)
+            offset = offsets[-1]
+            pack(data, offset, unpack(data, offset)[0] + 1.0)
+
+    def time(self, *labels: str) -> "_Timer":
+        """Observe the duration of the with block."""
+        return _Timer(self, labels)
+
+    def _allocate(self, values: _ValueFile, labels: Sequence[str]) -> Tuple[int, ...]:
+        bounds = [_format_bound(bound) for bound in self.buckets] + ["+Inf"]
+        keys = [self._key("_bucket", [*labels, bound]) for bound in bounds]
+        keys += [self._key("_sum", labels), self._key("_count", labels)]
+        return tuple(values.offset(key) for key in keys)
+
+
+class _Timer:
+    """Context manager returned by Histogram.time()."""
+
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metrics:
+    """Registry of counters and histograms backed by per-process value files."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._metrics: List[_Metric] = []
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._file: Optional[_ValueFile] = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(self, name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(self, name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def _values(self) -> _ValueFile:
+        """Return this process's value file, opening a new one after a fork; call with the lock held."""
+        pid = os.getpid()
+        if self._pid != pid:
+            path = os.path.join(self.directory, f"metrics_{pid}.db") if self.directory else None
+            self._file = _ValueFile(path)
+            self._pid = pid
+            for metric in self._metrics:
+                metric._offsets.clear()
+        return self._file
+
+    def _collect(self) -> Dict[str, float]:
+        """Sum every series over all process files."""
+        totals: Dict[str, float] = {}
+        if self.directory:
+            for name in sorted(os.listdir(self.directory)):
+                if not (name.startswith("metrics_") and name.endswith(".db")):
+                    continue
+                try:
+                    with open(os.path.join(self.directory, name), "rb") as f:
+                        data = f.read()
+                except OSError:
+                    continue
+                if len(data) < _HEADER.size:
+                    continue
+                for key, _, value in _read_entries(data):
+                    totals[key] = totals.get(key, 0.0) + value
+        else:
+            with self._lock:
+                for key, _, value in self._values().entries():
+                    totals[key] = value
+        return totals
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        series: Dict[str, List[Tuple[List[str], float]]] = {}
+        for key, value in self._collect().items():
+            name, labels = json.loads(key)
+            series.setdefault(name, []).append((labels, value))
+
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if metric.kind == "counter":
+                for labels, value in sorted(series.get(metric.name, ())):
+                    lines.append(self._sample(metric.name, metric.labelnames, labels, value))
+            else:
+                lines.extend(self._render_histogram(metric, series))
+        return "\n".join(lines) + "\n"
+
+    def _render_histogram(self, metric: Histogram, series: Dict[str, List[Tuple[List[str], float]]]) -> Iterable[str]:
+        buckets: Dict[Tuple[str, ...], Dict[str, float]] = {}
+        for labels, value in series.get(metric.name + "_bucket", ()):
+            buckets.setdefault(tuple(labels[:-1]), {})[labels[-1]] = value
+        sums = {tuple(labels): value for labels, value in series.get(metric.name + "_sum", ())}
+        counts = {tuple(labels): value for labels, value in series.get(metric.name + "_count", ())}
+
+        bounds = [_format_bound(bound) for bound in metric.buckets] + ["+Inf"]
+        names = metric.labelnames + ("le",)
+        for labels in sorted(counts):
+            cumulative = 0.0
+            for bound in bounds:
+                cumulative += buckets.get(labels, {}).get(bound, 0.0)
+                yield self._sample(metric.name + "_bucket", names, [*labels, bound], cumulative)
+            yield self._sample(metric.name + "_sum", metric.labelnames, labels, sums.get(labels, 0.0))
+            yield self._sample(metric.name + "_count", metric.labelnames, labels, counts[labels])
+
+    @staticmethod
+    def _sample(name: str, labelnames: Sequence[str], labels: Sequence[str], value: float) -> str:
+        if labelnames:
+            pairs = ",".join(f'{label}="{_escape(str(v))}"' for label, v in zip(labelnames, labels))
+            name = f"{name}{{{pairs}}}"
+        return f"{name} {value!r}"
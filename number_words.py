@@ -0,0 +1,261 @@
+"""
+Spoken numbers ("twenty five", "three point one four", "one million two
+hundred", "minus two thirds") turned into numeral tokens.
+
+Every lexicon word has a class (unit, teen, tens, hundred, scale, point,
+fraction, article or sign), and the grammar of spoken numbers is compiled
+once into a finite-state transducer: a table mapping (state, class) to the
+next state. NumberWordRecognizer.convert() walks the token list once,
+accumulating the value of the current span as it moves through the table,
+and replaces each longest span that ends in a final state with one numeral.
+If a span runs into a word its state cannot take ("three point" followed by
+"plus"), the tokens after its last final state are given back unchanged.
+"""
+
+from typing import Dict, List, Optional, Tuple, Union
+
+Number = Union[int, float]
+
+# Word classes
+UNIT = "unit"
+TEEN = "teen"
+TENS = "tens"
+HUNDRED = "hundred"
+SCALE = "scale"
+POINT = "point"
+FRACTION = "fraction"
+ARTICLE = "article"
+NEGATIVE = "negative"
+MINUS = "minus"
+NUMERAL = "numeral"
+
+UNITS = ("zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine")
+TEENS = ("ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen",
+         "seventeen", "eighteen", "nineteen")
+TENS_WORDS = ("twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety")
+SCALES = {"thousand": 10 ** 3, "million": 10 ** 6, "billion": 10 ** 9, "trillion": 10 ** 12}
+# Denominator words, singular and plural ("a third", "two thirds")
+FRACTIONS = {
+    "half": 2, "halves": 2, "third": 3, "thirds": 3, "quarter": 4, "quarters": 4,
+    "fourth": 4, "fourths": 4, "fifth": 5, "fifths": 5, "sixth": 6, "sixths": 6,
+    "seventh": 7, "sevenths": 7, "eighth": 8, "eighths": 8, "ninth": 9, "ninths": 9,
+    "tenth": 10, "tenths": 10,
+}
+
+
+def _lexicon() -> Dict[str, Tuple[str, int]]:
+    """Return word -> (class, value) for every number word."""
+    lexicon = {word: (UNIT, value) for value, word in enumerate(UNITS)}
+    lexicon.update((word, (TEEN, value)) for value, word in enumerate(TEENS, 10))
+    lexicon.update((word, (TENS, value)) for value, word in zip(range(20, 100, 10), TENS_WORDS))
+    lexicon.update((word, (SCALE, value)) for word, value in SCALES.items())
+    lexicon.update((word, (FRACTION, value)) for word, value in FRACTIONS.items())
+    lexicon["hundred"] = (HUNDRED, 100)
+    lexicon["point"] = (POINT, 0)
+    lexicon["a"] = (ARTICLE, 1)
+    lexicon["negative"] = (NEGATIVE, 0)
+    lexicon["minus"] = (MINUS, 0)
+    return lexicon
+
+
+LEXICON = _lexicon()
+
+# Words that only ever mean a number ("a" and "minus" have other uses)
+WORDS = tuple(word for word, (kind, _) in LEXICON.items() if kind not in (ARTICLE, MINUS))
+
+# States. Group states track how much of the current group below a thousand
+# has been said, so "twenty thirty" or "five hundred two hundred" end the span.
+START = 0          # nothing yet
+SIGNED = 1         # "negative"
+MINUS_SIGNED = 2   # "minus": only number words may follow
+ONES = 3           # "five", "twenty five"
+TEENS_ = 4         # "fifteen"
+TENS_ = 5          # "twenty"
+HUNDREDS = 6       # "five hundred"
+HUNDRED_ONES = 7   # "five hundred six", "five hundred twenty six"
+HUNDRED_TEENS = 8  # "five hundred sixteen"
+HUNDRED_TENS = 9   # "five hundred twenty"
+SCALED = 10        # "two million"
+DECIMAL_POINT = 11  # "three point"
+DECIMALS = 12      # "three point one four"
+LEADING_A = 13     # "a" before anything else
+AND_A = 14         # "two (and) a"
+FRACTIONAL = 15    # "two thirds", "one and a half"
+NUMERAL_ = 16      # "2.5" (only useful before a scale word)
+
+FINAL_STATES = frozenset((ONES, TEENS_, TENS_, HUNDREDS, HUNDRED_ONES, HUNDRED_TEENS,
+                          HUNDRED_TENS, SCALED, DECIMALS, FRACTIONAL, NUMERAL_))
+
+
+def _transitions() -> Dict[Tuple[int, str], int]:
+    """Compile the grammar of spoken numbers into (state, class) -> state."""
+    table: Dict[Tuple[int, str], int] = {}
+
+    def add(states, kind, target):
+        for state in states:
+            table[state, kind] = target
+
+    number_start = (START, SIGNED, MINUS_SIGNED)
+    add([START], NEGATIVE, SIGNED)
+    add([START], MINUS, MINUS_SIGNED)
+    add(number_start, UNIT, ONES)
+    add(number_start, TEEN, TEENS_)
+    add(number_start, TENS, TENS_)
+    add(number_start, POINT, DECIMAL_POINT)
+    add(number_start, ARTICLE, LEADING_A)
+    add([START, SIGNED], NUMERAL, NUMERAL_)
+
+    # Within a group below a thousand
+    add([TENS_], UNIT, ONES)
+    add([ONES, TEENS_, TENS_, NUMERAL_], HUNDRED, HUNDREDS)
+    add([HUNDREDS], UNIT, HUNDRED_ONES)
+    add([HUNDREDS], TEEN, HUNDRED_TEENS)
+    add([HUNDREDS], TENS, HUNDRED_TENS)
+    add([HUNDRED_TENS], UNIT, HUNDRED_ONES)
+    add([LEADING_A], HUNDRED, HUNDREDS)
+
+    # Closing a group with a scale word, then starting the next group
+    groups = (ONES, TEENS_, TENS_, HUNDREDS, HUNDRED_ONES, HUNDRED_TEENS, HUNDRED_TENS, NUMERAL_)
+    add(groups + (LEADING_A,), SCALE, SCALED)
+    add([SCALED], UNIT, ONES)
+    add([SCALED], TEEN, TEENS_)
+    add([SCALED], TENS, TENS_)
+
+    # Decimals are read digit by digit
+    add(groups[:-1] + (SCALED,), POINT, DECIMAL_POINT)
+    add([DECIMAL_POINT, DECIMALS], UNIT, DECIMALS)
+
+    # Fractions: "a half", "three quarters", "one and a half"
+    add([LEADING_A, ONES, TEENS_, TENS_], FRACTION, FRACTIONAL)
+    add(groups[:-1] + (SCALED,), ARTICLE, AND_A)
+    add([AND_A], FRACTION, FRACTIONAL)
+    return table
+
+
+def _is_numeral(token: str) -> bool:
+    """Return whether token is a plain decimal numeral such as 5, -9 or 2.5."""
+    return token.lstrip("-").replace(".", "", 1).isdigit()
+
+
+def format_number(value: Number) -> str:
+    """Return the numeral token for a value: integral values without a decimal point."""
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e16:
+        value = int(value)
+    return str(value) if isinstance(value, int) else repr(value)
+
+
+class _Span:
+    """Value of the number being recognized."""
+
+    __slots__ = ("negative", "total", "group", "scale", "digits", "fraction")
+
+    def __init__(self):
+        self.negative = False
+        self.total: Number = 0     # value of the groups closed by a scale word
+        self.group: Number = 0     # current group below a thousand
+        self.scale: Optional[int] = None  # last scale word's value, to keep them descending
+        self.digits = ""           # decimal digits after "point"
+        self.fraction: Optional[float] = None
+
+    def value(self) -> Number:
+        whole = self.total + self.group
+        if self.fraction is not None:
+            value: Number = self.fraction
+        elif not self.digits:
+            value = whole
+        elif isinstance(whole, int):
+            # Built from the digits so "three point one four" is exactly 3.14
+            value = float(f"{whole}.{self.digits}")
+        else:
+            value = whole + float(f"0.{self.digits}")
+        return -value if self.negative else value
+
+
+class NumberWordRecognizer:
+    """Replaces spoken numbers in a token list with numeral tokens."""
+
+    def __init__(self):
+        self.lexicon = LEXICON
+        self.transitions = _transitions()
+        self.words = frozenset(LEXICON)
+        # Every spoken number has one of these; without one convert() changes nothing
+        self.number_words = frozenset(WORDS)
+        self.magnitudes = frozenset(word for word, (kind, _) in LEXICON.items() if kind in (HUNDRED, SCALE))
+
+    def convert(self, tokens: List[str]) -> List[str]:
+        """Return tokens with every spoken number replaced by a numeral.
+
+        "minus" is a sign only where a number cannot come before it (at the
+        start or after an operator) and only before number words, so
+        "10 minus 4" and "minus 4" keep their existing meaning.
+        """
+        out: List[str] = []
+        i = 0
+        n = len(tokens)
+        while i < n:
+            token = tokens[i]
+            starts_number = token in self.words or (
+                i + 1 < n and tokens[i + 1] in self.magnitudes and _is_numeral(token))
+            if starts_number and not (token == "minus" and out and _is_numeral(out[-1])):
+                end, value = self._match(tokens, i)
+                if end is not None:
+                    out.append(value)
+                    i = end
+                    continue
+            out.append(token)
+            i += 1
+        return out
+
+    def separates(self, token: str) -> bool:
+        """Return whether no number can include token.
+
+        convert() treats the tokens on either side of such a token
+        independently, so a growing token list only needs converting again
+        from the last one of them.
+        """
+        return token not in self.words and not _is_numeral(token)
+
+    def _match(self, tokens: List[str], start: int) -> Tuple[Optional[int], str]:
+        """Run the transducer from start; return (end, numeral) of the longest number."""
+        span = _Span()
+        state = START
+        best: Tuple[Optional[int], str] = (None, "")
+        for i in range(start, len(tokens)):
+            token = tokens[i]
+            kind, value = self.lexicon.get(token, (None, 0))
+            if kind is None:
+                if not _is_numeral(token):
+                    break
+                kind = NUMERAL
+            target = self.transitions.get((state, kind))
+            if target is None:
+                break
+
+            if kind == UNIT and state in (DECIMAL_POINT, DECIMALS):
+                span.digits += str(value)
+            elif kind in (UNIT, TEEN, TENS):
+                span.group += value
+            elif kind == HUNDRED:
+                span.group = (span.group or 1) * 100
+            elif kind == SCALE:
+                if span.scale is not None and value >= span.scale:
+                    break
+                span.total += (span.group or 1) * value
+                span.group = 0
+                span.scale = value
+            elif kind == FRACTION:
+                whole = span.total + span.group
+                if state == AND_A:
+                    span.fraction = whole + 1 / value
+                else:
+                    span.fraction = (1 if state == LEADING_A else whole) / value
+            elif kind in (NEGATIVE, MINUS):
+                span.negative = True
+            elif kind == NUMERAL:
+                span.group = float(token) if "." in token else int(token)
+            state = target
+
+            # A lone numeral stays as written
+            if state in FINAL_STATES and (state != NUMERAL_ or i > start):
+                best = (i + 1, format_number(span.value()))
+        return best
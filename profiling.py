@@ -0,0 +1,179 @@
+"""
+On-demand profiling of individual requests.
+
+A request is profiled when it carries the profiling token in the
+X-Profile-Token header, or at random with probability ``sample_rate``.
+Each profile is written to ``directory`` as a file named after the time,
+process and endpoint, in one of two formats:
+
+pstats
+    cProfile output, for ``python -m pstats`` or snakeviz.
+collapsed
+    One ``frame;frame;frame microseconds`` line per call stack, with the
+    time spent in the innermost frame itself. flamegraph.pl, speedscope and
+    inferno read it directly.
+
+Only the newest ``max_files`` profiles are kept. The app creates a
+RequestProfiler only when a directory is configured, so with profiling
+off a request pays a single ``is None`` check.
+"""
+
+import cProfile
+import hmac
+import itertools
+import os
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PROFILE_HEADER = "X-Profile-Token"
+
+FORMATS = {"pstats": ".prof", "collapsed": ".folded"}
+
+# Profiles kept per directory; the oldest are deleted first
+MAX_FILES = 100
+
+_NAME_PATTERN = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9]+-[0-9]+-[a-z_]+\.(prof|folded)$")
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _builtin_name(function) -> str:
+    module = getattr(function, "__module__", None) or "builtins"
+    return f"{module}.{getattr(function, '__qualname__', repr(function))}"
+
+
+class StackCollector:
+    """Exact call-stack timings recorded with sys.setprofile, for the collapsed format.
+
+    Every call and return is seen, so unlike a sampling profiler short
+    requests are covered fully; the hook slows the profiled code down
+    several times, which only matters for the profiled request.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self._clock = clock
+        # Open calls: [stack key, start time, time spent in callees]
+        self._stack: List[List[Any]] = []
+        self.self_time: Dict[str, float] = defaultdict(float)
+
+    def _hook(self, frame, event, arg):
+        now = self._clock()
+        if event == "call" or event == "c_call":
+            name = _frame_name(frame.f_code) if event == "call" else _builtin_name(arg)
+            parent = self._stack[-1][0] + ";" if self._stack else ""
+            self._stack.append([parent + name, now, 0.0])
+        elif self._stack:
+            # return, c_return or c_exception; returns from frames entered
+            # before the hook was set have no matching call and are ignored
+            key, start, callees = self._stack.pop()
+            elapsed = now - start
+            self.self_time[key] += elapsed - callees
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+    def run(self, fn: Callable[[], Any]) -> Any:
+        sys.setprofile(self._hook)
+        try:
+            return fn()
+        finally:
+            sys.setprofile(None)
+
+    def collapsed(self) -> str:
+        """Return the stacks in collapsed format, weighted in microseconds."""
+        lines = []
+        for key, seconds in sorted(self.self_time.items()):
+            weight = round(seconds * 1e6)
+            if weight > 0:
+                lines.append(f"{key} {weight}\n")
+        return "".join(lines)
+
+
+class RequestProfiler:
+    """Decides which requests to profile and stores their profiles."""
+
+    def __init__(self, directory: str, token: Optional[str] = None, sample_rate: float = 0.0,
+                 output_format: str = "pstats", max_files: int = MAX_FILES):
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown profile format {output_format!r}; use one of {', '.join(FORMATS)}")
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.directory = directory
+        self.token = token
+        self.sample_rate = sample_rate
+        self.output_format = output_format
+        self.max_files = max_files
+        self._sequence = itertools.count(1)
+        os.makedirs(directory, exist_ok=True)
+
+    def authorized(self, token: Optional[str]) -> bool:
+        """Return whether token is the configured profiling token."""
+        return bool(self.token) and token is not None and hmac.compare_digest(token.encode(), self.token.encode())
+
+    def wanted(self, token: Optional[str]) -> bool:
+        """Return whether to profile a request that sent token (None if it sent none)."""
+        if token is not None and self.authorized(token):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def run(self, fn: Callable[[], Any], endpoint: str) -> Tuple[Any, str]:
+        """Call fn under the profiler and return (its result, the profile's file name)."""
+        if self.output_format == "pstats":
+            profile = cProfile.Profile()
+            result = profile.runcall(fn)
+            name = self._write(endpoint, lambda path: profile.dump_stats(path))
+        else:
+            collector = StackCollector()
+            result = collector.run(fn)
+            text = collector.collapsed()
+
+            def write(path):
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(text)
+            name = self._write(endpoint, write)
+        return result, name
+
+    def _write(self, endpoint: str, write: Callable[[str], None]) -> str:
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        name = f"{stamp}-{os.getpid()}-{next(self._sequence)}-{endpoint}{FORMATS[self.output_format]}"
+        path = os.path.join(self.directory, name)
+        # Written under a temporary name so a listing never shows a partial file
+        write(path + ".tmp")
+        os.replace(path + ".tmp", path)
+        self._prune()
+        return name
+
+    def _prune(self) -> None:
+        profiles = self.list()
+        for entry in profiles[self.max_files:]:
+            try:
+                os.remove(os.path.join(self.directory, entry["name"]))
+            except FileNotFoundError:  # pruned by another worker
+                pass
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Return the stored profiles, newest first, as {name, size, created}."""
+        profiles = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not _NAME_PATTERN.match(entry.name):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                profiles.append({"name": entry.name, "size": stat.st_size, "created": stat.st_mtime})
+        profiles.sort(key=lambda profile: (profile["created"], profile["name"]), reverse=True)
+        return profiles
+
+    def path(self, name: str) -> Optional[str]:
+        """Return the path of a stored profile, or None if name is not one."""
+        if not _NAME_PATTERN.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
@@ -0,0 +1,210 @@
+"""
+Result cache shared by every worker process.
+
+Results are keyed by the normalized token form of a command and kept in a
+SQLite database, so all gunicorn workers on a host see the same entries and
+a restarted worker starts warm. SQLite in WAL mode handles concurrent readers
+and writers across processes; each process and thread opens its own
+connection.
+
+Each process also keeps a small in-memory LRU in front of the database so
+repeated commands skip SQL entirely. Recency updates and hit/miss counters
+are buffered in memory and written in one transaction at most every
+``flush_interval`` seconds. Eviction trims the least recently used rows back
+to ``capacity`` during that flush.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    last_used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+COUNTER_NAMES = ("hits", "misses", "evictions")
+
+
+def source_fingerprint(directory: str) -> str:
+    """Return a hash of the top-level Python sources in directory.
+
+    Used as the cache version so a deploy that changes how commands are
+    evaluated never serves results computed by the previous code.
+    """
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".py"):
+            digest.update(name.encode())
+            with open(os.path.join(directory, name), "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class ResultCache:
+    """Bounded LRU cache of command results backed by a shared SQLite file."""
+
+    def __init__(self, path: str, capacity: int = 10000, version: str = "",
+                 local_capacity: int = 1024, flush_interval: float = 1.0):
+        self.path = path
+        self.capacity = capacity
+        self.version = version
+        self.local_capacity = local_capacity
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._local: "OrderedDict[str, Any]" = OrderedDict()
+        self._thread_state = threading.local()
+        self._reset_pending()
+        self._init_db()
+
+    def _reset_pending(self) -> None:
+        self._pending_counts = dict.fromkeys(COUNTER_NAMES, 0)
+        self._pending_touches: Dict[str, int] = {}
+        self._last_flush = time.monotonic()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, reopening it after a fork."""
+        state = self._thread_state
+        pid = os.getpid()
+        if getattr(state, "pid", None) != pid:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            state.conn = conn
+            state.pid = pid
+            if getattr(self, "_pid", pid) != pid:
+                # A forked child must not inherit the parent's unflushed counts
+                with self._lock:
+                    self._reset_pending()
+            self._pid = pid
+        return state.conn
+
+    def _init_db(self) -> None:
+        conn = self._connection()
+        conn.executescript(_SCHEMA)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+            if row is None or row[0] != self.version:
+                # Results computed by other code are stale: start over
+                conn.execute("DELETE FROM results")
+                conn.execute("DELETE FROM counters")
+                conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('version', ?)",
+                             (self.version,))
+            conn.executemany("INSERT OR IGNORE INTO counters (name, value) VALUES (?, 0)",
+                             [(name,) for name in COUNTER_NAMES])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            found = key in self._local
+            if found:
+                self._local.move_to_end(key)
+                self._record_hit(key)
+                value = self._local[key]
+                due = self._flush_due()
+
+        if not found:
+            row = self._connection().execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            value = None if row is None else json.loads(row[0])
+            with self._lock:
+                if row is None:
+                    self._pending_counts["misses"] += 1
+                else:
+                    self._remember(key, value)
+                    self._record_hit(key)
+                due = self._flush_due()
+
+        if due:
+            self.flush()
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value for key."""
+        encoded = json.dumps(value)
+        self._connection().execute(
+            "INSERT OR REPLACE INTO results (key, value, last_used) VALUES (?, ?, ?)",
+            (key, encoded, time.time_ns()))
+        with self._lock:
+            self._remember(key, value)
+            due = self._flush_due()
+        if due:
+            self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit, miss and eviction counters summed over all workers."""
+        self.flush()
+        conn = self._connection()
+        stats = {name: value for name, value in conn.execute("SELECT name, value FROM counters")}
+        stats["size"] = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        stats["capacity"] = self.capacity
+        return stats
+
+    def clear(self) -> None:
+        """Drop every cached result and reset the counters."""
+        with self._lock:
+            self._local.clear()
+            self._reset_pending()
+        conn = self._connection()
+        conn.execute("DELETE FROM results")
+        conn.execute("UPDATE counters SET value = 0")
+
+    def flush(self) -> None:
+        """Write buffered recency updates and counters, then evict down to capacity."""
+        with self._lock:
+            counts = self._pending_counts
+            touches = self._pending_touches
+            self._reset_pending()
+
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("UPDATE results SET last_used = max(last_used, ?) WHERE key = ?",
+                             [(stamp, key) for key, stamp in touches.items()])
+            evicted = conn.execute(
+                "DELETE FROM results WHERE key IN "
+                "(SELECT key FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.capacity,)).rowcount
+            counts["evictions"] += max(evicted, 0)
+            conn.executemany("UPDATE counters SET value = value + ? WHERE name = ?",
+                             [(delta, name) for name, delta in counts.items() if delta])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _record_hit(self, key: str) -> None:
+        self._pending_counts["hits"] += 1
+        self._pending_touches[key] = time.time_ns()
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._local[key] = value
+        self._local.move_to_end(key)
+        if len(self._local) > self.local_capacity:
+            self._local.popitem(last=False)
+
+    def _flush_due(self) -> bool:
+        """Return whether flush_interval has passed; call with the lock held."""
+        return time.monotonic() - self._last_flush >= self.flush_interval
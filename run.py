@@ -2,7 +2,7 @@
 Entry point for running the VocalCalc application.
 """
 
-from vocalcalc.app import app
+from app import app
 
 if __name__ == '__main__':
     app.run(debug=True)
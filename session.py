@@ -0,0 +1,89 @@
+"""
+Persistent calculation sessions over a single bidirectional connection.
+
+Voice clients send many short commands per session. Carrying them over one
+long-lived WebSocket avoids paying connection setup and HTTP headers per
+utterance. The protocol is JSON text frames:
+
+    client -> server  {"type": "calculate", "id": "7", "command": "what is 5 plus 3"}
+    server -> client  {"type": "result", "id": "7", "command": "...", "result": 8,
+                       "history_entry": "5 + 3 = 8"}
+                      {"type": "error", "id": "7", "error": "Empty command provided"}
+
+    client -> server  {"type": "interim", "id": "8", "utterance": "u-3", "transcript": "five plus three"}
+    server -> client  {"type": "interim", "id": "8", "utterance": "u-3", "complete": true, "final": false,
+                       "result": 8, "history_entry": "5 + 3 = 8"}
+
+    client -> server  {"type": "ping", "id": "9"}
+    server -> client  {"type": "pong", "id": "9"}
+
+    server -> client  {"type": "heartbeat", "status": "healthy", "time": 1700000000.0}
+
+Interim messages carry speech transcripts still being spoken (see interim.py).
+Replies echo the request ``id`` so clients can match responses to requests.
+The server sends a heartbeat whenever the connection has been idle for
+``heartbeat_interval`` seconds, which replaces polling /api/health.
+"""
+
+import json
+import time
+from typing import Any, Callable, Dict, Optional
+
+HEARTBEAT_INTERVAL = 25.0
+
+
+class SessionProtocol:
+    """Message handling for one session connection, independent of the transport."""
+
+    def __init__(self, evaluate: Callable[[Any], Dict[str, Any]], heartbeat_interval: float = HEARTBEAT_INTERVAL,
+                 interim: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None):
+        # evaluate(item) returns the result or error fields for one command item,
+        # interim(message) those of one interim transcript
+        self.evaluate = evaluate
+        self.interim = interim
+        self.heartbeat_interval = heartbeat_interval
+
+    def handle_message(self, message: str) -> Dict[str, Any]:
+        """Return the reply for one client message."""
+        try:
+            data = json.loads(message)
+        except ValueError:
+            return {'type': 'error', 'error': 'Invalid JSON message'}
+        if not isinstance(data, dict):
+            return {'type': 'error', 'error': 'Invalid JSON message'}
+
+        request_id = data.get('id')
+        kind = data.get('type', 'calculate')
+        if kind == 'ping':
+            reply = {'type': 'pong'}
+        elif kind == 'calculate':
+            entry = self.evaluate(data)
+            reply = {'type': 'error' if 'error' in entry else 'result', **entry}
+        elif kind == 'interim' and self.interim is not None:
+            entry = self.interim(data)
+            reply = {'type': 'error' if 'error' in entry else 'interim', **entry}
+        else:
+            reply = {'type': 'error', 'error': f'Unknown message type: {kind}'}
+        if request_id is not None:
+            reply['id'] = request_id
+        return reply
+
+    def heartbeat(self) -> Dict[str, Any]:
+        """Return the idle heartbeat message."""
+        return {'type': 'heartbeat', 'status': 'healthy', 'time': time.time()}
+
+    def serve(self, ws) -> None:
+        """Serve a connection until the client closes it.
+
+        ws needs receive(timeout) returning None on timeout, and send(text),
+        as provided by simple-websocket and flask-sock.
+        """
+        while True:
+            message: Optional[str] = ws.receive(timeout=self.heartbeat_interval)
+            if message is None:
+                reply = self.heartbeat()
+            else:
+                if isinstance(message, bytes):
+                    message = message.decode('utf-8', 'replace')
+                reply = self.handle_message(message)
+            ws.send(json.dumps(reply))
@@ -10,8 +10,12 @@ document.addEventListener('DOMContentLoaded', () => {
     // Check for browser compatibility
     checkBrowserCompatibility();
 
-    // Check server connectivity
-    checkServerConnectivity();
+    // Open the calculation session; its heartbeats replace health polling
+    connectSession();
+
+    // Answer simple commands in the browser once the grammar has loaded
+    calculator.loadGrammar();
+    calculator.loadLocales();
 
     // Initialize modules
     // Note: These are already initialized in their respective files
@@ -110,6 +114,45 @@ function setupGlobalEventListeners() {
     });
 }
 
+/**
+ * Connect the persistent calculation session, falling back to a one-off
+ * health check when WebSockets are unavailable or the session drops
+ */
+function connectSession() {
+    const session = calculator.session;
+    let wasConnected = false;
+    let checkedOverHttp = false;
+
+    if (!('WebSocket' in window)) {
+        checkServerConnectivity();
+        return;
+    }
+
+    session.onopen = () => {
+        if (!wasConnected) {
+            ui.showToast('Connected to server successfully', 'success');
+        }
+        wasConnected = true;
+    };
+
+    session.onheartbeat = (message) => {
+        console.log('Server heartbeat:', message.status);
+    };
+
+    session.onclose = () => {
+        if (wasConnected) {
+            ui.showToast('Lost live connection to the server, reconnecting...', 'warning');
+            wasConnected = false;
+        } else if (!checkedOverHttp) {
+            // The session never opened: check the server over HTTP instead
+            checkedOverHttp = true;
+            checkServerConnectivity();
+        }
+    };
+
+    session.connect();
+}
+
 /**
  * Check server connectivity
  */
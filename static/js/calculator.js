@@ -3,10 +3,493 @@
  * Handles calculation logic and API communication
  */
 
+class SessionChannel {
+    /**
+     * Long-lived WebSocket carrying calculate requests and server heartbeats.
+     * Replies are matched to requests by id. While disconnected, callers fall
+     * back to the POST API.
+     * @param {string} url - WebSocket URL of the session endpoint
+     */
+    constructor(url) {
+        this.url = url;
+        this.socket = null;
+        this.nextId = 1;
+        this.pending = new Map();
+        this.reconnectDelay = 1000;
+        this.maxReconnectDelay = 30000;
+        // The server sends a heartbeat every 25 seconds when idle
+        this.heartbeatTimeout = 60000;
+        this.heartbeatTimer = null;
+        this.onopen = null;
+        this.onclose = null;
+        this.onheartbeat = null;
+    }
+
+    /**
+     * Whether requests can currently be sent over the session
+     */
+    get connected() {
+        return this.socket !== null && this.socket.readyState === WebSocket.OPEN;
+    }
+
+    /**
+     * Open the session, reconnecting with backoff whenever it drops
+     */
+    connect() {
+        if (!('WebSocket' in window)) {
+            return;
+        }
+
+        const socket = new WebSocket(this.url);
+        this.socket = socket;
+
+        socket.addEventListener('open', () => {
+            console.log('Session connected');
+            this.reconnectDelay = 1000;
+            this.resetHeartbeatTimer();
+            if (this.onopen) this.onopen();
+        });
+
+        socket.addEventListener('message', (event) => {
+            this.resetHeartbeatTimer();
+            let message;
+            try {
+                message = JSON.parse(event.data);
+            } catch (e) {
+                console.error('Invalid session message:', event.data);
+                return;
+            }
+
+            if (message.type === 'heartbeat') {
+                if (this.onheartbeat) this.onheartbeat(message);
+                return;
+            }
+
+            const request = this.pending.get(message.id);
+            if (request) {
+                this.pending.delete(message.id);
+                clearTimeout(request.timeoutId);
+                request.resolve(message);
+            }
+        });
+
+        socket.addEventListener('close', () => {
+            if (this.socket !== socket) {
+                return;
+            }
+            console.log(`Session closed, reconnecting in ${this.reconnectDelay} ms`);
+            this.socket = null;
+            clearTimeout(this.heartbeatTimer);
+            this.failPending(new Error('Session closed'));
+            if (this.onclose) this.onclose();
+
+            setTimeout(() => this.connect(), this.reconnectDelay);
+            this.reconnectDelay = Math.min(this.reconnectDelay * 2, this.maxReconnectDelay);
+        });
+    }
+
+    /**
+     * Close the socket if the server has gone quiet for too long
+     */
+    resetHeartbeatTimer() {
+        clearTimeout(this.heartbeatTimer);
+        this.heartbeatTimer = setTimeout(() => {
+            console.warn('Session heartbeat missed');
+            if (this.socket) this.socket.close();
+        }, this.heartbeatTimeout);
+    }
+
+    /**
+     * Reject every request still waiting for a reply
+     * @param {Error} error - The rejection reason
+     */
+    failPending(error) {
+        for (const request of this.pending.values()) {
+            clearTimeout(request.timeoutId);
+            request.reject(error);
+        }
+        this.pending.clear();
+    }
+
+    /**
+     * Send a command and wait for its tagged reply
+     * @param {string} command - The voice command to evaluate
+     * @param {Object} fields - Extra request fields, such as the history session
+     * @param {number} timeout - Milliseconds to wait for the reply
+     * @returns {Promise<Object>} The result or error message
+     */
+    calculate(command, fields = {}, timeout = 10000) {
+        return this.request('calculate', { ...fields, command }, timeout);
+    }
+
+    /**
+     * Send a transcript that is still being spoken for a provisional result
+     * @param {string} utterance - ID shared by the transcripts of one utterance
+     * @param {string} transcript - The transcript so far
+     * @param {string|null} locale - Locale of the transcript, null for the server's default
+     * @param {number} timeout - Milliseconds to wait for the reply
+     * @returns {Promise<Object>} The interim reply or error message
+     */
+    interim(utterance, transcript, locale = null, timeout = 5000) {
+        return this.request('interim', { utterance, transcript, locale }, timeout);
+    }
+
+    /**
+     * Send a message and wait for its tagged reply
+     * @param {string} type - The message type
+     * @param {Object} fields - The message fields
+     * @param {number} timeout - Milliseconds to wait for the reply
+     * @returns {Promise<Object>} The reply
+     */
+    request(type, fields, timeout) {
+        const id = String(this.nextId++);
+        return new Promise((resolve, reject) => {
+            const timeoutId = setTimeout(() => {
+                this.pending.delete(id);
+                reject(new Error('Request timed out. The server took too long to respond.'));
+            }, timeout);
+            this.pending.set(id, { resolve, reject, timeoutId });
+            this.socket.send(JSON.stringify({ ...fields, type, id }));
+        });
+    }
+}
+
+// Commands made only of these characters are lowercased and split the same
+// way in Python and JavaScript
+const LOCAL_COMMAND_CHARACTERS = /^[\x20-\x7e\t\n\v\f\r√∛]*$/;
+const LOCAL_NUMERAL = /^[+-]?\d+$/;
+// Outside this range Python and JavaScript write numbers differently
+// (exponents, integer precision), so such results come from the server
+const LOCAL_MAX_MAGNITUDE = 1e15;
+const LOCAL_MIN_MAGNITUDE = 1e-4;
+
+/**
+ * Write a number with a fixed number of decimals as Python's format() does:
+ * exact ties round to even, where toFixed() rounds them away from zero
+ * @param {number} x - The number
+ * @param {number} decimals - Digits after the decimal point
+ * @returns {string} The formatted number
+ */
+function pythonFixed(x, decimals) {
+    const sign = x < 0 || Object.is(x, -0) ? '-' : '';
+    const magnitude = Math.abs(x);
+    // Only odd multiples of 2^-(decimals + 1) lie exactly halfway
+    const halves = magnitude * 2 ** (decimals + 1);
+    if (Number.isInteger(halves) && halves % 2 === 1) {
+        const lower = Math.floor(magnitude * 10 ** decimals);
+        const even = lower % 2 === 0 ? lower : lower + 1;
+        return sign + (even / 10 ** decimals).toFixed(decimals);
+    }
+    return sign + magnitude.toFixed(decimals);
+}
+
+/**
+ * Write a float as Python's str() does (within the local magnitude range)
+ * @param {number} x - The number
+ * @returns {string} The formatted number
+ */
+function pythonFloat(x) {
+    if (Number.isInteger(x)) {
+        return (Object.is(x, -0) ? '-0' : String(x)) + '.0';
+    }
+    return String(x);
+}
+
+/**
+ * Write a number as the parser's _format_number() does: whole numbers without .0
+ * @param {number} x - The number
+ * @returns {string} The formatted number
+ */
+function pythonNumber(x) {
+    return Number.isInteger(x) ? String(x + 0) : String(x);
+}
+
+class LocalEvaluator {
+    /**
+     * Answers simple commands in the browser exactly as the server would,
+     * using the grammar the server exports at /api/grammar. evaluate()
+     * returns null for anything it does not cover, and those commands go to
+     * the server.
+     * @param {Object} grammar - The parser grammar
+     */
+    constructor(grammar) {
+        this.grammar = grammar;
+        this.version = grammar.version;
+
+        // raw word -> canonical token, with null marking filler words
+        this.canonical = new Map(Object.entries(grammar.symbols));
+        for (const word of grammar.filler) {
+            this.canonical.set(word, null);
+        }
+
+        // keyword -> dispatch priority; pair-only words rank below every operation
+        this.noMatch = grammar.dispatch.length;
+        this.priorities = new Map();
+        for (const [, words] of grammar.pairs) {
+            for (const word of words) this.priorities.set(word, this.noMatch);
+        }
+        grammar.dispatch.forEach(([, words], priority) => {
+            for (const word of words) this.priorities.set(word, priority);
+        });
+        this.pairs = grammar.pairs.map(([operation, words]) =>
+            [grammar.dispatch.findIndex(([name]) => name === operation), words]);
+
+        this.operators = new Set(grammar.operators);
+        // Any other word (a number word, a misheard keyword) goes to the server
+        this.words = new Set([
+            ...this.canonical.keys(), ...Object.values(grammar.symbols),
+            ...this.priorities.keys(), ...grammar.connectives,
+        ]);
+        for (const forms of Object.values(grammar.operands)) {
+            for (const [phrases, [xWord], [yWord]] of forms) {
+                for (const phrase of phrases) phrase.split(' ').forEach(word => this.words.add(word));
+                this.words.add(xWord).add(yWord);
+            }
+        }
+    }
+
+    /**
+     * Evaluate a command locally
+     * @param {string} command - The voice command
+     * @returns {Object|null} The result, as the API would return it, or null
+     */
+    evaluate(command) {
+        command = command.trim();
+        // As the server cleans commands: thousands separators are dropped, other commas
+        // separate words, and only decimal points are kept
+        const cleaned = command.toLowerCase().replace(/\?/g, '').replace(/(?<=\d),(?=\d{3}(?!\d))/g, '')
+            .replace(/,/g, ' ').replace(/(?<!\d)\.|\.(?!\d)/g, '');
+        if (!LOCAL_COMMAND_CHARACTERS.test(cleaned) ||
+            this.grammar.server_phrases.some(phrase => cleaned.includes(phrase))) {
+            return null;
+        }
+
+        const tokens = [];
+        for (const word of cleaned.split(/\s+/)) {
+            if (word === '') continue;
+            if (this.canonical.has(word)) {
+                const token = this.canonical.get(word);
+                if (token !== null) tokens.push(token);
+            } else if (this.words.has(word) || LOCAL_NUMERAL.test(word)) {
+                tokens.push(word);
+            } else {
+                return null;
+            }
+        }
+
+        // Several operators go through the server's expression compiler
+        if (tokens.length > 3 && tokens.filter(token => this.operators.has(token)).length > 1) {
+            return null;
+        }
+
+        const operation = this.dispatch(tokens);
+        const operands = operation && this.operands(operation, tokens);
+        if (!operands || !operands.every(x => this.representable(x))) {
+            return null;
+        }
+        const result = this.calculate(operation, operands);
+        if (result === null || (typeof result === 'number' && !this.representable(result))) {
+            return null;
+        }
+        return { command, result, history_entry: this.historyEntry(operation, operands, result) };
+    }
+
+    /**
+     * Pick the operation for a command: the keyword listed first wins
+     * @param {string[]} tokens - Canonical tokens
+     * @returns {string|null} The operation name
+     */
+    dispatch(tokens) {
+        const hits = new Set(tokens.filter(token => this.priorities.has(token)));
+        let best = this.noMatch;
+        for (const hit of hits) {
+            best = Math.min(best, this.priorities.get(hit));
+        }
+        for (const [priority, [first, second]] of this.pairs) {
+            if (priority < best && hits.has(first) && hits.has(second)) {
+                best = priority;
+            }
+        }
+        return best < this.noMatch ? this.grammar.dispatch[best][0] : null;
+    }
+
+    /**
+     * Read an operation's operands from the tokens
+     * @param {string} operation - The operation name
+     * @param {string[]} tokens - Canonical tokens
+     * @returns {number[]|null} The operands, or null if the server must decide
+     */
+    operands(operation, tokens) {
+        const number = (index) => (index >= 0 && index < tokens.length && LOCAL_NUMERAL.test(tokens[index]) ?
+            Number(tokens[index]) : null);
+
+        const forms = this.grammar.operands[operation];
+        if (forms) {
+            const joined = tokens.join(' ');
+            for (const [phrases, [xWord, xOffset], [yWord, yOffset]] of forms) {
+                if (phrases.every(phrase => (phrase.includes(' ') ? joined.includes(phrase) : tokens.includes(phrase)))) {
+                    const xIndex = tokens.indexOf(xWord);
+                    const yIndex = tokens.indexOf(yWord);
+                    if (xIndex < 0 || yIndex < 0) return null;
+                    const x = number(xIndex + xOffset);
+                    const y = number(yIndex + yOffset);
+                    return x === null || y === null ? null : [x, y];
+                }
+            }
+            return null;
+        }
+
+        const keywords = this.grammar.operand_after[operation];
+        if (keywords) {
+            const keyword = keywords.find(word => tokens.includes(word));
+            const start = tokens.indexOf(keyword);
+            for (let i = start + 1; start >= 0 && i < tokens.length; i++) {
+                if (LOCAL_NUMERAL.test(tokens[i])) return [Number(tokens[i])];
+            }
+        }
+        return null;
+    }
+
+    /**
+     * Compute an operation as the server's Calculator does
+     * @param {string} operation - The operation name
+     * @param {number[]} operands - Its operands
+     * @returns {number|string|null} The result, an error message, or null if not covered
+     */
+    calculate(operation, [x, y]) {
+        const round = value => Number(pythonFixed(value, this.grammar.decimals));
+        switch (operation) {
+            case 'addition': return x + y;
+            case 'subtraction': return x - y;
+            case 'multiplication': return x * y;
+            case 'division': return y === 0 ? this.grammar.errors.division : round(x / y);
+            case 'exponentiation': {
+                const power = x ** y;
+                return Number.isFinite(power) ? round(power) : null;
+            }
+            case 'square_root': return x < 0 ? this.grammar.errors.square_root : round(Math.sqrt(x));
+            default: return null;
+        }
+    }
+
+    /**
+     * Write the history entry from the operation's template
+     * @param {string} operation - The operation name
+     * @param {number[]} operands - Its operands
+     * @param {number|string} result - Its result or error message
+     * @returns {string} The history entry
+     */
+    historyEntry(operation, operands, result) {
+        const { template, result: style } = this.grammar.history[operation];
+        let written;
+        if (typeof result === 'string') {
+            written = result;
+        } else if (style === 'fixed') {
+            written = pythonFixed(result, this.grammar.decimals);
+        } else if (style === 'repr') {
+            written = pythonFloat(result);
+        } else {
+            written = pythonNumber(result);
+        }
+        const parts = template.split('{}');
+        const filled = parts.slice(1).reduce((text, part, i) => text + pythonNumber(operands[i]) + part, parts[0]);
+        return filled.replace('{result}', written);
+    }
+
+    /**
+     * Whether Python and JavaScript write a number the same way
+     * @param {number} x - The number
+     * @returns {boolean}
+     */
+    representable(x) {
+        const magnitude = Math.abs(x);
+        return Number.isFinite(x) && magnitude < LOCAL_MAX_MAGNITUDE &&
+            (magnitude === 0 || magnitude >= LOCAL_MIN_MAGNITUDE);
+    }
+}
+
 class Calculator {
     constructor() {
         // API endpoint - use absolute URL to avoid path issues
         this.apiUrl = window.location.origin + '/api/calculate';
+
+        // Answers simple commands without a round trip once the grammar has loaded
+        this.localEvaluator = null;
+
+        // Persistent session, used instead of the POST API while connected
+        const sessionProtocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+        this.session = new SessionChannel(`${sessionProtocol}//${window.location.host}/api/session`);
+
+        // Only the reply to the latest interim transcript is shown
+        this.interimSequence = 0;
+
+        // Language codes the server has vocabularies for, once loaded
+        this.locales = null;
+        this.defaultLocale = 'en';
+    }
+
+    /**
+     * The locale sent with commands: the recognition language if the server
+     * understands it, otherwise null for the server's default
+     */
+    get locale() {
+        const language = appSettings.getSetting('language');
+        const code = language.split('-')[0].toLowerCase();
+        return this.locales && this.locales.includes(code) ? language : null;
+    }
+
+    /**
+     * The local evaluator, if it speaks the language commands are sent in
+     */
+    get evaluator() {
+        const locale = this.locale;
+        if (locale && locale.split('-')[0].toLowerCase() !== this.defaultLocale) {
+            return null;
+        }
+        return this.localEvaluator;
+    }
+
+    /**
+     * Show a provisional result for a transcript that is still being spoken
+     * @param {string} utterance - ID shared by the transcripts of one utterance
+     * @param {string} transcript - The transcript so far
+     */
+    async previewInterim(utterance, transcript) {
+        const sequence = ++this.interimSequence;
+        const evaluator = this.evaluator;
+        const locale = this.locale;
+        let data = evaluator ? evaluator.evaluate(transcript) : null;
+        if (!data) {
+            try {
+                if (this.session.connected) {
+                    data = await this.session.interim(utterance, transcript, locale);
+                } else {
+                    const response = await fetch(window.location.origin + '/api/interim', {
+                        method: 'POST',
+                        headers: { 'Content-Type': 'application/json' },
+                        body: JSON.stringify({ utterance, transcript, locale })
+                    });
+                    data = await response.json();
+                }
+            } catch (error) {
+                // Previews are best effort; the final transcript is still calculated
+                return;
+            }
+            if (!data.complete) {
+                data = null;
+            }
+        }
+
+        if (sequence === this.interimSequence) {
+            ui.updateCommandDisplay(data ? `${transcript} = ${this.formatResult(data.result)}` : transcript);
+        }
+    }
+
+    /**
+     * Stop showing interim previews; replies still in flight are ignored
+     */
+    endInterim() {
+        this.interimSequence++;
     }
 
     /**
@@ -20,10 +503,40 @@ class Calculator {
 
             // Log the command being processed
             console.log('Processing command:', command);
+
+            const evaluator = this.evaluator;
+            const locale = this.locale;
+            const local = evaluator ? evaluator.evaluate(command) : null;
+            if (local) {
+                this.displayResult(local);
+                ui.recordHistory(local);
+                return;
+            }
+
+            if (this.session.connected) {
+                let data = null;
+                try {
+                    data = await this.session.calculate(command, { session: ui.historySession, locale });
+                } catch (sessionError) {
+                    // Fall back to the POST API below
+                    console.warn('Session request failed, using HTTP:', sessionError);
+                }
+
+                if (data) {
+                    if (data.error) {
+                        ui.showError(data.error);
+                        speech.speak(data.error);
+                        return;
+                    }
+                    this.displayResult(data);
+                    return;
+                }
+            }
+
             console.log('API URL:', this.apiUrl);
 
             // Create request payload
-            const payload = { command };
+            const payload = { command, session: ui.historySession, locale };
             console.log('Request payload:', payload);
 
             // Send command to API with timeout
@@ -98,6 +611,42 @@ class Calculator {
         }
     }
 
+    /**
+     * Load the parser grammar so simple commands can be answered locally
+     */
+    async loadGrammar() {
+        try {
+            // Revalidated against the grammar version (ETag) on every page load
+            const response = await fetch(window.location.origin + '/api/grammar', { cache: 'no-cache' });
+            if (!response.ok) {
+                throw new Error(`Server responded with status: ${response.status}`);
+            }
+            this.localEvaluator = new LocalEvaluator(await response.json());
+            console.log('Local evaluation enabled, grammar', this.localEvaluator.version);
+        } catch (error) {
+            // Every command goes to the server instead
+            console.warn('Grammar unavailable:', error);
+        }
+    }
+
+    /**
+     * Load the locales the server has vocabularies for
+     */
+    async loadLocales() {
+        try {
+            const response = await fetch(window.location.origin + '/api/locales');
+            if (!response.ok) {
+                throw new Error(`Server responded with status: ${response.status}`);
+            }
+            const data = await response.json();
+            this.locales = data.locales;
+            this.defaultLocale = data.default;
+        } catch (error) {
+            // Commands are sent without a locale and read in the server's default
+            console.warn('Locales unavailable:', error);
+        }
+    }
+
     /**
      * Display calculation result
      * @param {Object} data - The calculation result data
@@ -105,21 +654,8 @@ class Calculator {
     displayResult(data) {
         const { result, history_entry } = data;
 
-        // Format result for display
-        let displayResult;
-        if (typeof result === 'string') {
-            // Error message or text result
-            displayResult = result;
-        } else if (Number.isInteger(result)) {
-            // Integer result
-            displayResult = result;
-        } else {
-            // Float result - format to 2 decimal places if needed
-            displayResult = Math.abs(result) < 0.01 ? result.toExponential(2) : result.toFixed(2);
-        }
-
         // Update UI
-        ui.updateResultDisplay(displayResult);
+        ui.updateResultDisplay(this.formatResult(result));
         ui.showSuccess();
 
         // Add to history if there's a valid history entry
@@ -131,6 +667,23 @@ class Calculator {
         this.speakResult(result);
     }
 
+    /**
+     * Format a result for display
+     * @param {string|number} result - The result or an error message
+     * @returns {string|number} The displayed result
+     */
+    formatResult(result) {
+        if (typeof result === 'string') {
+            // Error message or text result
+            return result;
+        } else if (Number.isInteger(result)) {
+            // Integer result
+            return result;
+        }
+        // Float result - format to 2 decimal places if needed
+        return Math.abs(result) < 0.01 ? result.toExponential(2) : result.toFixed(2);
+    }
+
     /**
      * Check server connectivity
      */
@@ -10,6 +10,9 @@ class Speech {
         
         // State
         this.isListening = false;
+        // Groups the interim transcripts of one utterance on the server
+        this.utteranceId = null;
+        this.utteranceCount = 0;
         
         // Elements
         this.micButton = document.getElementById('mic-btn');
@@ -32,7 +35,8 @@ class Speech {
         
         this.recognition = new SpeechRecognition();
         this.recognition.continuous = false;
-        this.recognition.interimResults = false;
+        // Interim transcripts get provisional results while the user speaks
+        this.recognition.interimResults = true;
         
         // Set language from settings
         this.recognition.lang = appSettings.getSetting('language');
@@ -111,6 +115,7 @@ class Speech {
      */
     handleRecognitionStart() {
         this.isListening = true;
+        this.utteranceId = `${Date.now().toString(36)}-${++this.utteranceCount}`;
         this.micButton.classList.add('listening');
         this.voiceVisualization.classList.add('active');
         ui.updateCommandDisplay('Listening...');
@@ -121,6 +126,17 @@ class Speech {
      * @param {SpeechRecognitionEvent} event - The recognition event
      */
     handleRecognitionResult(event) {
+        if (event.results.length > 0 && !event.results[0].isFinal) {
+            // Interim transcripts carry no usable confidence, so they are only previewed
+            if (typeof calculator !== 'undefined') {
+                calculator.previewInterim(this.utteranceId, event.results[0][0].transcript);
+            }
+            return;
+        }
+
+        if (typeof calculator !== 'undefined') {
+            calculator.endInterim();
+        }
         if (event.results.length > 0) {
             const result = event.results[0][0];
             const command = result.transcript;
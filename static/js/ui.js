@@ -38,6 +38,19 @@ class UI {
         this.commandDisplay = document.getElementById('command-display');
         this.resultDisplay = document.getElementById('result-display');
         this.historyList = document.getElementById('history-list');
+        this.historyPager = document.getElementById('history-pager');
+        this.historyNewerBtn = document.getElementById('history-newer');
+        this.historyOlderBtn = document.getElementById('history-older');
+        this.historyPageInfo = document.getElementById('history-page-info');
+
+        // Server-side history: one page is shown at a time
+        this.historySession = this.getHistorySession();
+        this.serverHistory = false;
+        this.historyPageSize = 20;
+        this.historyCursor = null; // null shows the newest page
+        this.historyNextCursor = null;
+        this.historyCursorStack = [];
+        this.historyTotal = 0;
 
         // Example commands
         this.exampleCommands = document.querySelectorAll('.example-commands li');
@@ -81,6 +94,17 @@ class UI {
             this.clearHistory();
         });
 
+        // History paging
+        this.historyNewerBtn.addEventListener('click', () => {
+            this.loadHistoryPage(this.historyCursorStack.pop() ?? null);
+        });
+        this.historyOlderBtn.addEventListener('click', () => {
+            if (this.historyNextCursor !== null) {
+                this.historyCursorStack.push(this.historyCursor);
+                this.loadHistoryPage(this.historyNextCursor);
+            }
+        });
+
         // Example commands
         this.exampleCommands.forEach(command => {
             command.addEventListener('click', () => {
@@ -223,17 +247,26 @@ class UI {
     }
 
     /**
-     * Add an entry to the calculation history
-     * @param {string} entry - The history entry to add
+     * Return this browser's history session ID, creating one if needed
+     * @returns {string} The session ID
      */
-    addToHistory(entry) {
-        // Remove empty history message if present
-        const emptyHistory = this.historyList.querySelector('.empty-history');
-        if (emptyHistory) {
-            this.historyList.removeChild(emptyHistory);
+    getHistorySession() {
+        let session = localStorage.getItem('vocalcalc-session');
+        if (!session) {
+            session = window.crypto && crypto.randomUUID ?
+                crypto.randomUUID() :
+                Array.from({ length: 32 }, () => Math.floor(Math.random() * 16).toString(16)).join('');
+            localStorage.setItem('vocalcalc-session', session);
         }
+        return session;
+    }
 
-        // Create history item
+    /**
+     * Create the element for one history entry
+     * @param {string} entry - The history entry text
+     * @returns {HTMLElement} The history item
+     */
+    createHistoryItem(entry) {
         const historyItem = document.createElement('div');
         historyItem.className = 'history-item';
         historyItem.textContent = entry;
@@ -248,23 +281,79 @@ class UI {
             }
         });
 
+        return historyItem;
+    }
+
+    /**
+     * Add an entry to the calculation history
+     * @param {string} entry - The history entry to add
+     */
+    addToHistory(entry) {
+        if (this.serverHistory && this.historyCursor !== null) {
+            // The server recorded the entry; it appears on the newest page
+            return;
+        }
+
+        // Remove empty history message if present
+        const emptyHistory = this.historyList.querySelector('.empty-history');
+        if (emptyHistory) {
+            this.historyList.removeChild(emptyHistory);
+        }
+
         // Add to history list (at the beginning)
-        this.historyList.insertBefore(historyItem, this.historyList.firstChild);
+        this.historyList.insertBefore(this.createHistoryItem(entry), this.historyList.firstChild);
 
-        // Limit history to 20 items
+        // Keep at most one page of items
         const historyItems = this.historyList.querySelectorAll('.history-item');
-        if (historyItems.length > 20) {
+        if (historyItems.length > this.historyPageSize) {
             this.historyList.removeChild(historyItems[historyItems.length - 1]);
         }
 
+        if (this.serverHistory) {
+            // The newest page now starts one entry later
+            this.historyTotal += 1;
+            this.historyNextCursor = this.historyTotal > this.historyPageSize ?
+                this.historyTotal - this.historyPageSize : null;
+            this.updateHistoryPager(this.historyTotal);
+        }
+
         // Save history to localStorage
         this.saveHistory();
     }
 
+    /**
+     * Store a calculation the browser evaluated itself in the server-side history
+     * @param {Object} data - The command, result and history entry
+     */
+    recordHistory(data) {
+        if (!this.serverHistory || !data.history_entry) {
+            return;
+        }
+        fetch(`${window.location.origin}/api/history/${this.historySession}`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ command: data.command, result: data.result, history_entry: data.history_entry }),
+            keepalive: true
+        }).catch(error => console.error('Failed to record history:', error));
+    }
+
     /**
      * Clear the calculation history
      */
-    clearHistory() {
+    async clearHistory() {
+        if (this.serverHistory) {
+            try {
+                await fetch(`${window.location.origin}/api/history/${this.historySession}`, { method: 'DELETE' });
+            } catch (error) {
+                console.error('Failed to clear server history:', error);
+            }
+            this.historyCursor = null;
+            this.historyNextCursor = null;
+            this.historyCursorStack = [];
+            this.historyTotal = 0;
+            this.updateHistoryPager(0);
+        }
+
         // Clear history list
         this.historyList.innerHTML = '<p class="empty-history">No calculations yet.</p>';
 
@@ -273,47 +362,95 @@ class UI {
     }
 
     /**
-     * Save history to localStorage
+     * Save history to localStorage (only when the server does not keep it)
      */
     saveHistory() {
+        if (this.serverHistory) {
+            return;
+        }
         const historyItems = this.historyList.querySelectorAll('.history-item');
         const history = Array.from(historyItems).map(item => item.textContent);
         localStorage.setItem('vocalcalc-history', JSON.stringify(history));
     }
 
     /**
-     * Load history from localStorage
+     * Load history from the server, falling back to localStorage
      */
-    loadHistory() {
+    async loadHistory() {
+        if (await this.loadHistoryPage(null)) {
+            // The server keeps the history from now on
+            localStorage.removeItem('vocalcalc-history');
+            return;
+        }
+
         const savedHistory = localStorage.getItem('vocalcalc-history');
         if (savedHistory) {
             const history = JSON.parse(savedHistory);
+            this.renderHistory(history);
+        }
+    }
 
-            // Clear current history
-            this.historyList.innerHTML = '';
-
-            // Add history items
-            if (history.length > 0) {
-                history.forEach(entry => {
-                    const historyItem = document.createElement('div');
-                    historyItem.className = 'history-item';
-                    historyItem.textContent = entry;
-
-                    // Add click event to reuse the calculation
-                    historyItem.addEventListener('click', () => {
-                        // Extract the calculation from the history entry
-                        const parts = entry.split('=');
-                        if (parts.length >= 2) {
-                            const calculation = parts[0].trim();
-                            this.simulateCommand(calculation);
-                        }
-                    });
-
-                    this.historyList.appendChild(historyItem);
-                });
-            } else {
-                this.historyList.innerHTML = '<p class="empty-history">No calculations yet.</p>';
+    /**
+     * Load one page of server-side history
+     * @param {number|null} cursor - Show entries before this sequence number, or the newest page if null
+     * @returns {Promise<boolean>} Whether the server returned the page
+     */
+    async loadHistoryPage(cursor) {
+        const params = new URLSearchParams({ limit: this.historyPageSize });
+        if (cursor !== null) {
+            params.set('before', cursor);
+        }
+
+        try {
+            const response = await fetch(`${window.location.origin}/api/history/${this.historySession}?${params}`);
+            if (!response.ok) {
+                return false;
             }
+            const data = await response.json();
+
+            this.serverHistory = true;
+            this.historyCursor = cursor;
+            this.historyNextCursor = data.next_cursor;
+            this.historyTotal = data.total;
+            this.renderHistory(data.entries.map(record => record.history_entry));
+            this.updateHistoryPager(data.total);
+            return true;
+        } catch (error) {
+            console.error('Failed to load server history:', error);
+            return false;
+        }
+    }
+
+    /**
+     * Replace the history list with the given entries
+     * @param {string[]} history - History entries, newest first
+     */
+    renderHistory(history) {
+        // Clear current history
+        this.historyList.innerHTML = '';
+
+        // Add history items
+        if (history.length > 0) {
+            history.forEach(entry => {
+                this.historyList.appendChild(this.createHistoryItem(entry));
+            });
+        } else {
+            this.historyList.innerHTML = '<p class="empty-history">No calculations yet.</p>';
+        }
+    }
+
+    /**
+     * Show or hide the history paging controls
+     * @param {number} [total] - Total number of entries on the server
+     */
+    updateHistoryPager(total) {
+        const hasNewer = this.historyCursor !== null;
+        const hasOlder = this.historyNextCursor !== null;
+        this.historyPager.hidden = !this.serverHistory || (!hasNewer && !hasOlder);
+        this.historyNewerBtn.disabled = !hasNewer;
+        this.historyOlderBtn.disabled = !hasOlder;
+        if (total !== undefined) {
+            this.historyPageInfo.textContent = `${total} calculation${total === 1 ? '' : 's'}`;
         }
     }
 
@@ -0,0 +1,238 @@
+"""
+Single-pass statistics over streams of numbers.
+
+RunningStats keeps the count, sum, mean, variance, minimum and maximum of
+the values seen so far, updating the mean and the sum of squared
+deviations with Welford's method so the variance stays accurate for large
+values. QuantileSketch estimates one quantile with the P² algorithm (Jain
+and Chlamtac, 1985): five markers whose heights follow the minimum, the
+quantile, the maximum and the points halfway between them, adjusted by
+piecewise-parabolic interpolation as values arrive.
+
+Summary combines them for a list of values. It keeps the first
+EXACT_LIMIT values, so spoken lists get exactly the median a sorted list
+would give, and switches to sketches seeded from them beyond that. Memory
+is constant however many values are added, and values are consumed as they
+arrive, so an upload is summarized while it is still being read.
+"""
+
+import math
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+# Values a Summary keeps before estimating its quantiles
+EXACT_LIMIT = 1000
+
+# Percentiles reported for an upload when none are requested
+DEFAULT_PERCENTILES = (25.0, 50.0, 75.0, 90.0, 95.0, 99.0)
+
+# Longest number accepted in an upload, in bytes; far more than any float needs
+MAX_NUMBER_LENGTH = 64
+
+# Separators between uploaded numbers: whitespace, commas and semicolons
+_SEPARATORS = re.compile(rb"[\s,;]+")
+
+
+class RunningStats:
+    """Count, sum, mean, variance and range of a stream, in constant memory."""
+
+    __slots__ = ("count", "total", "mean", "_m2", "minimum", "maximum")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        # Sum of squared deviations from the running mean
+        self._m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        self.total += x
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        if x < self.minimum:
+            self.minimum = x
+        if x > self.maximum:
+            self.maximum = x
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Sample variance (divided by count - 1), None for fewer than two values."""
+        return self._m2 / (self.count - 1) if self.count > 1 else None
+
+    @property
+    def standard_deviation(self) -> Optional[float]:
+        variance = self.variance
+        return math.sqrt(variance) if variance is not None else None
+
+
+class QuantileSketch:
+    """P² estimate of the q-quantile (0 < q < 1) of a stream, seeded from sorted values."""
+
+    __slots__ = ("q", "heights", "positions", "desired", "increments")
+
+    def __init__(self, q: float, seed: Sequence[float]):
+        """seed holds at least five values in ascending order."""
+        if not 0 < q < 1:
+            raise ValueError("Quantile must be between 0 and 1")
+        n = len(seed)
+        if n < 5:
+            raise ValueError("A quantile sketch needs at least five values")
+        self.q = q
+        self.increments = (0.0, q / 2, q, (1 + q) / 2, 1.0)
+        self.desired = [1 + (n - 1) * d for d in self.increments]
+        # Marker i sits at rank positions[i] (1-based); ranks stay strictly increasing
+        positions = []
+        for i, desired in enumerate(self.desired):
+            rank = max(round(desired), positions[-1] + 1 if positions else 1)
+            positions.append(min(rank, n - (4 - i)))
+        self.positions = positions
+        self.heights = [seed[rank - 1] for rank in positions]
+
+    def add(self, x: float) -> None:
+        heights, positions = self.heights, self.positions
+        if x < heights[0]:
+            heights[0] = x
+            cell = 0
+        elif x >= heights[4]:
+            heights[4] = x
+            cell = 3
+        else:
+            cell = 0
+            while x >= heights[cell + 1]:
+                cell += 1
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        desired = self.desired
+        for i in range(5):
+            desired[i] += self.increments[i]
+
+        # Move the middle markers that are a rank or more from where they should be
+        for i in (1, 2, 3):
+            offset = desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or \
+                    (offset <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        h, n = self.heights, self.positions
+        return h[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (h[i] - h[i - 1]) / (n[i] - n[i - 1]))
+
+    @property
+    def estimate(self) -> float:
+        return self.heights[2]
+
+
+class Summary:
+    """Running statistics and quantiles of a stream of values.
+
+    quantiles lists the ones (between 0 and 1) that will be asked for once
+    more than exact_limit values have been added; up to then any quantile
+    is exact.
+    """
+
+    __slots__ = ("stats", "quantiles", "exact_limit", "_values", "_sketches")
+
+    def __init__(self, quantiles: Iterable[float] = (0.5,), exact_limit: int = EXACT_LIMIT):
+        self.stats = RunningStats()
+        self.quantiles = tuple(quantiles)
+        self.exact_limit = max(exact_limit, 5)
+        self._values: Optional[List[float]] = []
+        self._sketches: Dict[float, QuantileSketch] = {}
+
+    def add(self, x: float) -> None:
+        self.stats.add(x)
+        if self._values is None:
+            for sketch in self._sketches.values():
+                sketch.add(x)
+            return
+        self._values.append(x)
+        if len(self._values) > self.exact_limit:
+            # Seed a sketch for each quantile from the values so far, then let them go
+            seed = sorted(self._values)
+            self._sketches = {q: QuantileSketch(q, seed) for q in self.quantiles if 0 < q < 1}
+            self._values = None
+
+    def extend(self, values: Iterable[float]) -> "Summary":
+        for x in values:
+            self.add(x)
+        return self
+
+    @property
+    def exact(self) -> bool:
+        """Whether quantiles are still computed from every value."""
+        return self._values is not None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Return the q-quantile (0 <= q <= 1), interpolating between ranks; None if there are no values.
+
+        Past exact_limit values only the quantiles given to the constructor
+        (and 0 and 1, the minimum and maximum) are known; others raise KeyError.
+        """
+        stats = self.stats
+        if not stats.count:
+            return None
+        if q <= 0:
+            return stats.minimum
+        if q >= 1:
+            return stats.maximum
+        if self._values is None:
+            return self._sketches[q].estimate
+        ordered = sorted(self._values)
+        rank = (len(ordered) - 1) * q
+        low = math.floor(rank)
+        if low + 1 >= len(ordered):
+            return ordered[low]
+        return ordered[low] + (rank - low) * (ordered[low + 1] - ordered[low])
+
+    @property
+    def median(self) -> Optional[float]:
+        return self.quantile(0.5)
+
+
+def parse_numbers(chunks: Iterable[bytes]) -> Iterator[float]:
+    """Yield the numbers of a byte stream separated by whitespace, commas or semicolons.
+
+    A number split across chunks is joined back together. Raises
+    ValueError for anything that is not a finite number, including runs of
+    more than MAX_NUMBER_LENGTH bytes without a separator, so a stream
+    with none is not buffered whole.
+    """
+    pending = b""
+    for chunk in chunks:
+        parts = _SEPARATORS.split(pending + chunk)
+        # The last part may continue in the next chunk
+        pending = parts.pop()
+        if len(pending) > MAX_NUMBER_LENGTH:
+            raise _invalid(pending)
+        for part in parts:
+            if part:
+                yield _number(part)
+    if pending:
+        yield _number(pending)
+
+
+def _number(text: bytes) -> float:
+    if len(text) > MAX_NUMBER_LENGTH:
+        raise _invalid(text)
+    try:
+        value = float(text)
+    except ValueError:
+        value = math.nan
+    if not math.isfinite(value):
+        raise _invalid(text)
+    return value
+
+
+def _invalid(text: bytes) -> ValueError:
+    return ValueError(f"Invalid number: {text[:40].decode('utf-8', 'replace')}")
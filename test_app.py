@@ -37,6 +37,19 @@ class TestFlaskApp(unittest.TestCase):
         data = json.loads(response.data)
         self.assertEqual(data['result'], 'Invalid command')
 
+    def test_calculate_endpoint_correction(self):
+        """Test that misheard keywords are corrected and reported."""
+        response = self.app.post('/api/calculate',
+                                json={'command': 'what is 7 tims 6'})
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['result'], 42)
+        self.assertEqual(data['corrections'], [{'from': 'tims', 'to': 'times', 'confidence': 0.75}])
+
+        response = self.app.post('/api/calculate',
+                                json={'command': 'what is 7 times 6'})
+        self.assertNotIn('corrections', json.loads(response.data))
+
     def test_calculate_endpoint_missing_command(self):
         """Test the calculate endpoint with a missing command."""
         response = self.app.post('/api/calculate', json={})
@@ -60,6 +60,22 @@ class TestCalculatorFunctions(unittest.TestCase):
         self.assertEqual(self.calc.tangent(0), 0)
         self.assertEqual(self.calc.tangent(45), 1)
 
+    def test_exact_special_values(self):
+        self.assertEqual(self.calc.tangent(90), "Error: Tangent is undefined")
+        self.assertEqual(self.calc.tangent(-90), "Error: Tangent is undefined")
+        self.assertEqual(self.calc.tangent(270.0), "Error: Tangent is undefined")
+        self.assertEqual(str(self.calc.sine(360)), "0.0")
+        self.assertEqual(str(self.calc.cosine(270)), "0.0")
+        self.assertEqual(self.calc.sine(-30), -0.5)
+        self.assertEqual(self.calc.cosine(720), 1)
+        self.assertEqual(self.calc.cube_root(1000 ** 3), 1000)
+        self.assertEqual(self.calc.cube_root(-64), -4)
+        self.assertEqual(self.calc.logarithm(1000), 3)
+        self.assertEqual(self.calc.logarithm(0.001), -3)
+        self.assertEqual(self.calc.square_root(10000 ** 2), 10000)
+        self.assertEqual(self.calc.sine(30.5), 0.51)
+        self.assertEqual(self.calc.square_root(2.25), 1.5)
+
     def test_parse_command_addition(self):
         result, history = self.parser.parse_command("what is 5 plus 3")
         self.assertEqual(result, 8)
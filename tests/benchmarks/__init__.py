@@ -0,0 +1 @@
+"""Benchmarks for VocalCalc hot paths."""
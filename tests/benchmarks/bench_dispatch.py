@@ -0,0 +1,78 @@
+"""
+Before/after benchmark for command dispatch.
+
+Times the original if/elif parser against the compiled keyword engine on our
+command mix, grouped so the effect on each kind of phrasing is visible. Run
+from the repository root:
+
+    python -m tests.benchmarks.bench_dispatch
+"""
+
+import argparse
+import timeit
+
+from command_parser import CommandParser
+from tests.benchmarks.legacy_parser import LegacyCommandParser
+
+# Command mix weighted towards the phrasings users actually say most
+COMMAND_MIX = {
+    "arithmetic": [
+        "what is 5 plus 3",
+        "what is 12 plus 30",
+        "add 10 and 20",
+        "what is 10 minus 4",
+        "subtract 3 from 8",
+        "what is 6 times 7",
+        "multiply 5 by 5",
+        "what is 10 divided by 2",
+        "divide 9 by 3",
+    ],
+    "scientific": [
+        "what is 2 to the power of 8",
+        "what is square root of 16",
+        "what is cube root of 27",
+        "what is log of 100",
+        "what is sine of 30",
+        "what is cosine of 60",
+        "what is tangent of 45",
+    ],
+    "long": [
+        "okay so I was wondering could you tell me what is the tangent of 45 please",
+        "hey calculator I need to know what the cosine of 60 degrees comes out to",
+        "what is the weather going to be like tomorrow in the city centre",
+    ],
+}
+
+
+def bench(parser, commands, repeat: int, number: int) -> float:
+    """Return the best time per command in microseconds."""
+    parse = parser.parse_command
+
+    def run():
+        for command in commands:
+            parse(command)
+
+    best = min(timeit.repeat(run, repeat=repeat, number=number))
+    return best / (number * len(commands)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    legacy = LegacyCommandParser()
+    compiled = CommandParser()
+    groups = dict(COMMAND_MIX)
+    groups["all"] = [command for commands in COMMAND_MIX.values() for command in commands]
+
+    print(f"{'group':<12}{'legacy us':>12}{'compiled us':>14}{'speedup':>10}")
+    for name, commands in groups.items():
+        before = bench(legacy, commands, args.repeat, args.number)
+        after = bench(compiled, commands, args.repeat, args.number)
+        print(f"{name:<12}{before:>12.2f}{after:>14.2f}{before / after:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
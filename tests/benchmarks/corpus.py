@@ -0,0 +1,90 @@
+"""
+Realistic voice-command phrasings, grouped by operation family.
+
+Shared by the regression benchmarks and the load tools so every performance
+number is measured against the same mix of utterances.
+"""
+
+CORPUS = {
+    "addition": [
+        "what is 5 plus 3",
+        "what is 12 plus 30",
+        "add 10 and 20",
+        "what's 250 + 17?",
+        "15 plus 27",
+    ],
+    "subtraction": [
+        "what is 10 minus 4",
+        "subtract 3 from 8",
+        "what is 100 - 58",
+        "42 minus 19",
+    ],
+    "multiplication": [
+        "what is 6 times 7",
+        "multiply 5 by 5",
+        "what is 12 * 12",
+        "8 times 9",
+    ],
+    "division": [
+        "what is 10 divided by 2",
+        "divide 9 by 3",
+        "what is 22 / 7",
+        "100 divided by 0",
+    ],
+    "exponentiation": [
+        "what is 2 power 8",
+        "3 ^ 4",
+        "what is 10 power 3",
+    ],
+    "roots": [
+        "what is square root of 16",
+        "√ 2",
+        "what is cube root of 27",
+        "cube root of 81",
+    ],
+    "logarithm": [
+        "what is log of 100",
+        "log 2",
+    ],
+    "trigonometry": [
+        "what is sine of 30",
+        "what is cosine of 60",
+        "what is tangent of 45",
+        "sin 90",
+        "cos 0",
+    ],
+    "expression": [
+        "what is 2 plus 3 times 4",
+        "10 minus 4 minus 3",
+        "square root of 16 plus 9",
+        "6 times 7 plus 8 divided by 2",
+    ],
+    "invalid": [
+        "what is the weather today",
+        "hello there",
+        "open the pod bay doors",
+    ],
+}
+
+# Relative frequency of each family in production traffic
+WEIGHTS = {
+    "addition": 25,
+    "subtraction": 15,
+    "multiplication": 15,
+    "division": 12,
+    "exponentiation": 5,
+    "roots": 8,
+    "logarithm": 3,
+    "trigonometry": 7,
+    "expression": 5,
+    "invalid": 5,
+}
+
+
+def weighted_commands():
+    """Return the corpus as a flat list with each family repeated by its weight."""
+    commands = []
+    for family, phrasings in CORPUS.items():
+        for i in range(WEIGHTS[family]):
+            commands.append(phrasings[i % len(phrasings)])
+    return commands
@@ -0,0 +1,324 @@
+"""
+Reference copy of the original if/elif command parser.
+
+Kept verbatim so the dispatch benchmark and the parity tests can compare
+the compiled keyword engine against the behaviour it replaced.
+"""
+
+from typing import Tuple, Union, List
+from calculator import Calculator
+
+
+class LegacyCommandParser:
+    """Original cascade-based parser for voice commands."""
+
+    def __init__(self):
+        """Initialize the command parser."""
+        self.calculator = Calculator()
+        self.symbol_map = {
+            "+": "plus",
+            "-": "minus",
+            "*": "times",
+            "/": "by",
+            "^": "power",
+            "sin": "sine",
+            "cos": "cosine",
+            "tan": "tangent",
+            "√": "square_root",
+        }
+        self.filter_words = ["what", "is", "the", "and", "of"]
+
+    def parse_command(self, command: str) -> Tuple[Union[float, str], str]:
+        """Parse the command and perform the corresponding arithmetic operation."""
+        # Clean the command: remove punctuation and convert to lowercase
+        command = command.lower()
+        command = command.replace('?', '').replace('.', '').replace(',', '')
+        tokens = command.split()
+
+        # Filter out non-essential words
+        filtered_tokens = [token for token in tokens if token not in self.filter_words]
+        filtered_tokens = [self.symbol_map.get(token, token) for token in filtered_tokens]
+
+        try:
+            # Look for addition commands
+            if "add" in filtered_tokens or "plus" in filtered_tokens:
+                return self._handle_addition(command, filtered_tokens)
+
+            # Look for subtraction commands
+            elif "subtract" in filtered_tokens or "minus" in filtered_tokens:
+                return self._handle_subtraction(filtered_tokens)
+
+            # Look for multiplication commands
+            elif "multiply" in filtered_tokens or "times" in filtered_tokens:
+                return self._handle_multiplication(filtered_tokens)
+
+            # Look for division commands
+            elif "divide" in filtered_tokens or "divided by" in filtered_tokens or "by" in filtered_tokens:
+                return self._handle_division(filtered_tokens)
+
+            # Look for exponentiation commands
+            elif "power" in filtered_tokens or "raised to" in filtered_tokens:
+                return self._handle_exponentiation(filtered_tokens)
+
+            # Square root handling
+            elif "square_root" in filtered_tokens or ("square" in filtered_tokens and "root" in filtered_tokens):
+                return self._handle_square_root(filtered_tokens)
+
+            # Cube root handling
+            elif "cube root" in filtered_tokens or "∛" in filtered_tokens or ("cube" in filtered_tokens and "root" in filtered_tokens):
+                return self._handle_cube_root(filtered_tokens)
+
+            # Look for logarithm commands
+            elif "log" in filtered_tokens:
+                return self._handle_logarithm(filtered_tokens)
+
+            # Trigonometric functions
+            elif "sine" in filtered_tokens:
+                return self._handle_sine(filtered_tokens)
+            elif "cosine" in filtered_tokens:
+                return self._handle_cosine(filtered_tokens)
+            elif "tangent" in filtered_tokens:
+                return self._handle_tangent(filtered_tokens)
+
+            else:
+                return "Invalid command", ""  # Return an error message and an empty history entry
+
+        except (ValueError, IndexError) as e:
+            return f"Error: {str(e)}", ""
+
+    def _handle_addition(self, command: str, filtered_tokens: List[str]) -> Tuple[float, str]:
+        """Handle addition commands."""
+        # For test_parse_command_addition, we need to ensure the order is correct
+        if "add 10 and 20" in command:
+            x = 10.0
+            y = 20.0
+        elif "plus" in filtered_tokens:
+            x = float(filtered_tokens[filtered_tokens.index("plus") - 1])
+            y = float(filtered_tokens[filtered_tokens.index("plus") + 1])
+        else:
+            x = float(filtered_tokens[filtered_tokens.index("add") - 1])
+            y = float(filtered_tokens[filtered_tokens.index("add") + 1])
+
+        result = self.calculator.add(x, y)
+        history_entry = f"{self._format_number(x)} + {self._format_number(y)} = {self._format_number(result)}"
+        return result, history_entry
+
+    def _handle_subtraction(self, filtered_tokens: List[str]) -> Tuple[float, str]:
+        """Handle subtraction commands."""
+        if "minus" in filtered_tokens:
+            x = float(filtered_tokens[filtered_tokens.index("minus") - 1])
+            y = float(filtered_tokens[filtered_tokens.index("minus") + 1])
+        elif "from" in filtered_tokens and "subtract" in filtered_tokens:
+            # Handle "subtract X from Y" format (Y - X)
+            x = float(filtered_tokens[filtered_tokens.index("from") + 1])
+            y = float(filtered_tokens[filtered_tokens.index("subtract") + 1])
+        else:
+            # Handle other subtraction formats
+            x = float(filtered_tokens[filtered_tokens.index("subtract") - 1])
+            y = float(filtered_tokens[filtered_tokens.index("subtract") + 1])
+
+        result = self.calculator.subtract(x, y)
+        history_entry = f"{self._format_number(x)} - {self._format_number(y)} = {self._format_number(result)}"
+        return result, history_entry
+
+    def _handle_multiplication(self, filtered_tokens: List[str]) -> Tuple[float, str]:
+        """Handle multiplication commands."""
+        if "times" in filtered_tokens:
+            x = float(filtered_tokens[filtered_tokens.index("times") - 1])
+            y = float(filtered_tokens[filtered_tokens.index("times") + 1])
+        else:
+            x = float(filtered_tokens[filtered_tokens.index("multiply") - 1])
+            y = float(filtered_tokens[filtered_tokens.index("multiply") + 1])
+
+        result = self.calculator.multiply(x, y)
+        history_entry = f"{self._format_number(x)} * {self._format_number(y)} = {self._format_number(result)}"
+        return result, history_entry
+
+    def _handle_division(self, filtered_tokens: List[str]) -> Tuple[Union[float, str], str]:
+        """Handle division commands."""
+        if "divided by" in ' '.join(filtered_tokens):
+            # Handle "X divided by Y"
+            divided_idx = filtered_tokens.index("divided")
+            x = float(filtered_tokens[divided_idx - 1])
+            y = float(filtered_tokens[divided_idx + 2])  # +2 to skip "divided by"
+        elif "by" in filtered_tokens and "divide" in filtered_tokens:
+            # Handle "divide X by Y"
+            x = float(filtered_tokens[filtered_tokens.index("divide") + 1])
+            y = float(filtered_tokens[filtered_tokens.index("by") + 1])
+        elif "by" in filtered_tokens:
+            # Handle "X by Y"
+            x = float(filtered_tokens[filtered_tokens.index("by") - 1])
+            y = float(filtered_tokens[filtered_tokens.index("by") + 1])
+        else:
+            # Handle other division formats
+            x = float(filtered_tokens[filtered_tokens.index("divide") - 1])
+            y = float(filtered_tokens[filtered_tokens.index("divide") + 1])
+
+        result = self.calculator.divide(x, y)
+        if isinstance(result, str):
+            history_entry = f"{self._format_number(x)} / {self._format_number(y)} = {result}"  # Error case
+        else:
+            history_entry = f"{self._format_number(x)} / {self._format_number(y)} = {result:.2f}"
+        return result, history_entry
+
+    def _handle_exponentiation(self, filtered_tokens: List[str]) -> Tuple[float, str]:
+        """Handle exponentiation commands."""
+        if "power" in filtered_tokens:
+            base = float(filtered_tokens[filtered_tokens.index("power") - 1])
+            exponent = float(filtered_tokens[filtered_tokens.index("power") + 1])
+        elif "raised" in filtered_tokens and "power" in ' '.join(filtered_tokens):
+            # Handle "raised to the power of" pattern
+            base = float(filtered_tokens[filtered_tokens.index("raised") - 1])
+            # Find the exponent after "power"
+            power_idx = filtered_tokens.index("power")
+            if power_idx + 1 < len(filtered_tokens):
+                exponent = float(filtered_tokens[power_idx + 1])
+            else:
+                raise ValueError("Missing exponent value")
+        else:  # Simple "raised to" case
+            base = float(filtered_tokens[filtered_tokens.index("raised") - 1])
+            # Find the next number after "raised"
+            for i in range(filtered_tokens.index("raised") + 1, len(filtered_tokens)):
+                try:
+                    exponent = float(filtered_tokens[i])
+                    break
+                except ValueError:
+                    continue
+            else:
+                raise ValueError("Could not find exponent value")
+
+        result = self.calculator.exponentiation(base, exponent)
+        history_entry = f"{self._format_number(base)} raised to the power of {self._format_number(exponent)} = {result}"
+        return result, history_entry
+
+    def _handle_square_root(self, filtered_tokens: List[str]) -> Tuple[Union[float, str], str]:
+        """Handle square root commands."""
+        # Find the index to start searching from
+        if "square_root" in filtered_tokens:
+            start_idx = filtered_tokens.index("square_root")
+        elif "root" in filtered_tokens:
+            start_idx = filtered_tokens.index("root")
+        else:
+            start_idx = 0
+
+        # Find the next number after the keyword
+        for i in range(start_idx + 1, len(filtered_tokens)):
+            try:
+                x = float(filtered_tokens[i])
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError("Could not find value for square root")
+
+        result = self.calculator.square_root(x)
+        # Format the result to match the test expectation
+        if isinstance(result, float) and result.is_integer():
+            result_str = str(int(result))
+        else:
+            result_str = str(result)
+        history_entry = f"√({self._format_number(x)}) = {result_str}"
+        return result, history_entry
+
+    def _handle_cube_root(self, filtered_tokens: List[str]) -> Tuple[float, str]:
+        """Handle cube root commands."""
+        # Find the index to start searching from
+        if "∛" in filtered_tokens:
+            start_idx = filtered_tokens.index("∛")
+        elif "cube" in filtered_tokens and "root" in filtered_tokens:
+            start_idx = max(filtered_tokens.index("cube"), filtered_tokens.index("root"))
+        elif "root" in filtered_tokens:
+            start_idx = filtered_tokens.index("root")
+        else:
+            start_idx = 0
+
+        # Find the next number after the keyword
+        for i in range(start_idx + 1, len(filtered_tokens)):
+            try:
+                x = float(filtered_tokens[i])
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError("Could not find value for cube root")
+
+        result = self.calculator.cube_root(x)
+        history_entry = f"∛({self._format_number(x)}) = {result}"
+        return result, history_entry
+
+    def _handle_logarithm(self, filtered_tokens: List[str]) -> Tuple[Union[float, str], str]:
+        """Handle logarithm commands."""
+        log_idx = filtered_tokens.index("log")
+        # Find the next number after "log"
+        for i in range(log_idx + 1, len(filtered_tokens)):
+            try:
+                x = float(filtered_tokens[i])
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError("Could not find value for logarithm")
+
+        result = self.calculator.logarithm(x)
+        # Format the result to match the test expectation
+        if isinstance(result, float) and result.is_integer():
+            result_str = str(int(result))
+        else:
+            result_str = str(result)
+        history_entry = f"log({self._format_number(x)}) = {result_str}"
+        return result, history_entry
+
+    def _handle_sine(self, filtered_tokens: List[str]) -> Tuple[float, str]:
+        """Handle sine commands."""
+        sine_idx = filtered_tokens.index("sine")
+        # Find the next number after "sine"
+        for i in range(sine_idx + 1, len(filtered_tokens)):
+            try:
+                x = float(filtered_tokens[i])
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError("Could not find angle value for sine")
+
+        result = self.calculator.sine(x)
+        history_entry = f"sin({self._format_number(x)}) = {result}"
+        return result, history_entry
+
+    def _handle_cosine(self, filtered_tokens: List[str]) -> Tuple[float, str]:
+        """Handle cosine commands."""
+        cosine_idx = filtered_tokens.index("cosine")
+        # Find the next number after "cosine"
+        for i in range(cosine_idx + 1, len(filtered_tokens)):
+            try:
+                x = float(filtered_tokens[i])
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError("Could not find angle value for cosine")
+
+        result = self.calculator.cosine(x)
+        history_entry = f"cos({self._format_number(x)}) = {result}"
+        return result, history_entry
+
+    def _handle_tangent(self, filtered_tokens: List[str]) -> Tuple[float, str]:
+        """Handle tangent commands."""
+        tangent_idx = filtered_tokens.index("tangent")
+        # Find the next number after "tangent"
+        for i in range(tangent_idx + 1, len(filtered_tokens)):
+            try:
+                x = float(filtered_tokens[i])
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError("Could not find angle value for tangent")
+
+        result = self.calculator.tangent(x)
+        history_entry = f"tan({self._format_number(x)}) = {result}"
+        return result, history_entry
+
+    def _format_number(self, num: float) -> Union[int, float]:
+        """Format a number to integer if it's a whole number."""
+        return int(num) if num.is_integer() else num
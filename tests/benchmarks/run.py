@@ -0,0 +1,111 @@
+"""
+Performance regression runner.
+
+Times every case in tests/benchmarks/suite.py, normalizes it against the
+calibration loop and compares the result with tests/benchmarks/baselines.json.
+Exits non-zero when any case is slower than its baseline by more than the
+threshold. Run from the repository root:
+
+    python -m tests.benchmarks.run                    # check against baselines
+    python -m tests.benchmarks.run --threshold 0.5    # allow 50% slowdown
+    python -m tests.benchmarks.run --update           # record new baselines
+    python -m tests.benchmarks.run -k parse.          # only matching cases
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+from typing import Callable, Dict
+
+from tests.benchmarks.suite import build_cases, calibration
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+DEFAULT_THRESHOLD = float(os.environ.get("VOCALCALC_BENCH_THRESHOLD", 0.25))
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float) -> float:
+    """Return the best time per call in seconds over many short runs.
+
+    Taking the minimum of many short runs filters out scheduler noise far
+    better than a few long runs do.
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run(pattern: str = "", repeat: int = 15, min_time: float = 0.01, rounds: int = 3) -> Dict[str, float]:
+    """Return normalized timings (multiples of the calibration loop) for each case.
+
+    The calibration loop is re-timed next to every case so that drift in
+    machine speed cancels out, and the whole suite is run ``rounds`` times
+    keeping each case's best ratio, so a burst of background load during one
+    case does not register as a regression.
+    """
+    cases = {name: func for name, func in build_cases().items() if pattern in name}
+    results: Dict[str, float] = {}
+    for _ in range(rounds):
+        for name, func in cases.items():
+            unit = measure(calibration, repeat, min_time)
+            ratio = measure(func, repeat, min_time) / unit
+            results[name] = min(ratio, results.get(name, ratio))
+    return results
+
+
+def compare(results: Dict[str, float], baselines: Dict[str, float], threshold: float) -> int:
+    """Print a comparison table and return the number of regressions."""
+    regressions = 0
+    print(f"{'case':<28}{'baseline':>10}{'current':>10}{'change':>9}")
+    for name, value in results.items():
+        baseline = baselines.get(name)
+        if baseline is None:
+            print(f"{name:<28}{'-':>10}{value:>10.4g}{'new':>9}")
+            continue
+        change = value / baseline - 1
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{name:<28}{baseline:>10.4g}{value:>10.4g}{change:>+8.0%}{flag}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="VocalCalc performance regression runner")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction of the baseline (default %(default)s)")
+    parser.add_argument("--update", action="store_true", help="record the results as the new baselines")
+    parser.add_argument("-k", dest="pattern", default="", help="only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=15, help="timing runs per case; the fastest counts")
+    parser.add_argument("--rounds", type=int, default=3, help="passes over the whole suite; the best counts")
+    parser.add_argument("--min-time", type=float, default=0.01, help="seconds per timing run")
+    args = parser.parse_args()
+
+    results = run(args.pattern, args.repeat, args.min_time, args.rounds)
+
+    baselines = {}
+    if os.path.exists(BASELINES_PATH):
+        with open(BASELINES_PATH) as f:
+            baselines = json.load(f)
+
+    if args.update:
+        baselines.update({name: float(f"{value:.4g}") for name, value in results.items()})
+        with open(BASELINES_PATH, "w") as f:
+            json.dump(dict(sorted(baselines.items())), f, indent=2)
+            f.write("\n")
+        print(f"Recorded {len(results)} baselines in {BASELINES_PATH}")
+        return 0
+
+    regressions = compare(results, baselines, args.threshold)
+    if regressions:
+        print(f"{regressions} case(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+Benchmark cases for the parser, calculator and API hot paths.
+
+Each case is a zero-argument callable timed by the runner. Times are
+normalized against a fixed pure-Python calibration loop measured in the same
+run, so stored baselines stay comparable across machines.
+"""
+
+from typing import Callable, Dict
+
+from calculator import Calculator
+from command_parser import CommandParser
+from tests.benchmarks.corpus import CORPUS
+
+# Operands for every Calculator method
+CALCULATOR_ARGS = {
+    "add": (12.5, 30.0),
+    "subtract": (100.0, 58.0),
+    "multiply": (6.0, 7.0),
+    "divide": (22.0, 7.0),
+    "logarithm": (100.0,),
+    "square_root": (2.0,),
+    "cube_root": (81.0,),
+    "exponentiation": (2.0, 10.0),
+    "exponential": (1.5,),
+    "sine": (30.0,),
+    "cosine": (60.0,),
+    "tangent": (45.0,),
+}
+
+
+def calibration() -> None:
+    """Fixed workload used to normalize timings across machines."""
+    total = 0
+    for i in range(200):
+        total += i * i % 7
+    return total
+
+
+def build_cases() -> Dict[str, Callable[[], object]]:
+    """Return the benchmark cases keyed by name."""
+    cases: Dict[str, Callable[[], object]] = {}
+
+    parser = CommandParser()
+    for family, commands in CORPUS.items():
+        def parse_family(commands=commands, parse=parser.parse_command):
+            for command in commands:
+                parse(command)
+        cases[f"parse.{family}"] = parse_family
+
+    calculator = Calculator()
+    for name, args in CALCULATOR_ARGS.items():
+        method = getattr(calculator, name)
+        cases[f"calculator.{name}"] = lambda method=method, args=args: method(*args)
+
+    from app import app
+    client = app.test_client()
+
+    def api_calculate():
+        response = client.post('/api/calculate', json={'command': 'what is 5 plus 3'})
+        assert response.status_code == 200
+
+    cases["api.calculate"] = api_calculate
+    return cases
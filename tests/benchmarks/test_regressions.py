@@ -0,0 +1,32 @@
+import io
+import json
+import os
+import unittest
+from contextlib import redirect_stdout
+
+from tests.benchmarks import run
+
+
+class TestRegressionCheck(unittest.TestCase):
+    def test_compare_flags_slowdowns_beyond_threshold(self):
+        baselines = {'a': 1.0, 'b': 1.0}
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(run.compare({'a': 1.2, 'b': 1.4, 'c': 9.0}, baselines, 0.25), 1)
+            self.assertEqual(run.compare({'a': 1.2, 'b': 1.4}, baselines, 0.5), 0)
+
+    def test_baselines_cover_every_case(self):
+        with open(run.BASELINES_PATH) as f:
+            baselines = json.load(f)
+        self.assertEqual(set(run.build_cases()), set(baselines))
+
+    @unittest.skipUnless(os.environ.get('VOCALCALC_RUN_BENCHMARKS'),
+                         'set VOCALCALC_RUN_BENCHMARKS=1 to run the performance suite')
+    def test_no_hot_path_regressed(self):
+        with open(run.BASELINES_PATH) as f:
+            baselines = json.load(f)
+        with redirect_stdout(io.StringIO()) as out:
+            regressions = run.compare(run.run(), baselines, run.DEFAULT_THRESHOLD)
+        self.assertEqual(regressions, 0, out.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
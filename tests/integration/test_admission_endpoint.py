@@ -0,0 +1,53 @@
+import unittest
+from app import create_app
+
+
+class TestAdmissionEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({'RATE_LIMIT': 1, 'RATE_BURST': 2, 'WARM_UP': False}).test_client()
+        self.app.testing = True
+
+    def test_rejects_beyond_burst(self):
+        for _ in range(2):
+            response = self.app.post('/api/calculate', json={'command': 'what is 5 plus 3'})
+            self.assertEqual(response.status_code, 200)
+
+        response = self.app.post('/api/calculate', json={'command': 'what is 5 plus 3'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.get_json(), {'error': 'Too many requests'})
+        self.assertEqual(response.headers['Retry-After'], '1')
+        self.assertEqual(response.headers['Access-Control-Allow-Origin'], '*')
+
+        # Rejected before the body is looked at
+        response = self.app.post('/api/calculate', data='not json', content_type='application/json')
+        self.assertEqual(response.status_code, 429)
+
+        metrics = self.app.get('/api/metrics').data.decode()
+        self.assertIn('vocalcalc_admission_rejected_total{endpoint="calculate"} 2.0', metrics)
+
+    def test_clients_are_limited_separately(self):
+        for _ in range(3):
+            self.app.post('/api/calculate', json={'command': '5 plus 3'})
+        response = self.app.post('/api/calculate', json={'command': '5 plus 3'},
+                                 environ_base={'REMOTE_ADDR': '10.0.0.2'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_trusted_proxy_identifies_clients(self):
+        client = create_app({'RATE_LIMIT': 1, 'RATE_BURST': 1, 'TRUSTED_PROXIES': 1,
+                             'WARM_UP': False}).test_client()
+        for address in ('10.0.0.1', '10.0.0.2'):
+            response = client.post('/api/calculate', json={'command': '5 plus 3'},
+                                   headers={'X-Forwarded-For': address})
+            self.assertEqual(response.status_code, 200)
+        response = client.post('/api/calculate', json={'command': '5 plus 3'},
+                               headers={'X-Forwarded-For': '10.0.0.1'})
+        self.assertEqual(response.status_code, 429)
+
+    def test_disabled_by_default(self):
+        client = create_app({'WARM_UP': False}).test_client()
+        statuses = {client.post('/api/calculate', json={'command': '5 plus 3'}).status_code for _ in range(30)}
+        self.assertEqual(statuses, {200})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import shutil
+import tempfile
+import unittest
+from app import WARMUP_COMMANDS, create_app
+
+
+class TestAppFactory(unittest.TestCase):
+    def test_apps_are_independent(self):
+        directory = tempfile.mkdtemp()
+        try:
+            with_history = create_app({'HISTORY_DIR': directory, 'WARM_UP': False})
+            without_history = create_app({'HISTORY_DIR': None, 'WARM_UP': False})
+            session = '3f2b8c1e-0d4a-4f6e-9b7a-2c5d8e1f0a3b'
+            self.assertEqual(with_history.test_client().get(f'/api/history/{session}').status_code, 200)
+            self.assertEqual(without_history.test_client().get(f'/api/history/{session}').status_code, 404)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_config_overrides(self):
+        app = create_app({'BATCH_MAX_SIZE': 1, 'WARM_UP': False})
+        response = app.test_client().post('/api/calculate/batch', json=['1 plus 1', '2 plus 2'])
+        self.assertEqual(response.status_code, 413)
+
+    def test_warm_up_fills_parser_caches(self):
+        app = create_app({'WARM_UP': True})
+        parser = app.extensions['vocalcalc'].command_parser
+        self.assertGreater(len(parser._dispatch_memo), 10)
+        self.assertIsNotNone(app.extensions['vocalcalc'].startup.warm_up_seconds)
+
+    def test_warm_up_commands_evaluate(self):
+        parser = create_app({'WARM_UP': False}).extensions['vocalcalc'].command_parser
+        for command in WARMUP_COMMANDS:
+            with self.subTest(command=command):
+                self.assertTrue(parser.evaluate(parser.tokenize(command)).ok)
+
+    def test_startup_report(self):
+        app = create_app({'WARM_UP': False})
+        client = app.test_client()
+        self.assertEqual(client.get('/').status_code, 200)
+        report = client.get('/api/startup').get_json()
+        self.assertGreater(report['import_seconds'], 0)
+        self.assertGreater(report['create_app_seconds'], 0)
+        self.assertIsNone(report['warm_up_seconds'])
+        self.assertGreater(report['first_request_seconds'], 0)
+        self.assertGreater(report['first_request_latency_seconds'], 0)
+
+    def test_landing_page_links_calculator(self):
+        response = create_app({'WARM_UP': False}).test_client().get('/')
+        self.assertIn(b'href="/calculator"', response.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import gzip
+import os
+import re
+import shutil
+import tempfile
+import unittest
+from app import create_app
+from build_assets import build
+
+ASSET_URL = re.compile(r'(?:href|src)="(/(?:assets|static)/[^"]+)"')
+
+
+class TestAssetsEndpoint(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.assets = build(output=cls.directory)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        self.app = create_app({'ASSETS_DIR': self.directory, 'WARM_UP': False}).test_client()
+        self.app.testing = True
+
+    def test_pages_link_fingerprinted_bundles(self):
+        urls = ASSET_URL.findall(self.app.get('/calculator').data.decode())
+        self.assertIn('/assets/' + self.assets['css/calculator.bundle.css'], urls)
+        self.assertIn('/assets/' + self.assets['js/calculator.bundle.js'], urls)
+        self.assertTrue(all(url.startswith('/assets/') for url in urls))
+
+        urls = ASSET_URL.findall(self.app.get('/').data.decode())
+        self.assertIn('/assets/' + self.assets['css/landing.bundle.css'], urls)
+
+    def test_serves_precompressed_variant(self):
+        url = '/assets/' + self.assets['js/calculator.bundle.js']
+        with open(os.path.join(self.directory, self.assets['js/calculator.bundle.js']), 'rb') as f:
+            original = f.read()
+
+        response = self.app.get(url, headers={'Accept-Encoding': 'gzip, deflate, br'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.mimetype, 'text/javascript')
+        self.assertEqual(gzip.decompress(response.data), original)
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertNotIn('Content-Disposition', response.headers)
+
+        cache_control = response.headers['Cache-Control']
+        self.assertIn('immutable', cache_control)
+        self.assertIn('max-age=31536000', cache_control)
+
+        response = self.app.get(url)
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.data, original)
+
+    def test_images_are_served_as_is(self):
+        response = self.app.get('/assets/' + self.assets['images/favicon.png'],
+                                headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'image/png')
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_only_built_files_are_served(self):
+        self.assertEqual(self.app.get('/assets/js/app.js').status_code, 404)
+        self.assertEqual(self.app.get('/assets/manifest.json').status_code, 404)
+
+    def test_falls_back_to_source_files_without_a_build(self):
+        client = create_app({'ASSETS_DIR': os.path.join(self.directory, 'missing'), 'WARM_UP': False}).test_client()
+        urls = ASSET_URL.findall(client.get('/calculator').data.decode())
+        self.assertIn('/static/css/styles.css', urls)
+        self.assertIn('/static/js/app.js', urls)
+        self.assertEqual(client.get('/assets/js/app.js').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import json
+import unittest
+from app import app
+
+
+class TestBatchEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.testing = True
+
+    def _lines(self, response):
+        return [json.loads(line) for line in response.data.decode().splitlines()]
+
+    def test_json_array(self):
+        response = self.app.post('/api/calculate/batch',
+                                 json=['what is 5 plus 3', {'command': 'divide 9 by 3'}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = self._lines(response)
+        self.assertEqual(lines[0], {'index': 0, 'command': 'what is 5 plus 3',
+                                    'result': 8, 'history_entry': '5 + 3 = 8'})
+        self.assertEqual(lines[1]['result'], 3)
+
+    def test_ndjson_body(self):
+        body = '"what is 6 times 7"\n\n{"command": "what is 10 minus 4"}\nnot json\n'
+        response = self.app.post('/api/calculate/batch', data=body,
+                                 content_type='application/x-ndjson')
+        lines = self._lines(response)
+        self.assertEqual([line.get('result') for line in lines], [42, 6, None])
+        self.assertEqual(lines[2], {'index': 2, 'error': 'Invalid JSON line'})
+
+    def test_item_errors_do_not_fail_batch(self):
+        response = self.app.post('/api/calculate/batch',
+                                 json={'commands': ['', {}, 42, 'invalid command', '1 plus 1']})
+        lines = self._lines(response)
+        self.assertEqual([line.get('error') for line in lines],
+                         ['Invalid command format', 'No command provided',
+                          'Invalid command format', None, None])
+        self.assertEqual(lines[3]['result'], 'Invalid command')
+        self.assertEqual(lines[4]['result'], 2)
+
+    def test_max_batch_size(self):
+        old = app.config['BATCH_MAX_SIZE']
+        app.config['BATCH_MAX_SIZE'] = 2
+        try:
+            response = self.app.post('/api/calculate/batch', json=['1 plus 1'] * 3)
+            self.assertEqual(response.status_code, 413)
+
+            response = self.app.post('/api/calculate/batch', data='"1 plus 1"\n' * 3,
+                                     content_type='application/x-ndjson')
+            lines = self._lines(response)
+            self.assertEqual(len(lines), 3)
+            self.assertIn('maximum size', lines[2]['error'])
+        finally:
+            app.config['BATCH_MAX_SIZE'] = old
+
+    def test_rejects_non_list(self):
+        response = self.app.post('/api/calculate/batch', json={'command': '1 plus 1'})
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from app import create_app
+from command_parser import CommandParser
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SESSION = '3f2b8c1e-0d4a-4f6e-9b7a-2c5d8e1f0a3b'
+
+# Runs static/js/calculator.js outside a browser and evaluates each command
+# of the JSON on stdin with a LocalEvaluator
+NODE_SCRIPT = """
+const fs = require('fs');
+const vm = require('vm');
+global.window = { location: { origin: 'http://localhost' } };
+const source = fs.readFileSync(process.argv[1], 'utf8');
+vm.runInThisContext(source + '\\nglobalThis.LocalEvaluator = LocalEvaluator;');
+const { grammar, commands } = JSON.parse(fs.readFileSync(0, 'utf8'));
+const evaluator = new LocalEvaluator(grammar);
+process.stdout.write(JSON.stringify(commands.map(command => evaluator.evaluate(command))));
+"""
+
+# Commands the browser answers itself
+LOCAL_COMMANDS = [
+    'what is 5 plus 3', '5 + 3', '4 add 6', '10 minus 4', 'subtract 3 from 10',
+    '7 times 8', '6 multiply 7', '10 divided by 4', 'divide 10 by 4', '1 / 3',
+    '2 / 3', '10 / 8', '-10 / 8', '1 / 8', '5 / 8', '0 / 5', '-1 / 1000',
+    '2 power 10', '2 ^ -2', '10 ^ -3', '3 ^ 3', '-2 ^ 3',
+    'square root of 16', '√ 2', 'square root of -9', '10 divided by 0',
+    'What is 100 times 100?', '-0 times 5', '2,500 times 3',
+]
+
+# Commands the browser leaves to the server
+SERVER_COMMANDS = [
+    'add 10 and 20', 'add 4 and 6', 'five plus three', '2 to the power of 10', 'two point five times 4', '2 plus 3 times 4',
+    'cube root of 27', 'log 100', 'sine 30', 'plus devided 5', '5 plus',
+    '99999999 times 99999999', '10 ^ 400', '5 pluss 3', 'hello', '',
+    'cinq plus trois é', '0 ^ -1',
+]
+
+
+class TestGrammarEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.app = create_app({'HISTORY_DIR': self.directory, 'WARM_UP': False}).test_client()
+        self.app.testing = True
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_grammar_is_versioned(self):
+        response = self.app.get('/api/grammar')
+        self.assertEqual(response.status_code, 200)
+        grammar = response.get_json()
+        self.assertEqual(grammar, CommandParser().grammar())
+        self.assertEqual(response.headers['ETag'], f'"{grammar["version"]}"')
+        self.assertIn('no-cache', response.headers['Cache-Control'])
+
+        response = self.app.get('/api/grammar', headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_local_results_are_recorded(self):
+        record = {'command': '5 plus 3', 'result': 8, 'history_entry': '5 + 3 = 8'}
+        response = self.app.post(f'/api/history/{SESSION}', json=record)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json(), {'session': SESSION, 'seq': 0})
+
+        entries = self.app.get(f'/api/history/{SESSION}').get_json()['entries']
+        self.assertEqual([e['history_entry'] for e in entries], ['5 + 3 = 8'])
+
+    def test_invalid_local_results_are_rejected(self):
+        for record in ({'command': '5 plus 3', 'result': 8}, {'command': 1, 'result': 8, 'history_entry': 'x'},
+                       {'command': 'x', 'result': True, 'history_entry': 'x'}, ['5 + 3 = 8']):
+            response = self.app.post(f'/api/history/{SESSION}', json=record)
+            self.assertEqual(response.status_code, 400, record)
+        response = self.app.post('/api/history/not a session',
+                                 json={'command': 'x', 'result': 1, 'history_entry': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_recording_needs_history(self):
+        app = create_app({'HISTORY_DIR': None, 'WARM_UP': False}).test_client()
+        response = app.post(f'/api/history/{SESSION}', json={'command': 'x', 'result': 1, 'history_entry': 'x'})
+        self.assertEqual(response.status_code, 404)
+
+
+@unittest.skipUnless(shutil.which('node'), 'node is not installed')
+class TestLocalEvaluatorParity(unittest.TestCase):
+    """The browser's LocalEvaluator must answer exactly as the server or not at all."""
+
+    def evaluate(self, commands):
+        payload = json.dumps({'grammar': CommandParser().grammar(), 'commands': commands})
+        output = subprocess.run(['node', '-e', NODE_SCRIPT, os.path.join(ROOT, 'static', 'js', 'calculator.js')],
+                                input=payload, capture_output=True, text=True, check=True, timeout=60).stdout
+        return json.loads(output)
+
+    def test_local_results_match_the_server(self):
+        parser = CommandParser()
+        for command, local in zip(LOCAL_COMMANDS, self.evaluate(LOCAL_COMMANDS)):
+            with self.subTest(command=command):
+                self.assertIsNotNone(local)
+                result, history_entry = parser.parse_command(command.lower())
+                self.assertEqual((local['result'], local['history_entry']), (result, history_entry))
+
+    def test_other_commands_go_to_the_server(self):
+        for command, local in zip(SERVER_COMMANDS, self.evaluate(SERVER_COMMANDS)):
+            with self.subTest(command=command):
+                self.assertIsNone(local)
+
+    def test_rounding_matches_python(self):
+        commands = [f'{x} / {y}' for x in range(-40, 41, 3) for y in (1, 2, 3, 4, 6, 7, 8, 16, 40, 200, 400)]
+        commands += [f'{x} ^ {y}' for x in range(-6, 7) for y in range(-4, 5)]
+        commands += [f'square root of {x}' for x in range(0, 60)]
+        parser = CommandParser()
+        for command, local in zip(commands, self.evaluate(commands)):
+            if local is not None:
+                with self.subTest(command=command):
+                    self.assertEqual((local['result'], local['history_entry']), parser.parse_command(command))
+
+
+if __name__ == '__main__':
+    unittest.main()
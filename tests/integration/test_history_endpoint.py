@@ -0,0 +1,60 @@
+import shutil
+import tempfile
+import unittest
+from app import create_app
+
+SESSION = '3f2b8c1e-0d4a-4f6e-9b7a-2c5d8e1f0a3b'
+
+
+class TestHistoryEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.app = create_app({'HISTORY_DIR': self.directory, 'WARM_UP': False}).test_client()
+        self.app.testing = True
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_calculations_are_recorded_per_session(self):
+        for i in range(25):
+            self.app.post('/api/calculate', json={'command': f'what is {i} plus 1', 'session': SESSION})
+        self.app.post('/api/calculate', json={'command': 'what is 2 plus 2'})
+        self.app.post('/api/calculate', json={'command': 'hello', 'session': SESSION})
+
+        data = self.app.get(f'/api/history/{SESSION}').get_json()
+        self.assertEqual(data['total'], 25)
+        self.assertEqual(len(data['entries']), 20)
+        self.assertEqual(data['entries'][0]['history_entry'], '24 + 1 = 25')
+        self.assertEqual(data['entries'][0]['command'], 'what is 24 plus 1')
+        self.assertEqual(data['next_cursor'], 5)
+
+        data = self.app.get(f'/api/history/{SESSION}?before=5').get_json()
+        self.assertEqual([e['history_entry'] for e in data['entries']],
+                         [f'{i} + 1 = {i + 1}' for i in range(4, -1, -1)])
+        self.assertIsNone(data['next_cursor'])
+
+    def test_batch_items_with_session_are_recorded(self):
+        self.app.post('/api/calculate/batch', json=[{'command': '2 times 3', 'session': SESSION}, '1 plus 1'])
+        data = self.app.get(f'/api/history/{SESSION}?limit=5').get_json()
+        self.assertEqual([e['history_entry'] for e in data['entries']], ['2 * 3 = 6'])
+
+    def test_clear(self):
+        self.app.post('/api/calculate', json={'command': '2 times 3', 'session': SESSION})
+        response = self.app.delete(f'/api/history/{SESSION}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.app.get(f'/api/history/{SESSION}').get_json()['total'], 0)
+
+    def test_invalid_session(self):
+        self.assertEqual(self.app.get('/api/history/bad').status_code, 400)
+        response = self.app.post('/api/calculate', json={'command': '2 times 3', 'session': 'bad'})
+        self.assertEqual(response.get_json()['result'], 6)
+
+    def test_disabled(self):
+        self.app = create_app({'HISTORY_DIR': None, 'WARM_UP': False}).test_client()
+        response = self.app.get(f'/api/history/{SESSION}')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.get_json(), {'error': 'History is disabled'})
+
+
+if __name__ == '__main__':
+    unittest.main()
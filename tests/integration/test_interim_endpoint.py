@@ -0,0 +1,31 @@
+import unittest
+from app import create_app
+
+
+class TestInterimEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({'WARM_UP': False}).test_client()
+        self.app.testing = True
+
+    def test_growing_transcript(self):
+        replies = [self.app.post('/api/interim', json={'utterance': 'u-1', 'transcript': transcript}).get_json()
+                   for transcript in ('what is', 'what is twelve times', 'what is twelve times four')]
+        self.assertEqual([reply['complete'] for reply in replies], [False, False, True])
+        self.assertEqual(replies[-1]['result'], 48.0)
+        self.assertEqual(replies[-1]['history_entry'], '12 * 4 = 48')
+
+        final = self.app.post('/api/interim', json={'utterance': 'u-1', 'transcript': 'what is twelve times four',
+                                                    'final': True}).get_json()
+        self.assertTrue(final['final'])
+
+    def test_invalid_requests(self):
+        for body in ({'transcript': 'one plus one'}, {'utterance': 'u' * 65, 'transcript': 'one'},
+                     {'utterance': 'u-1', 'transcript': 5}, ['u-1']):
+            with self.subTest(body=body):
+                response = self.app.post('/api/interim', json=body)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.headers['Access-Control-Allow-Origin'], '*')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from app import create_app
+
+
+class TestLocaleEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({'WARM_UP': False}).test_client()
+        self.app.testing = True
+
+    def test_locales(self):
+        data = self.app.get('/api/locales').get_json()
+        self.assertEqual(data['default'], 'en')
+        self.assertEqual(data['locales'], ['de', 'en', 'es', 'hi'])
+        self.assertEqual(data['loaded'], ['en'])
+
+    def test_calculate_in_locale(self):
+        data = self.app.post('/api/calculate', json={'command': 'cuánto es cinco más tres', 'locale': 'es-ES'}).get_json()
+        self.assertEqual(data['result'], 8)
+        self.assertEqual(data['history_entry'], '5 + 3 = 8')
+        self.assertIn('es', self.app.get('/api/locales').get_json()['loaded'])
+
+    def test_unsupported_locale(self):
+        response = self.app.post('/api/calculate', json={'command': 'cinq plus trois', 'locale': 'fr-FR'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()['error'], 'Unsupported locale')
+
+    def test_batch_items_choose_their_locale(self):
+        response = self.app.post('/api/calculate/batch', json=[
+            {'command': 'zwei mal drei', 'locale': 'de'},
+            {'command': 'dos por tres', 'locale': 'es'},
+            'two times three',
+            {'command': 'two times three', 'locale': 'xx'},
+        ])
+        entries = [line for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(len(entries), 4)
+        self.assertTrue(all('"result": 6' in entry for entry in entries[:3]))
+        self.assertIn('Unsupported locale', entries[3])
+
+    def test_interim_in_locale(self):
+        data = self.app.post('/api/interim', json={'utterance': 'u-1', 'transcript': 'zehn geteilt durch vier',
+                                                   'locale': 'de-DE'}).get_json()
+        self.assertEqual(data['result'], 2.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from app import app
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.testing = True
+
+    def _metrics(self):
+        response = self.app.get('/api/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        samples = {}
+        for line in response.data.decode().splitlines():
+            if line and not line.startswith('#'):
+                name, value = line.rsplit(' ', 1)
+                samples[name] = float(value)
+        return samples
+
+    def _delta(self, before, after, name):
+        return after.get(name, 0.0) - before.get(name, 0.0)
+
+    def test_calculation_metrics(self):
+        before = self._metrics()
+        self.app.post('/api/calculate', json={'command': 'what is 5 plus 3'})
+        self.app.post('/api/calculate', json={'command': 'divide 5 by 0'})
+        self.app.post('/api/calculate', json={'command': 'hello there'})
+        self.app.post('/api/calculate', json={'command': '   '})
+        after = self._metrics()
+
+        self.assertEqual(self._delta(before, after, 'vocalcalc_requests_total{endpoint="calculate",status="200"}'), 3)
+        self.assertEqual(self._delta(before, after, 'vocalcalc_requests_total{endpoint="calculate",status="400"}'), 1)
+        self.assertEqual(self._delta(before, after, 'vocalcalc_request_duration_seconds_count{endpoint="calculate"}'), 4)
+        for phase, count in (('decode', 4), ('parse', 3), ('evaluate', 3), ('serialize', 3)):
+            self.assertEqual(self._delta(before, after, f'vocalcalc_phase_duration_seconds_count{{phase="{phase}"}}'),
+                             count, phase)
+        for handler in ('addition', 'division', 'none'):
+            self.assertEqual(self._delta(before, after, f'vocalcalc_handler_duration_seconds_count{{handler="{handler}"}}'),
+                             1, handler)
+        for kind in ('Division by zero', 'Invalid command', 'Empty command provided'):
+            self.assertEqual(self._delta(before, after, f'vocalcalc_errors_total{{kind="{kind}"}}'), 1, kind)
+
+    def test_error_kind_drops_user_input(self):
+        before = self._metrics()
+        self.app.post('/api/calculate', json={'command': 'what is abc plus 1'})
+        after = self._metrics()
+        kinds = [name for name in after if name.startswith('vocalcalc_errors_total')
+                 and self._delta(before, after, name)]
+        self.assertEqual(kinds, ['vocalcalc_errors_total{kind="could not convert string to float"}'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import unittest
+from app import create_app
+
+TOKEN = 'profile-secret'
+
+
+class TestProfilingEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.app = create_app({'PROFILE_DIR': self.directory, 'PROFILE_TOKEN': TOKEN,
+                               'WARM_UP': False}).test_client()
+        self.app.testing = True
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_profiles_requests_with_the_token(self):
+        response = self.app.post('/api/calculate', json={'command': '5 plus 3'},
+                                 headers={'X-Profile-Token': TOKEN})
+        self.assertEqual(response.get_json()['result'], 8)
+        name = response.headers['X-Profile']
+
+        response = self.app.post('/api/calculate', json={'command': '5 plus 3'},
+                                 headers={'X-Profile-Token': 'wrong'})
+        self.assertNotIn('X-Profile', response.headers)
+        self.assertEqual(os.listdir(self.directory), [name])
+
+        listing = self.app.get('/api/profiles', headers={'X-Profile-Token': TOKEN}).get_json()
+        self.assertEqual(listing['format'], 'pstats')
+        self.assertEqual([profile['name'] for profile in listing['profiles']], [name])
+
+        response = self.app.get(f'/api/profiles/{name}', headers={'X-Profile-Token': TOKEN})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response.headers['Content-Disposition'])
+        self.assertGreater(len(response.data), 0)
+
+    def test_listing_needs_the_token(self):
+        self.assertEqual(self.app.get('/api/profiles').status_code, 403)
+        self.assertEqual(self.app.get('/api/profiles/x.prof', headers={'X-Profile-Token': 'x'}).status_code, 403)
+        self.assertEqual(self.app.get('/api/profiles/x.prof', headers={'X-Profile-Token': TOKEN}).status_code, 404)
+
+    def test_sampling_without_header(self):
+        app = create_app({'PROFILE_DIR': self.directory, 'PROFILE_SAMPLE_RATE': 1.0,
+                          'PROFILE_FORMAT': 'collapsed', 'WARM_UP': False}).test_client()
+        response = app.post('/api/calculate', json={'command': '6 times 7'})
+        self.assertTrue(response.headers['X-Profile'].endswith('.folded'))
+        with open(os.path.join(self.directory, response.headers['X-Profile']), encoding='utf-8') as f:
+            self.assertIn('_handle_multiplication', f.read())
+
+    def test_disabled_by_default(self):
+        app = create_app({'WARM_UP': False}).test_client()
+        response = app.post('/api/calculate', json={'command': '5 plus 3'}, headers={'X-Profile-Token': TOKEN})
+        self.assertNotIn('X-Profile', response.headers)
+        self.assertEqual(app.get('/api/profiles', headers={'X-Profile-Token': TOKEN}).status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import json
+import threading
+import unittest
+from werkzeug.serving import make_server
+
+try:
+    import simple_websocket
+except ImportError:
+    simple_websocket = None
+
+import app as app_module
+
+
+@unittest.skipIf(app_module.Sock is None or simple_websocket is None, 'flask-sock is not installed')
+class TestSessionEndpoint(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = f'ws://127.0.0.1:{cls.server.server_port}/api/session'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        self.ws = simple_websocket.Client.connect(self.url)
+
+    def tearDown(self):
+        self.ws.close()
+
+    def _request(self, message):
+        self.ws.send(json.dumps(message))
+        return json.loads(self.ws.receive(timeout=5))
+
+    def test_many_commands_over_one_connection(self):
+        replies = [self._request({'type': 'calculate', 'id': i, 'command': f'what is {i} plus 1'})
+                   for i in range(5)]
+        self.assertEqual([reply['id'] for reply in replies], list(range(5)))
+        self.assertEqual([reply['result'] for reply in replies], [1, 2, 3, 4, 5])
+        self.assertEqual(replies[2]['history_entry'], '2 + 1 = 3')
+
+    def test_matches_post_api(self):
+        command = 'what is 10 divided by 4'
+        reply = self._request({'type': 'calculate', 'id': 'a', 'command': command})
+        data = app_module.app.test_client().post('/api/calculate', json={'command': command}).get_json()
+        self.assertEqual(reply, {'type': 'result', 'id': 'a', **data})
+
+    def test_invalid_command_reports_error(self):
+        reply = self._request({'type': 'calculate', 'id': 3, 'command': '   '})
+        self.assertEqual(reply, {'type': 'error', 'id': 3, 'error': 'Empty command provided'})
+
+    def test_heartbeat_when_idle(self):
+        session_protocol = app_module.app.extensions['vocalcalc'].session_protocol
+        interval = session_protocol.heartbeat_interval
+        session_protocol.heartbeat_interval = 0.05
+        try:
+            self._request({'type': 'ping'})
+            heartbeat = json.loads(self.ws.receive(timeout=5))
+        finally:
+            session_protocol.heartbeat_interval = interval
+        self.assertEqual(heartbeat['type'], 'heartbeat')
+        self.assertEqual(heartbeat['status'], 'healthy')
+
+
+if __name__ == '__main__':
+    unittest.main()
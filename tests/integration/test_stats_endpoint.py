@@ -0,0 +1,47 @@
+import unittest
+from app import create_app
+
+
+class TestStatsEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({'WARM_UP': False}).test_client()
+        self.app.testing = True
+
+    def test_summary(self):
+        response = self.app.post('/api/stats?percentiles=90', data='3, 7\n12;40\n')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Access-Control-Allow-Origin'], '*')
+        data = response.get_json()
+        self.assertEqual((data['count'], data['sum'], data['mean'], data['median']), (4, 62, 15.5, 9.5))
+        self.assertEqual((data['min'], data['max']), (3, 40))
+        self.assertAlmostEqual(data['variance'], 280.3333, places=4)
+        self.assertAlmostEqual(data['percentiles']['90'], 31.6)
+        self.assertTrue(data['exact'])
+
+    def test_large_upload_is_estimated(self):
+        body = '\n'.join(str(i) for i in range(1, 20001))
+        data = self.app.post('/api/stats', data=body).get_json()
+        self.assertEqual(data['count'], 20000)
+        self.assertEqual(data['mean'], 10000.5)
+        self.assertFalse(data['exact'])
+        self.assertAlmostEqual(data['median'], 10000, delta=20)
+        self.assertEqual(sorted(data['percentiles']), ['25', '50', '75', '90', '95', '99'])
+
+    def test_invalid_uploads(self):
+        for url, body, error in (('/api/stats', '1 two 3', 'Invalid number: two'),
+                                 ('/api/stats', ' \n ', 'No numbers provided'),
+                                 ('/api/stats', '1 ' + '9' * 100, 'Invalid number: ' + '9' * 40),
+                                 ('/api/stats?percentiles=101', '1', 'Invalid percentiles'),
+                                 ('/api/stats?percentiles=x', '1', 'Invalid percentiles')):
+            with self.subTest(url=url, body=body):
+                response = self.app.post(url, data=body)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.get_json(), {'error': error})
+
+    def test_spoken_list_command(self):
+        response = self.app.post('/api/calculate', json={'command': 'average of 3, 7 and 12'})
+        self.assertEqual(response.get_json()['history_entry'], 'mean(3, 7, 12) = 7.33')
+
+
+if __name__ == '__main__':
+    unittest.main()
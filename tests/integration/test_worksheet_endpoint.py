@@ -0,0 +1,71 @@
+import shutil
+import tempfile
+import unittest
+from app import create_app
+
+SESSION = '3f2b8c1e-0d4a-4f6e-9b7a-2c5d8e1f0a3b'
+
+
+class TestWorksheetEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({'WARM_UP': False}).test_client()
+        self.app.testing = True
+
+    def enter(self, command):
+        return self.app.post(f'/api/worksheet/{SESSION}', json={'command': command})
+
+    def test_enter_edit_and_fetch_changes(self):
+        self.enter('let price be 12')
+        self.enter('let count be 3')
+        data = self.enter('price times count').get_json()
+        self.assertEqual(data['changed'][0]['result'], 36.0)
+        self.assertEqual(data['changed'][0]['history_entry'], '12 * 3 = 36')
+        version = data['version']
+
+        data = self.app.put(f'/api/worksheet/{SESSION}/cells/2', json={'command': 'let count be 4'}).get_json()
+        self.assertEqual([(cell['id'], cell['result']) for cell in data['changed']], [(2, 4.0), (3, 48.0)])
+
+        data = self.app.get(f'/api/worksheet/{SESSION}?since={version}').get_json()
+        self.assertEqual([cell['id'] for cell in data['changed']], [2, 3])
+        self.assertEqual(data['version'], version + 1)
+        data = self.app.get(f'/api/worksheet/{SESSION}').get_json()
+        self.assertEqual(len(data['changed']), 3)
+
+    def test_remove_and_clear(self):
+        self.enter('let x be 2')
+        self.enter('x plus 1')
+        data = self.app.delete(f'/api/worksheet/{SESSION}/cells/1').get_json()
+        self.assertEqual(data['changed'][1]['result'], 'Error: x is not defined')
+        self.assertEqual(self.app.delete(f'/api/worksheet/{SESSION}/cells/1').status_code, 404)
+
+        self.assertEqual(self.app.delete(f'/api/worksheet/{SESSION}').status_code, 200)
+        self.assertEqual(self.app.get(f'/api/worksheet/{SESSION}').get_json()['changed'], [])
+
+    def test_errors(self):
+        self.assertEqual(self.enter('').status_code, 400)
+        self.assertEqual(self.enter('let plus be 3').status_code, 400)
+        self.assertEqual(self.app.post('/api/worksheet/not a session', json={'command': '1 plus 1'}).status_code,
+                         400)
+        response = self.app.put(f'/api/worksheet/{SESSION}/cells/7', json={'command': '1 plus 1'})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.headers['Access-Control-Allow-Origin'], '*')
+
+
+class TestSharedWorksheets(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_workers_share_a_directory(self):
+        # Two apps stand in for two gunicorn workers
+        first, second = (create_app({'WORKSHEET_DIR': self.directory, 'WARM_UP': False}).test_client()
+                         for _ in range(2))
+        first.post(f'/api/worksheet/{SESSION}', json={'command': 'let x be 6'})
+        data = second.post(f'/api/worksheet/{SESSION}', json={'command': 'x divided by 2'}).get_json()
+        self.assertEqual(data['changed'][0]['result'], 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import threading
+import time
+import unittest
+from admission import Coalescer, TokenBucketLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucketLimiter(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = TokenBucketLimiter(rate=2, burst=3, clock=self.clock)
+
+    def test_burst_then_reject(self):
+        self.assertEqual([self.limiter.admit('a') for _ in range(3)], [None, None, None])
+        self.assertAlmostEqual(self.limiter.admit('a'), 0.5)
+
+    def test_refills_over_time(self):
+        for _ in range(3):
+            self.limiter.admit('a')
+        self.clock.now += 0.5
+        self.assertIsNone(self.limiter.admit('a'))
+        self.assertIsNotNone(self.limiter.admit('a'))
+        # Never refills beyond the burst size
+        self.clock.now += 60
+        self.assertEqual([self.limiter.admit('a') is None for _ in range(4)], [True, True, True, False])
+
+    def test_clients_are_independent(self):
+        for _ in range(3):
+            self.limiter.admit('a')
+        self.assertIsNotNone(self.limiter.admit('a'))
+        self.assertIsNone(self.limiter.admit('b'))
+
+    def test_forgets_least_recent_clients(self):
+        limiter = TokenBucketLimiter(rate=1, burst=1, max_clients=2, clock=self.clock)
+        for client in ('a', 'b', 'c'):
+            limiter.admit(client)
+        self.assertEqual(len(limiter), 2)
+        self.assertIsNone(limiter.admit('a'))  # a was forgotten, so it starts full again
+
+    def test_rejects_bad_limits(self):
+        with self.assertRaises(ValueError):
+            TokenBucketLimiter(rate=0, burst=1)
+
+
+class TestCoalescer(unittest.TestCase):
+    def test_concurrent_calls_share_one_evaluation(self):
+        coalescer = Coalescer()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def evaluate():
+            calls.append(1)
+            release.wait(5)
+            return 42
+
+        def caller():
+            results.append(coalescer.run('5 plus 3', evaluate))
+
+        threads = [threading.Thread(target=caller) for _ in range(5)]
+        threads[0].start()
+        while not calls:
+            time.sleep(0.001)
+        for thread in threads[1:]:
+            thread.start()
+        # Give the followers time to find the call in flight before it finishes
+        time.sleep(0.2)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), [(42, False)] + [(42, True)] * 4)
+        self.assertEqual(len(coalescer), 0)
+
+    def test_sequential_calls_evaluate_again(self):
+        coalescer = Coalescer()
+        self.assertEqual(coalescer.run('k', lambda: 1), (1, False))
+        self.assertEqual(coalescer.run('k', lambda: 2), (2, False))
+
+    def test_errors_reach_every_waiter(self):
+        coalescer = Coalescer()
+        with self.assertRaises(ZeroDivisionError):
+            coalescer.run('k', lambda: 1 / 0)
+        self.assertEqual(len(coalescer), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
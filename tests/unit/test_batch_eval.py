@@ -0,0 +1,75 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import batch_eval
+from command_parser import CommandParser
+
+
+class TestBatchEval(unittest.TestCase):
+    def _run(self, text, jsonl=False, workers=1, block_size=64):
+        sink = io.BytesIO()
+        total = batch_eval.run(io.BytesIO(text.encode()), sink, jsonl, workers=workers, block_size=block_size)
+        return total, [json.loads(line) for line in sink.getvalue().decode().splitlines()]
+
+    def test_text_input(self):
+        total, results = self._run("what is 5 plus 3\n\n  divide 9 by 3  \nhello\n")
+        self.assertEqual(total, 3)
+        self.assertEqual(results[0], {'line': 1, 'command': 'what is 5 plus 3', 'result': 8,
+                                      'history_entry': '5 + 3 = 8'})
+        self.assertEqual(results[1]['line'], 3)
+        self.assertEqual(results[1]['result'], 3)
+        self.assertEqual(results[2]['result'], 'Invalid command')
+
+    def test_jsonl_input(self):
+        text = '"6 times 7"\n{"id": "a1", "command": "10 minus 4"}\nnot json\n{}\n42\n{"command": "  "}\n'
+        _, results = self._run(text, jsonl=True)
+        self.assertEqual(results[0]['result'], 42)
+        self.assertEqual(results[1]['id'], 'a1')
+        self.assertEqual(results[1]['result'], 6)
+        self.assertEqual([r.get('error') for r in results[2:]],
+                         ['Invalid JSON line', 'No command provided', 'Invalid command format',
+                          'Empty command provided'])
+
+    def test_blocks_split_on_line_boundaries(self):
+        text = "".join(f"what is {i} plus 1\n" for i in range(200)) + "what is 1 plus 1"
+        blocks = list(batch_eval.read_blocks(io.BytesIO(text.encode()), block_size=50))
+        self.assertGreater(len(blocks), 10)
+        self.assertEqual(b"".join(block for block, _ in blocks), text.encode())
+        for block, first_line in blocks[:-1]:
+            self.assertTrue(block.endswith(b"\n"))
+        self.assertEqual(blocks[-1][1], 201)
+
+    def test_long_line_larger_than_block(self):
+        command = "what is 1 plus " + "1" * 300
+        _, results = self._run(command + "\n2 plus 2\n", block_size=16)
+        self.assertEqual([r['line'] for r in results], [1, 2])
+
+    def test_process_pool_preserves_order(self):
+        commands = [f"what is {i} plus 1" for i in range(500)]
+        parser = CommandParser()
+        total, results = self._run("\n".join(commands) + "\n", workers=2, block_size=256)
+        self.assertEqual(total, 500)
+        self.assertEqual([r['line'] for r in results], list(range(1, 501)))
+        self.assertEqual([r['result'] for r in results], [parser.parse_command(c)[0] for c in commands])
+
+    def test_without_history(self):
+        sink = io.BytesIO()
+        batch_eval.run(io.BytesIO(b"5 plus 3\n"), sink, False, history=False)
+        self.assertEqual(json.loads(sink.getvalue()), {'line': 1, 'command': '5 plus 3', 'result': 8})
+
+    def test_main_writes_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'in.jsonl')
+            output = os.path.join(directory, 'out.jsonl')
+            with open(source, 'w') as f:
+                f.write('"what is 2 plus 2"\n')
+            self.assertEqual(batch_eval.main([source, '-o', output, '-w', '1', '-q']), 0)
+            with open(output) as f:
+                self.assertEqual(json.loads(f.read())['result'], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from assets import AssetManifest, bundle_members
+from build_assets import build, fingerprint
+
+BUNDLES = {'css/landing.bundle.css': ['css/normalize.css', 'css/landing.css']}
+
+
+class TestBuildAssets(unittest.TestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.output = os.path.join(tempfile.mkdtemp(), 'dist')
+        self._write('css/normalize.css', 'html { margin: 0; }\n' * 20)
+        self._write('css/landing.css', 'body { color: red; }\n' * 20)
+        self._write('images/icon.png', b'\x89PNG not really')
+
+    def tearDown(self):
+        shutil.rmtree(self.source)
+        shutil.rmtree(os.path.dirname(self.output))
+
+    def _write(self, name, content):
+        path = os.path.join(self.source, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content.encode() if isinstance(content, str) else content)
+
+    def _read(self, name):
+        with open(os.path.join(self.output, name), 'rb') as f:
+            return f.read()
+
+    def test_fingerprint(self):
+        self.assertRegex(fingerprint('css/a.css', b'x'), r'^css/a\.[0-9a-f]{12}\.css$')
+        self.assertNotEqual(fingerprint('css/a.css', b'x'), fingerprint('css/a.css', b'y'))
+
+    def test_builds_fingerprinted_files_and_manifest(self):
+        assets = build(self.source, self.output, BUNDLES)
+        self.assertEqual(set(assets), {'css/normalize.css', 'css/landing.css', 'images/icon.png',
+                                       'css/landing.bundle.css'})
+        for name, built in assets.items():
+            self.assertEqual(built, fingerprint(name, self._read(built)))
+        with open(os.path.join(self.output, 'manifest.json')) as f:
+            self.assertEqual(json.load(f)['assets'], assets)
+        self.assertEqual(self._read(assets['css/normalize.css']), b'html { margin: 0; }\n' * 20)
+
+        # Text is stored gzipped as well, images are not
+        compressed = self._read(assets['css/normalize.css'] + '.gz')
+        self.assertEqual(gzip.decompress(compressed), self._read(assets['css/normalize.css']))
+        self.assertFalse(os.path.exists(os.path.join(self.output, assets['images/icon.png'] + '.gz')))
+
+    def test_bundles_concatenate_members_in_order(self):
+        assets = build(self.source, self.output, BUNDLES)
+        bundle = self._read(assets['css/landing.bundle.css'])
+        self.assertEqual(bundle, b'html { margin: 0; }\n' * 20 + b'body { color: red; }\n' * 20)
+
+    def test_rebuild_is_deterministic(self):
+        first = build(self.source, self.output, BUNDLES)
+        gz = self._read(first['css/landing.css'] + '.gz')
+        self.assertEqual(build(self.source, self.output, BUNDLES), first)
+        self.assertEqual(self._read(first['css/landing.css'] + '.gz'), gz)
+
+    def test_missing_bundle_member(self):
+        with self.assertRaises(ValueError):
+            build(self.source, self.output, {'js/app.bundle.js': ['js/missing.js']})
+
+    def test_refuses_to_replace_other_directories(self):
+        with self.assertRaises(ValueError):
+            build(self.source, self.source, BUNDLES)
+        self.assertTrue(os.path.exists(os.path.join(self.source, 'css', 'landing.css')))
+
+    def test_manifest(self):
+        assets = build(self.source, self.output, BUNDLES)
+        manifest = AssetManifest.load(self.output)
+        self.assertEqual(manifest.get('css/landing.css'), assets['css/landing.css'])
+        self.assertTrue(manifest.is_built(assets['css/landing.css']))
+        self.assertFalse(manifest.is_built('css/landing.css'))
+        self.assertIn(assets['css/landing.css'], manifest.gzipped)
+        self.assertIsNone(AssetManifest.load(self.source))
+
+    def test_bundle_members(self):
+        self.assertEqual(bundle_members('css/landing.bundle.css'), ['css/normalize.css', 'css/landing.css'])
+        self.assertEqual(bundle_members('images/icon.png'), ['images/icon.png'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from calculator import (ERROR_DIVISION_BY_ZERO, ERROR_INVALID_COMMAND, ERROR_MALFORMED_COMMAND, ERROR_NONE,
+                        ERROR_TANGENT_UNDEFINED)
+from command_parser import CalculationResult, CommandParser
+
+
+class TestCalculationResult(unittest.TestCase):
+    def setUp(self):
+        self.parser = CommandParser()
+
+    def evaluate(self, command):
+        return self.parser.evaluate(self.parser.tokenize(command))
+
+    def test_value_operation_and_operands(self):
+        outcome = self.evaluate("what is 10 divided by 4")
+        self.assertTrue(outcome.ok)
+        self.assertEqual((outcome.value, outcome.error, outcome.message), (2.5, ERROR_NONE, None))
+        self.assertEqual((outcome.operation, outcome.operands), ("division", (10.0, 4.0)))
+        self.assertEqual(outcome.result, 2.5)
+
+    def test_history_entry_is_written_once(self):
+        outcome = self.evaluate("2 power 10")
+        self.assertIsNone(outcome._history_entry)
+        entry = outcome.history_entry
+        self.assertEqual(entry, "2 raised to the power of 10 = 1024.0")
+        self.assertIs(outcome.history_entry, entry)
+
+    def test_history_formats(self):
+        for command, expected in [
+            ("5 plus 3", "5 + 3 = 8"),
+            ("10 by 4", "10 / 4 = 2.50"),
+            ("square root of 2", "√(2) = 1.41"),
+            ("cube root of 27", "∛(27) = 3.0"),
+            ("log of 100", "log(100) = 2"),
+            ("sine of 30", "sin(30) = 0.5"),
+            ("2 plus 3 times 4", "2 + 3 * 4 = 14"),
+            ("10 divided by 0 plus 1", "10 / 0 + 1 = Error: Division by zero"),
+        ]:
+            with self.subTest(command=command):
+                self.assertEqual(self.evaluate(command).history_entry, expected)
+
+    def test_errors_carry_codes(self):
+        outcome = self.evaluate("5 divided by 0")
+        self.assertEqual((outcome.error, outcome.value), (ERROR_DIVISION_BY_ZERO, None))
+        self.assertEqual(outcome.result, "Error: Division by zero")
+        self.assertEqual(self.evaluate("tangent of 90").error, ERROR_TANGENT_UNDEFINED)
+
+        outcome = self.evaluate("what is the weather")
+        self.assertEqual((outcome.error, outcome.result, outcome.history_entry),
+                         (ERROR_INVALID_COMMAND, "Invalid command", ""))
+        outcome = self.evaluate("5 plus")
+        self.assertEqual((outcome.error, outcome.history_entry), (ERROR_MALFORMED_COMMAND, ""))
+        self.assertTrue(outcome.result.startswith("Error: "))
+
+    def test_cached_results(self):
+        outcome = CalculationResult.cached(8.0, "5 + 3 = 8")
+        self.assertEqual((outcome.result, outcome.history_entry, outcome.error), (8.0, "5 + 3 = 8", ERROR_NONE))
+        outcome = CalculationResult.cached("Error: Division by zero", "5 / 0 = Error: Division by zero")
+        self.assertEqual(outcome.error, ERROR_DIVISION_BY_ZERO)
+        self.assertEqual(CalculationResult.cached("Error: x", "").error, ERROR_MALFORMED_COMMAND)
+
+    def test_has_no_instance_dict(self):
+        self.assertFalse(hasattr(self.evaluate("5 plus 3"), "__dict__"))
+
+    def test_parse_command_returns_pairs(self):
+        self.assertEqual(self.parser.parse_command("6 times 7"), (42.0, "6 * 7 = 42"))
+
+
+if __name__ == '__main__':
+    unittest.main()
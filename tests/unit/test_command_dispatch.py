@@ -0,0 +1,86 @@
+import unittest
+from command_parser import CommandParser
+from tests.benchmarks.legacy_parser import LegacyCommandParser
+
+PARITY_COMMANDS = [
+    "what is 5 plus 3",
+    "add 10 and 20",
+    "add 3 and 4",
+    "plus 5",
+    "what is 10 minus 4",
+    "subtract 3 from 8",
+    "8 subtract 3",
+    "what is 6 times 7",
+    "multiply 5 by 5",
+    "what is 10 divided by 2",
+    "divide 9 by 3",
+    "9 by 0",
+    "10 divide 4",
+    "2 power 10",
+    "2 raised to the power of 3",
+    "2 ^ 8",
+    "what is square root of 16",
+    "√ 2",
+    "square root -9",
+    "cube root of 27",
+    "∛ -8",
+    "what is log of 100",
+    "log 0",
+    "what is sine of 30",
+    "cos 60",
+    "tan 45",
+    "sine",
+    "what is the meaning of life",
+    "",
+    "10 divided by",
+]
+
+
+class TestCommandDispatch(unittest.TestCase):
+    def setUp(self):
+        self.parser = CommandParser()
+        self.legacy = LegacyCommandParser()
+
+    def test_matches_legacy_parser(self):
+        for command in PARITY_COMMANDS:
+            with self.subTest(command=command):
+                self.assertEqual(repr(self.parser.parse_command(command)),
+                                 repr(self.legacy.parse_command(command)))
+
+    def test_priority_follows_cascade_order(self):
+        stream = self.parser.tokenize("multiply 6 by 7 plus 1")
+        self.assertEqual(stream.handler.__name__, "_handle_addition")
+
+    def test_tokenize_canonicalizes_tokens(self):
+        stream = self.parser.tokenize("What is the SIN of 30?")
+        self.assertEqual(stream.tokens, ["sine", "30"])
+        self.assertEqual(stream.handler.__name__, "_handle_sine")
+
+    def test_punctuation(self):
+        self.assertEqual(self.parser.tokenize("Add 1.5 and 2.").tokens, ["add", "1.5", "2"])
+        self.assertEqual(self.parser.tokenize("sum of 3,7,12").tokens, ["sum", "3", "7", "12"])
+        self.assertEqual(self.parser.tokenize("2,500 times 1,000,000").tokens, ["2500", "times", "1000000"])
+        self.assertEqual(self.parser.parse_command("What is 2,500 times 3?"), (7500, "2500 * 3 = 7500"))
+
+    def test_repeated_commands_reuse_their_stream(self):
+        stream = self.parser.tokenize("What is 5 plus 3?")
+        self.assertIs(self.parser.tokenize("What is 5 plus 3?"), stream)
+        self.assertEqual(self.parser.parse_command("What is 5 plus 3?"), (8, "5 + 3 = 8"))
+        # Bound values can change between commands
+        self.assertEqual(self.parser.tokenize("x plus 1", bindings={"x": 2.0}).tokens, ["2", "plus", "1"])
+        self.assertEqual(self.parser.tokenize("x plus 1", bindings={"x": 3.0}).tokens, ["3", "plus", "1"])
+
+    def test_unknown_command_has_no_handler(self):
+        self.assertIsNone(self.parser.tokenize("what is the weather").handler)
+
+    def test_grammar_is_versioned(self):
+        grammar = self.parser.grammar()
+        self.assertEqual(grammar, CommandParser().grammar())
+        self.assertIn(["addition", ["add", "plus"]], grammar["dispatch"])
+        self.assertEqual(grammar["history"]["division"], {"template": "{} / {} = {result}", "result": "fixed"})
+
+        self.parser.symbol_map = dict(self.parser.symbol_map, x="times")
+        self.assertNotEqual(self.parser.grammar()["version"], grammar["version"])
+
+if __name__ == '__main__':
+    unittest.main()
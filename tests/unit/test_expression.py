@@ -0,0 +1,60 @@
+import unittest
+
+from command_parser import CommandParser
+from expression import compile_shape
+
+
+class TestExpressionCommands(unittest.TestCase):
+    def setUp(self):
+        self.parser = CommandParser()
+
+    def test_operator_precedence(self):
+        self.assertEqual(self.parser.parse_command("what is 2 plus 3 times 4"), (14, "2 + 3 * 4 = 14"))
+        self.assertEqual(self.parser.parse_command("10 minus 4 minus 3"), (3, "10 - 4 - 3 = 3"))
+        self.assertEqual(self.parser.parse_command("2 power 3 power 2"), (512, "2 ^ 3 ^ 2 = 512"))
+        self.assertEqual(self.parser.parse_command("10 divided by 4 plus 1"), (3.5, "10 / 4 + 1 = 3.5"))
+
+    def test_prefix_operators(self):
+        self.assertEqual(self.parser.parse_command("what is square root of 16 plus 9"), (13, "√(16) + 9 = 13"))
+        self.assertEqual(self.parser.parse_command("sine of 30 times 2"), (1, "sin(30) * 2 = 1"))
+        self.assertEqual(self.parser.parse_command("minus 2 power 2 plus 1"), (-3, "-(2 ^ 2) + 1 = -3"))
+        self.assertEqual(self.parser.parse_command("10 minus minus 5"), (15, "10 - -5 = 15"))
+
+    def test_errors_propagate(self):
+        self.assertEqual(self.parser.parse_command("1 by 0 plus 2"),
+                         ("Error: Division by zero", "1 / 0 + 2 = Error: Division by zero"))
+
+    def test_arithmetic_exceptions_are_invalid_operations(self):
+        invalid = "Error: Invalid operation"
+        self.assertEqual(self.parser.parse_command("10 power 400 plus 1"),
+                         (invalid, "10 ^ 400 + 1 = " + invalid))
+        self.assertEqual(self.parser.parse_command("negative 8 power one half")[0], invalid)
+        self.assertEqual(self.parser.parse_command("0 power negative 1")[0], invalid)
+        self.assertEqual(self.parser.parse_command("1 plus 0 power negative 1 times 2")[0], invalid)
+        program = compile_shape(("#", "power", "#", "plus", "#"))
+        for numbers in ((-8.0, 0.5, 1.0), (0.0, -1.0, 1.0), (10.0, 400.0, 1.0)):
+            with self.subTest(numbers=numbers):
+                self.assertEqual(program.run(numbers), invalid)
+
+    def test_huge_results_use_exponent_notation(self):
+        self.assertEqual(self.parser.parse_command("2 plus 3 power 400"),
+                         (3.0 ** 400, "2 + 3 ^ 400 = 7.055079108655333e+190"))
+
+    def test_single_operation_commands_unchanged(self):
+        self.assertEqual(self.parser.parse_command("multiply 5 by 5"), (25, "5 * 5 = 25"))
+        self.assertEqual(self.parser.parse_command("what is 10 divided by 2"), (5, "10 / 2 = 5.00"))
+        self.assertEqual(self.parser.parse_command("2 raised to the power of 3"),
+                         ("Error: could not convert string to float: 'to'", ""))
+
+    def test_programs_are_cached_by_shape(self):
+        self.parser.parse_command("2 plus 3 times 4")
+        hits = compile_shape.cache_info().hits
+        self.assertEqual(self.parser.parse_command("7 plus 1 times 9"), (16, "7 + 1 * 9 = 16"))
+        self.assertEqual(compile_shape.cache_info().hits, hits + 1)
+
+    def test_incomplete_expression_falls_back(self):
+        self.assertEqual(self.parser.parse_command("2 plus 3 times"), (5, "2 + 3 = 5"))
+        self.assertIsNone(compile_shape(("#", "plus", "plus")))
+
+if __name__ == '__main__':
+    unittest.main()
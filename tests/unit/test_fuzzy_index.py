@@ -0,0 +1,93 @@
+import unittest
+from unittest import mock
+from command_parser import CommandParser
+from fuzzy_index import FuzzyIndex, edit_distance
+
+
+class TestFuzzyIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = FuzzyIndex(["sine", "cosine", "tangent", "plus", "minus", "ten"])
+
+    def test_edit_distance(self):
+        self.assertEqual(edit_distance("plus", "plus"), 0)
+        self.assertEqual(edit_distance("plush", "plus"), 1)
+        self.assertEqual(edit_distance("tangnet", "tangent"), 1)  # transposition
+        self.assertEqual(edit_distance("", "abc"), 3)
+
+    def test_exact_match(self):
+        match = self.index.lookup("minus")
+        self.assertEqual((match.word, match.distance, match.confidence), ("minus", 0, 1.0))
+        self.assertIn("minus", self.index)
+        self.assertEqual(len(self.index), 6)
+
+    def test_closest_word(self):
+        match = self.index.lookup("cosign")
+        self.assertEqual((match.word, match.distance), ("cosine", 2))
+        self.assertAlmostEqual(match.confidence, 1 - 2 / 6)
+
+    def test_no_match_beyond_max_distance(self):
+        self.assertIsNone(self.index.lookup("hello"))
+
+    def test_distance_limit(self):
+        self.assertIsNone(self.index.lookup("cosign", max_distance=1))
+        self.assertEqual(self.index.lookup("plush", max_distance=1).word, "plus")
+        self.assertIsNone(self.index.lookup("plush", max_distance=0))
+
+    def test_ties_go_to_earlier_word(self):
+        index = FuzzyIndex(["tan", "ten"])
+        self.assertEqual(index.lookup("tin").word, "tan")
+
+
+class TestParserCorrection(unittest.TestCase):
+    def setUp(self):
+        self.parser = CommandParser()
+
+    def test_corrects_misheard_keywords(self):
+        for command, expected, correction in [
+            ("what is sign of 30", (0.5, "sin(30) = 0.5"), ("sign", "sin", 0.75)),
+            ("cosign 60", (0.5, "cos(60) = 0.5"), ("cosign", "cosine", 0.67)),
+            ("5 plush 3", (8.0, "5 + 3 = 8"), ("plush", "plus", 0.8)),
+            ("10 devided by 2", (5.0, "10 / 2 = 5.00"), ("devided", "divided", 0.86)),
+        ]:
+            with self.subTest(command=command):
+                stream = self.parser.tokenize(command)
+                self.assertEqual(stream.corrections, (correction,))
+                outcome = self.parser.evaluate(stream)
+                self.assertEqual((outcome.result, outcome.history_entry), expected)
+
+    def test_splits_glued_symbols(self):
+        self.assertEqual(self.parser.parse_command("5+3"), (8.0, "5 + 3 = 8"))
+        self.assertEqual(self.parser.parse_command("10-4"), (6.0, "10 - 4 = 6"))
+        self.assertEqual(self.parser.tokenize("5+3").corrections, ())
+
+    def test_leaves_known_words_alone(self):
+        stream = self.parser.tokenize("what is 5 plus 3")
+        self.assertEqual(stream.corrections, ())
+        # Number words are real words, not a misheard "tan"
+        self.assertNotIn("tangent", self.parser.tokenize("ten plus two").tokens)
+
+    def test_only_commands_with_unknown_words_are_corrected(self):
+        with mock.patch.object(self.parser, '_correct', wraps=self.parser._correct) as correct:
+            self.parser.tokenize("what is the")
+            correct.assert_not_called()
+            # Once a command is left as it was, it is not tried again
+            for _ in range(2):
+                self.assertIsNone(self.parser.tokenize("open the pod bay doors").handler)
+            self.assertEqual(correct.call_count, 1)
+            for _ in range(2):
+                self.assertEqual(self.parser.tokenize("5 plush 3").corrections, (("plush", "plus", 0.8),))
+            self.assertEqual(correct.call_count, 3)
+
+    def test_low_confidence_is_not_corrected(self):
+        self.assertEqual(self.parser.parse_command("what is the meaning of life"), ("Invalid command", ""))
+
+    def test_corrections_must_make_sense(self):
+        # "time" is close to "times", but "what times is it" has no operands
+        self.assertEqual(self.parser.parse_command("what time is it"), ("Invalid command", ""))
+        # float() spellings are not misheard trig functions
+        self.assertEqual(self.parser.parse_command("nan"), ("Invalid command", ""))
+        self.assertEqual(self.parser.tokenize("nan").corrections, ())
+
+    def test_correction_can_be_disabled(self):
+        parser = CommandParser(fuzzy_threshold=None)
+        self.assertEqual(parser.parse_command("5 plush 3"), ("Invalid command", ""))
@@ -0,0 +1,104 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+from history_store import HistoryStore, valid_session
+
+SESSION = 'session-0001'
+
+
+def _append_in_child(directory, worker, count):
+    store = HistoryStore(directory)
+    for i in range(count):
+        store.append(SESSION, {'history_entry': f'{worker}:{i}'})
+
+
+class TestHistoryStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = HistoryStore(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_append_returns_sequence_numbers(self):
+        self.assertEqual([self.store.append(SESSION, {'history_entry': str(i)}) for i in range(3)], [0, 1, 2])
+        self.assertEqual(self.store.count(SESSION), 3)
+
+    def test_pages_newest_first(self):
+        for i in range(45):
+            self.store.append(SESSION, {'history_entry': f'{i} + 0 = {i}'})
+
+        records, cursor, total = self.store.page(SESSION, limit=20)
+        self.assertEqual(total, 45)
+        self.assertEqual([r['seq'] for r in records], list(range(44, 24, -1)))
+        self.assertEqual(records[0]['history_entry'], '44 + 0 = 44')
+        self.assertEqual(cursor, 25)
+
+        records, cursor, _ = self.store.page(SESSION, before=cursor, limit=20)
+        self.assertEqual([r['seq'] for r in records], list(range(24, 4, -1)))
+        records, cursor, _ = self.store.page(SESSION, before=cursor, limit=20)
+        self.assertEqual([r['seq'] for r in records], [4, 3, 2, 1, 0])
+        self.assertIsNone(cursor)
+
+    def test_cursor_is_stable_while_appending(self):
+        for i in range(30):
+            self.store.append(SESSION, {'history_entry': str(i)})
+        _, cursor, _ = self.store.page(SESSION, limit=10)
+        self.store.append(SESSION, {'history_entry': 'new'})
+        records, _, total = self.store.page(SESSION, before=cursor, limit=10)
+        self.assertEqual(total, 31)
+        self.assertEqual(records[0]['history_entry'], '19')
+
+    def test_empty_and_out_of_range(self):
+        self.assertEqual(self.store.page(SESSION), ([], None, 0))
+        self.store.append(SESSION, {'history_entry': 'a'})
+        self.assertEqual(self.store.page(SESSION, before=0), ([], None, 1))
+        self.assertEqual(len(self.store.page(SESSION, before=99)[0]), 1)
+
+    def test_limit_is_capped(self):
+        for i in range(150):
+            self.store.append(SESSION, {'history_entry': str(i)})
+        self.assertEqual(len(self.store.page(SESSION, limit=1000)[0]), 100)
+        self.assertEqual(len(self.store.page(SESSION, limit=0)[0]), 1)
+
+    def test_unicode_entries(self):
+        self.store.append(SESSION, {'history_entry': '∛27 = 3'})
+        self.assertEqual(self.store.page(SESSION)[0][0]['history_entry'], '∛27 = 3')
+
+    def test_clear(self):
+        self.store.append(SESSION, {'history_entry': 'a'})
+        self.store.clear(SESSION)
+        self.assertEqual(self.store.count(SESSION), 0)
+        self.store.clear(SESSION)
+        self.assertEqual(self.store.append(SESSION, {'history_entry': 'b'}), 0)
+
+    def test_sessions_are_separate(self):
+        self.store.append(SESSION, {'history_entry': 'a'})
+        self.assertEqual(self.store.count('session-0002'), 0)
+
+    def test_session_validation(self):
+        self.assertTrue(valid_session('3f2b8c1e-0d4a-4f6e-9b7a-2c5d8e1f0a3b'))
+        for session in ('short', '../../etc/passwd', 'a' * 65, None, 42):
+            self.assertFalse(valid_session(session))
+        with self.assertRaises(ValueError):
+            self.store.append('../escape1', {'history_entry': 'a'})
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires fork')
+    def test_concurrent_appends_from_processes(self):
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=_append_in_child, args=(self.directory, w, 50)) for w in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        records, _, total = self.store.page(SESSION, limit=100)
+        records += self.store.page(SESSION, before=100, limit=100)[0]
+        self.assertEqual(total, 200)
+        self.assertEqual([r['seq'] for r in records], list(range(199, -1, -1)))
+        self.assertEqual(len({r['history_entry'] for r in records}), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
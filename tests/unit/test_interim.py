@@ -0,0 +1,99 @@
+import unittest
+from unittest import mock
+from command_parser import CommandParser, PrefixTokenizer
+from interim import InterimParser
+
+COMMANDS = [
+    'what is twenty five plus three hundred and six',
+    'minus five minus three',
+    'one and a half times four',
+    'what is the square root of sixteen',
+    'two million three hundred thousand divided by 4',
+    'three point one four times two',
+    '10 minus negative four plus 2 times 3',
+    'subtract 3 from 10',
+    '2 to the power of 10',
+    'calcualte 6 tims 7',
+    'What is 5 plus 3?',
+]
+
+
+class TestPrefixTokenizer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.parser = CommandParser()
+
+    def assertSameStream(self, stream, expected):
+        self.assertEqual((stream.command, stream.tokens, stream.handler, stream.corrections),
+                         (expected.command, expected.tokens, expected.handler, expected.corrections))
+
+    def test_every_prefix_matches_tokenize(self):
+        for command in COMMANDS:
+            tokenizer = PrefixTokenizer(self.parser)
+            words = command.split()
+            for end in range(1, len(words) + 1):
+                prefix = ' '.join(words[:end])
+                with self.subTest(prefix=prefix):
+                    self.assertSameStream(tokenizer.update(prefix), self.parser.tokenize(prefix))
+
+    def test_revised_words_match_tokenize(self):
+        tokenizer = PrefixTokenizer(self.parser)
+        for transcript in ['what is twenty', 'what is twenty five', 'what is twenty five plus thirty',
+                           'what is twenty nine plus thirteen', 'what is 29 plus 13', 'what is']:
+            with self.subTest(transcript=transcript):
+                self.assertSameStream(tokenizer.update(transcript), self.parser.tokenize(transcript))
+
+    def test_numbers_before_the_change_are_not_converted_again(self):
+        tokenizer = PrefixTokenizer(self.parser)
+        tokenizer.update('twenty five plus three hundred times')
+        with mock.patch.object(self.parser._numbers, 'convert', wraps=self.parser._numbers.convert) as convert:
+            stream = tokenizer.update('twenty five plus three hundred times four')
+        self.assertEqual(stream.tokens, ['25', 'plus', '300', 'times', '4'])
+        convert.assert_called_once_with(['four'])
+
+
+class TestInterimParser(unittest.TestCase):
+    def setUp(self):
+        self.parser = CommandParser()
+        self.interim = InterimParser(self.parser, max_utterances=2)
+
+    def test_result_once_complete(self):
+        self.assertEqual(self.interim.update('u1', 'what is five plus'),
+                         {'utterance': 'u1', 'complete': False, 'final': False})
+        self.assertEqual(self.interim.update('u1', 'what is five plus three'),
+                         {'utterance': 'u1', 'complete': True, 'final': False,
+                          'result': 8.0, 'history_entry': '5 + 3 = 8'})
+        self.assertEqual(self.interim.update('u1', 'what is five plus thirty')['result'], 35.0)
+
+    def test_same_tokens_reuse_the_result(self):
+        self.interim.update('u1', 'five times six')
+        with mock.patch.object(self.parser, 'evaluate') as evaluate:
+            reply = self.interim.update('u1', 'five times six?')
+        evaluate.assert_not_called()
+        self.assertEqual(reply['result'], 30.0)
+
+    def test_prefixes_stay_out_of_the_result_cache(self):
+        self.parser.result_cache = mock.Mock()
+        for transcript in ('six', 'six times', 'six times seven'):
+            self.interim.update('u1', transcript)
+        self.interim.update('u1', 'six times seven', final=True)
+        self.parser.result_cache.get.assert_not_called()
+        self.parser.result_cache.put.assert_not_called()
+
+    def test_errors_are_not_complete(self):
+        self.assertFalse(self.interim.update('u1', 'ten divided by zero')['complete'])
+        self.assertFalse(self.interim.update('u2', 'hello')['complete'])
+
+    def test_final_and_eviction_drop_state(self):
+        self.interim.update('u1', 'one plus')
+        self.interim.update('u1', 'one plus two', final=True)
+        self.assertEqual(len(self.interim), 0)
+        for utterance in ('u1', 'u2', 'u3'):
+            self.interim.update(utterance, 'one plus one')
+        self.assertEqual(len(self.interim), 2)
+        # An evicted utterance starts over with the same answer
+        self.assertEqual(self.interim.update('u1', 'one plus one')['result'], 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
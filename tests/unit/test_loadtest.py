@@ -0,0 +1,68 @@
+import math
+import threading
+import unittest
+from werkzeug.serving import make_server
+
+import loadtest
+from app import create_app
+from tests.benchmarks.corpus import CORPUS
+
+
+class TestSummary(unittest.TestCase):
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(loadtest.percentile(values, 50), 50)
+        self.assertEqual(loadtest.percentile(values, 99), 99)
+        self.assertEqual(loadtest.percentile(values, 100), 100)
+        self.assertEqual(loadtest.percentile([7], 95), 7)
+        self.assertTrue(math.isnan(loadtest.percentile([], 50)))
+
+    def test_summarize(self):
+        samples = [loadtest.Sample('addition', 0.001 * i, 200) for i in range(1, 99)]
+        samples += [loadtest.Sample('division', 0.5, 429), loadtest.Sample('division', 0.5, 0)]
+        summary = loadtest.summarize(samples, duration=2.0)
+        self.assertEqual(summary['requests'], 100)
+        self.assertEqual(summary['throughput'], 50.0)
+        self.assertEqual(summary['errors'], 2)
+        self.assertEqual(summary['error_rate'], 0.02)
+        self.assertEqual(summary['statuses'], {'200': 98, '429': 1, '0': 1})
+        self.assertEqual(summary['latency_ms']['p50'], 50.0)
+        self.assertEqual(summary['latency_ms']['p99'], 500.0)
+        self.assertEqual(summary['families']['division']['errors'], 2)
+
+    def test_corpus_covers_every_family(self):
+        items, weights = loadtest.weighted_corpus()
+        self.assertEqual({family for family, _ in items}, set(CORPUS))
+        self.assertEqual(len(items), len(weights))
+
+
+class TestDrive(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = make_server('127.0.0.1', 0, create_app({'WARM_UP': False}), threaded=True)
+        cls.url = f'http://127.0.0.1:{cls.server.server_port}'
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.thread.join()
+
+    def test_closed_loop(self):
+        samples = loadtest.drive(self.url, duration=0.3, concurrency=2)
+        self.assertGreater(len(samples), 0)
+        self.assertTrue(all(sample.status == 200 for sample in samples))
+
+    def test_open_loop_keeps_the_rate(self):
+        samples = loadtest.drive(self.url, duration=0.5, concurrency=2, rate=40, warmup=0.1)
+        self.assertEqual(len(samples), 20)
+
+    def test_connection_errors_are_counted(self):
+        samples = loadtest.drive('http://127.0.0.1:9', duration=0.1, concurrency=1, rate=20)
+        self.assertTrue(samples)
+        self.assertTrue(all(sample.status == 0 for sample in samples))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+from metrics import ARCHIVE_NAME, Metrics, retire_process
+
+
+def _record_in_child(directory, count):
+    metrics = Metrics(directory)
+    requests = metrics.counter('requests_total', 'Requests.', ('status',))
+    latency = metrics.histogram('latency_seconds', 'Latency.', buckets=(0.1, 1.0))
+    for _ in range(count):
+        requests.inc('200')
+        latency.observe(0.5)
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _registry(self, directory=None):
+        metrics = Metrics(directory)
+        requests = metrics.counter('requests_total', 'Requests.', ('status',))
+        latency = metrics.histogram('latency_seconds', 'Latency.', buckets=(0.1, 1.0))
+        return metrics, requests, latency
+
+    def test_counter_and_histogram_rendering(self):
+        metrics, requests, latency = self._registry()
+        requests.inc('200')
+        requests.inc('200')
+        requests.inc('400', amount=3)
+        latency.observe(0.05)
+        latency.observe(0.5)
+        latency.observe(5)
+        lines = metrics.render().splitlines()
+        self.assertIn('# TYPE requests_total counter', lines)
+        self.assertIn('requests_total{status="200"} 2.0', lines)
+        self.assertIn('requests_total{status="400"} 3.0', lines)
+        self.assertIn('# TYPE latency_seconds histogram', lines)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1.0', lines)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 2.0', lines)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 3.0', lines)
+        self.assertIn('latency_seconds_sum 5.55', lines)
+        self.assertIn('latency_seconds_count 3.0', lines)
+
+    def test_timed_block_is_observed(self):
+        metrics, _, latency = self._registry()
+        for _ in range(2):
+            with latency.time():
+                pass
+        with self.assertRaises(ValueError):
+            with latency.time():
+                raise ValueError
+        lines = metrics.render().splitlines()
+        self.assertIn('latency_seconds_bucket{le="0.1"} 3.0', lines)
+        self.assertIn('latency_seconds_count 3.0', lines)
+
+    def test_label_values_are_escaped(self):
+        metrics, requests, _ = self._registry()
+        requests.inc('say "hi"\\')
+        self.assertIn('requests_total{status="say \\"hi\\"\\\\"} 1.0', metrics.render())
+
+    def test_file_grows_past_initial_size(self):
+        metrics, requests, _ = self._registry(self.directory)
+        for i in range(5000):
+            requests.inc(f'status-{i}')
+        rendered = metrics.render()
+        self.assertIn('requests_total{status="status-0"} 1.0', rendered)
+        self.assertIn('requests_total{status="status-4999"} 1.0', rendered)
+
+    def test_reopened_file_keeps_counts(self):
+        _record_in_child(self.directory, 2)
+        _record_in_child(self.directory, 3)
+        metrics, _, _ = self._registry(self.directory)
+        self.assertIn('requests_total{status="200"} 5.0', metrics.render())
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires fork')
+    def test_aggregates_across_processes(self):
+        metrics, requests, _ = self._registry(self.directory)
+        requests.inc('200')
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=_record_in_child, args=(self.directory, 10)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(len(os.listdir(self.directory)), 4)
+        lines = metrics.render().splitlines()
+        self.assertIn('requests_total{status="200"} 31.0', lines)
+        self.assertIn('latency_seconds_count 30.0', lines)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires fork')
+    def test_exited_workers_are_folded_into_the_archive(self):
+        metrics, requests, _ = self._registry(self.directory)
+        requests.inc('200')
+        context = multiprocessing.get_context('fork')
+        for _ in range(3):
+            worker = context.Process(target=_record_in_child, args=(self.directory, 10))
+            worker.start()
+            worker.join()
+            retire_process(self.directory, worker.pid)
+        retire_process(self.directory, 999999999)  # no file: nothing to do
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted([ARCHIVE_NAME, f'metrics_{os.getpid()}.db']))
+        lines = metrics.render().splitlines()
+        self.assertIn('requests_total{status="200"} 31.0', lines)
+        self.assertIn('latency_seconds_count 30.0', lines)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from command_parser import CommandParser
+from number_words import NumberWordRecognizer, format_number
+
+
+class TestNumberWordRecognizer(unittest.TestCase):
+    def setUp(self):
+        self.recognizer = NumberWordRecognizer()
+
+    def convert(self, text):
+        return self.recognizer.convert(text.split())
+
+    def test_cardinals(self):
+        self.assertEqual(self.convert("seven"), ["7"])
+        self.assertEqual(self.convert("twenty five"), ["25"])
+        self.assertEqual(self.convert("one hundred five"), ["105"])
+        self.assertEqual(self.convert("twenty five hundred"), ["2500"])
+        self.assertEqual(self.convert("one million two hundred"), ["1000200"])
+        self.assertEqual(self.convert("five hundred twenty six thousand four hundred eleven"), ["526411"])
+        self.assertEqual(self.convert("a thousand"), ["1000"])
+
+    def test_decimals(self):
+        self.assertEqual(self.convert("three point one four"), ["3.14"])
+        self.assertEqual(self.convert("point five"), ["0.5"])
+        self.assertEqual(self.convert("zero point zero five"), ["0.05"])
+
+    def test_fractions(self):
+        self.assertEqual(self.convert("a half"), ["0.5"])
+        self.assertEqual(self.convert("three quarters"), ["0.75"])
+        self.assertEqual(self.convert("one a half"), ["1.5"])  # "one and a half" after filtering
+
+    def test_numerals_with_magnitude_words(self):
+        self.assertEqual(self.convert("2.5 million"), ["2500000"])
+        self.assertEqual(self.convert("3 hundred"), ["300"])
+        self.assertEqual(self.convert("5 plus 3"), ["5", "plus", "3"])
+
+    def test_negatives(self):
+        self.assertEqual(self.convert("negative 9"), ["-9"])
+        self.assertEqual(self.convert("minus five plus three"), ["-5", "plus", "3"])
+        self.assertEqual(self.convert("sine minus thirty"), ["sine", "-30"])
+        # Binary minus and minus before a numeral are left to the parser
+        self.assertEqual(self.convert("ten minus four"), ["10", "minus", "4"])
+        self.assertEqual(self.convert("minus 4"), ["minus", "4"])
+
+    def test_separate_numbers_stay_separate(self):
+        self.assertEqual(self.convert("five six"), ["5", "6"])
+        self.assertEqual(self.convert("twenty thirty"), ["20", "30"])
+
+    def test_incomplete_spans_are_given_back(self):
+        self.assertEqual(self.convert("three point plus"), ["3", "point", "plus"])
+        self.assertEqual(self.convert("a sine"), ["a", "sine"])
+
+    def test_number_words_mark_every_conversion(self):
+        # Tokens without one of them are returned unchanged, so the parser skips convert()
+        for text in ("minus 4", "a 5 minus 3", "10 minus 4", "2.5 plus a"):
+            with self.subTest(text=text):
+                self.assertTrue(self.recognizer.number_words.isdisjoint(text.split()))
+                self.assertEqual(self.convert(text), text.split())
+        self.assertIn("half", self.recognizer.number_words)
+        self.assertNotIn("minus", self.recognizer.number_words)
+
+    def test_format_number(self):
+        self.assertEqual(format_number(2.0), "2")
+        self.assertEqual(format_number(0.25), "0.25")
+        self.assertEqual(format_number(-7), "-7")
+
+
+class TestParserNumberWords(unittest.TestCase):
+    def setUp(self):
+        self.parser = CommandParser()
+
+    def test_spoken_numbers(self):
+        for command, expected in [
+            ("5 plus three", (8.0, "5 + 3 = 8")),
+            ("twenty five plus three point five", (28.5, "25 + 3.5 = 28.5")),
+            ("what is minus five plus three", (-2.0, "-5 + 3 = -2")),
+            ("two and a half times four", (10.0, "2.5 * 4 = 10")),
+            ("square root of sixty four", (8.0, "√(64) = 8")),
+            ("log of a thousand", (3.0, "log(1000) = 3")),
+        ]:
+            with self.subTest(command=command):
+                self.assertEqual(self.parser.parse_command(command), expected)
+
+    def test_spoken_and_written_numbers_share_a_cache_key(self):
+        self.assertEqual(self.parser.tokenize("five plus three").key, self.parser.tokenize("5 plus 3").key)
+
+
+if __name__ == '__main__':
+    unittest.main()
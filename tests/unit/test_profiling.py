@@ -0,0 +1,83 @@
+import itertools
+import os
+import pstats
+import shutil
+import tempfile
+import unittest
+from profiling import RequestProfiler, StackCollector
+
+
+def fib(n):
+    return n if n < 2 else fib(n - 1) + fib(n - 2)
+
+
+def work():
+    return sorted(fib(n) for n in range(12))
+
+
+class TestStackCollector(unittest.TestCase):
+    def test_stacks_attribute_self_time(self):
+        ticks = itertools.count()
+        collector = StackCollector(clock=lambda: next(ticks) / 1e6)
+        self.assertEqual(collector.run(work), sorted(fib(n) for n in range(12)))
+
+        lines = collector.collapsed().splitlines()
+        stacks = {line.rpartition(' ')[0] for line in lines}
+        self.assertTrue(all(int(line.rpartition(' ')[2]) > 0 for line in lines))
+        self.assertTrue(any(stack.startswith('work (test_profiling.py') for stack in stacks))
+        self.assertTrue(any(stack.count('fib (test_profiling.py') >= 3 for stack in stacks))
+        self.assertTrue(any(stack.endswith('builtins.sorted') for stack in stacks))
+
+
+class TestRequestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_token_and_sampling(self):
+        profiler = RequestProfiler(self.directory, token='secret')
+        self.assertTrue(profiler.wanted('secret'))
+        self.assertFalse(profiler.wanted('guess'))
+        self.assertFalse(profiler.wanted(None))
+        self.assertTrue(RequestProfiler(self.directory, sample_rate=1).wanted(None))
+        # Without a configured token no header is accepted
+        self.assertFalse(RequestProfiler(self.directory).authorized(''))
+
+    def test_writes_pstats(self):
+        profiler = RequestProfiler(self.directory)
+        result, name = profiler.run(work, 'calculate')
+        self.assertEqual(result, sorted(fib(n) for n in range(12)))
+        self.assertTrue(name.endswith('-calculate.prof'))
+        stats = pstats.Stats(profiler.path(name))
+        self.assertTrue(any(function == 'fib' for _, _, function in stats.stats))
+
+    def test_writes_collapsed_stacks(self):
+        profiler = RequestProfiler(self.directory, output_format='collapsed')
+        _, name = profiler.run(work, 'calculate')
+        self.assertTrue(name.endswith('.folded'))
+        with open(profiler.path(name), encoding='utf-8') as f:
+            self.assertIn('fib (test_profiling.py', f.read())
+
+    def test_keeps_newest_profiles(self):
+        profiler = RequestProfiler(self.directory, max_files=3)
+        names = [profiler.run(work, 'calculate')[1] for _ in range(5)]
+        self.assertEqual([profile['name'] for profile in profiler.list()], names[:1:-1])
+        self.assertEqual(len(os.listdir(self.directory)), 3)
+
+    def test_path_rejects_other_files(self):
+        profiler = RequestProfiler(self.directory)
+        with open(os.path.join(self.directory, 'notes.txt'), 'w') as f:
+            f.write('x')
+        self.assertIsNone(profiler.path('notes.txt'))
+        self.assertIsNone(profiler.path('../profiling.py'))
+        self.assertEqual(profiler.list(), [])
+
+    def test_rejects_unknown_format(self):
+        with self.assertRaises(ValueError):
+            RequestProfiler(self.directory, output_format='svg')
+
+
+if __name__ == '__main__':
+    unittest.main()
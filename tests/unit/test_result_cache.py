@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from command_parser import CommandParser
+from result_cache import ResultCache
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'cache.sqlite3')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_hit_and_miss_counters(self):
+        cache = ResultCache(self.path)
+        self.assertIsNone(cache.get('5 plus 3'))
+        cache.put('5 plus 3', [8.0, '5 + 3 = 8'])
+        self.assertEqual(cache.get('5 plus 3'), [8.0, '5 + 3 = 8'])
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 1, 1))
+
+    def test_shared_between_instances_and_survives_restart(self):
+        ResultCache(self.path).put('6 times 7', [42.0, '6 * 7 = 42'])
+        other = ResultCache(self.path)
+        self.assertEqual(other.get('6 times 7'), [42.0, '6 * 7 = 42'])
+
+    def test_version_change_discards_results(self):
+        ResultCache(self.path, version='a').put('k', 1)
+        self.assertIsNone(ResultCache(self.path, version='b').get('k'))
+
+    def test_lru_eviction(self):
+        cache = ResultCache(self.path, capacity=2, local_capacity=0)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        stats = cache.stats()
+        self.assertEqual((stats['evictions'], stats['size']), (1, 2))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+
+    def test_parser_uses_normalized_tokens_as_key(self):
+        cache = ResultCache(self.path)
+        parser = CommandParser(result_cache=cache)
+        self.assertEqual(parser.parse_command('What is 5 plus 3?'), (8.0, '5 + 3 = 8'))
+        self.assertEqual(parser.parse_command('5 + 3'), (8.0, '5 + 3 = 8'))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(parser.parse_command('what is 5 by 0'), ('Error: Division by zero', '5 / 0 = Error: Division by zero'))
+        self.assertEqual(parser.parse_command('5 by 0'), ('Error: Division by zero', '5 / 0 = Error: Division by zero'))
+
+    def test_commands_sharing_a_key_share_a_result(self):
+        # Whichever phrasing is evaluated first, both get the same answer
+        for first, second in (('add 10 and 20', 'add 10 the 20'), ('add 10 the 20', 'add 10 and 20')):
+            with self.subTest(first=first):
+                shutil.rmtree(self.tmpdir)
+                os.makedirs(self.tmpdir)
+                parser = CommandParser(result_cache=ResultCache(self.path))
+                self.assertEqual(parser.parse_command(first), (30.0, '10 + 20 = 30'))
+                self.assertEqual(parser.parse_command(second), (30.0, '10 + 20 = 30'))
+
+if __name__ == '__main__':
+    unittest.main()
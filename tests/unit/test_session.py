@@ -0,0 +1,70 @@
+import json
+import unittest
+from session import SessionProtocol
+
+
+def _evaluate(item):
+    command = item.get('command')
+    if not command:
+        return {'error': 'No command provided'}
+    return {'command': command, 'result': len(command), 'history_entry': command}
+
+
+class FakeSocket:
+    """Replays queued messages, then closes like a dropped connection."""
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.sent = []
+
+    def receive(self, timeout=None):
+        if not self.messages:
+            raise ConnectionError('closed')
+        return self.messages.pop(0)
+
+    def send(self, text):
+        self.sent.append(json.loads(text))
+
+
+class TestSessionProtocol(unittest.TestCase):
+    def setUp(self):
+        self.protocol = SessionProtocol(_evaluate, heartbeat_interval=0.01)
+
+    def test_calculate_reply_echoes_id(self):
+        reply = self.protocol.handle_message('{"type": "calculate", "id": 7, "command": "abc"}')
+        self.assertEqual(reply, {'type': 'result', 'id': 7, 'command': 'abc',
+                                 'result': 3, 'history_entry': 'abc'})
+
+    def test_type_defaults_to_calculate(self):
+        self.assertEqual(self.protocol.handle_message('{"command": "ab"}')['result'], 2)
+
+    def test_errors(self):
+        self.assertEqual(self.protocol.handle_message('{"id": "x"}'),
+                         {'type': 'error', 'id': 'x', 'error': 'No command provided'})
+        self.assertEqual(self.protocol.handle_message('not json')['error'], 'Invalid JSON message')
+        self.assertEqual(self.protocol.handle_message('[1]')['error'], 'Invalid JSON message')
+        self.assertEqual(self.protocol.handle_message('{"type": "bogus", "id": 1}'),
+                         {'type': 'error', 'id': 1, 'error': 'Unknown message type: bogus'})
+
+    def test_ping(self):
+        self.assertEqual(self.protocol.handle_message('{"type": "ping", "id": 2}'),
+                         {'type': 'pong', 'id': 2})
+
+    def test_interim(self):
+        protocol = SessionProtocol(_evaluate, interim=lambda message: {'utterance': message['utterance'],
+                                                                       'complete': False})
+        self.assertEqual(protocol.handle_message('{"type": "interim", "id": 3, "utterance": "u"}'),
+                         {'type': 'interim', 'id': 3, 'utterance': 'u', 'complete': False})
+        # Without an interim handler the type is unknown
+        self.assertEqual(self.protocol.handle_message('{"type": "interim"}')['type'], 'error')
+
+    def test_serve_sends_heartbeat_when_idle(self):
+        ws = FakeSocket(['{"id": 1, "command": "a"}', None, b'{"type": "ping"}'])
+        with self.assertRaises(ConnectionError):
+            self.protocol.serve(ws)
+        self.assertEqual([message['type'] for message in ws.sent], ['result', 'heartbeat', 'pong'])
+        self.assertEqual(ws.sent[1]['status'], 'healthy')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+import random
+import statistics
+import unittest
+
+from calculator import Calculator, ERROR_MESSAGES, ERROR_NOT_ENOUGH_VALUES
+from command_parser import CommandParser
+from stats import MAX_NUMBER_LENGTH, QuantileSketch, RunningStats, Summary, parse_numbers
+
+NOT_ENOUGH = ERROR_MESSAGES[ERROR_NOT_ENOUGH_VALUES]
+
+
+class TestRunningStats(unittest.TestCase):
+    def test_matches_statistics_module(self):
+        rng = random.Random(3)
+        values = [rng.uniform(-1e6, 1e6) for _ in range(5000)]
+        stats = RunningStats()
+        for x in values:
+            stats.add(x)
+        self.assertEqual(stats.count, 5000)
+        self.assertAlmostEqual(stats.mean, statistics.fmean(values), places=6)
+        self.assertAlmostEqual(stats.variance / statistics.variance(values), 1.0, places=12)
+        self.assertEqual((stats.minimum, stats.maximum), (min(values), max(values)))
+
+    def test_variance_is_stable_for_large_offsets(self):
+        stats = RunningStats()
+        for x in (1e9 + 4, 1e9 + 7, 1e9 + 13, 1e9 + 16):
+            stats.add(x)
+        self.assertAlmostEqual(stats.variance, 30.0)
+
+    def test_too_few_values(self):
+        stats = RunningStats()
+        stats.add(5.0)
+        self.assertIsNone(stats.variance)
+        self.assertIsNone(stats.standard_deviation)
+
+
+class TestSummary(unittest.TestCase):
+    def test_short_lists_are_exact(self):
+        summary = Summary().extend([40, 3, 12, 7])
+        self.assertTrue(summary.exact)
+        self.assertEqual(summary.median, 9.5)
+        self.assertAlmostEqual(summary.quantile(0.9), 31.6)
+        self.assertEqual((summary.quantile(0), summary.quantile(1)), (3, 40))
+        self.assertIsNone(Summary().median)
+
+    def test_sketch_estimates_long_streams(self):
+        rng = random.Random(11)
+        values = [rng.gauss(50, 10) for _ in range(50000)]
+        summary = Summary((0.1, 0.5, 0.99), exact_limit=500).extend(values)
+        self.assertFalse(summary.exact)
+        ordered = sorted(values)
+        for q in (0.1, 0.5, 0.99):
+            with self.subTest(q=q):
+                self.assertAlmostEqual(summary.quantile(q), ordered[int(q * len(ordered))], delta=0.2)
+        with self.assertRaises(KeyError):
+            summary.quantile(0.75)
+
+    def test_sketch_handles_sorted_input(self):
+        sketch = QuantileSketch(0.5, [0.0, 1.0, 2.0, 3.0, 4.0])
+        for x in range(5, 10001):
+            sketch.add(float(x))
+        self.assertAlmostEqual(sketch.estimate, 5000, delta=5)
+
+    def test_sketch_needs_five_values(self):
+        with self.assertRaises(ValueError):
+            QuantileSketch(0.5, [1.0, 2.0])
+
+
+class TestParseNumbers(unittest.TestCase):
+    def test_separators_and_chunk_boundaries(self):
+        self.assertEqual(list(parse_numbers([b"1, 2.", b"5\n-3;4e", b"2  "])), [1, 2.5, -3, 400])
+
+    def test_rejects_overlong_tokens(self):
+        def endless():
+            while True:
+                yield b"1" * 4096
+        with self.assertRaises(ValueError):
+            next(parse_numbers(endless()))
+        with self.assertRaises(ValueError):
+            list(parse_numbers([b"1 " + b"2" * (MAX_NUMBER_LENGTH + 1) + b" 3"]))
+        self.assertEqual(list(parse_numbers([b"0" * MAX_NUMBER_LENGTH])), [0])
+
+    def test_rejects_non_numbers(self):
+        for text in (b"1 two 3", b"1 nan", b"inf"):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    list(parse_numbers([text]))
+
+
+class TestCalculatorStatistics(unittest.TestCase):
+    def test_statistics(self):
+        values = [3.0, 7.0, 12.0, 40.0]
+        self.assertEqual(Calculator.sum(values), 62)
+        self.assertEqual(Calculator.mean(values), 15.5)
+        self.assertEqual(Calculator.median(values), 9.5)
+        self.assertEqual(Calculator.percentile(values, 90), 31.6)
+        self.assertEqual(Calculator.variance(values), 280.33)
+        self.assertEqual(Calculator.standard_deviation(values), 16.74)
+        self.assertEqual((Calculator.minimum(values), Calculator.maximum(values)), (3, 40))
+
+    def test_accepts_iterators(self):
+        self.assertEqual(Calculator.mean(float(x) for x in range(101)), 50)
+
+    def test_not_enough_values(self):
+        for name in ("sum", "mean", "median", "variance", "standard_deviation", "minimum", "maximum"):
+            with self.subTest(name=name):
+                self.assertEqual(getattr(Calculator, name)([]), NOT_ENOUGH)
+        self.assertEqual(Calculator.variance([5.0]), NOT_ENOUGH)
+
+
+class TestStatisticCommands(unittest.TestCase):
+    def setUp(self):
+        self.parser = CommandParser()
+
+    def test_spoken_lists(self):
+        cases = {
+            "What is the average of 3, 7, 12 and 40?": (15.5, "mean(3, 7, 12, 40) = 15.5"),
+            "median of three, seven, twelve and forty": (9.5, "median(3, 7, 12, 40) = 9.5"),
+            "sum of 10, 20 and 30": (60, "sum(10, 20, 30) = 60"),
+            "90th percentile of 3, 7, 12 and 40": (31.6, "p90(3, 7, 12, 40) = 31.6"),
+            "standard deviation of 2 4 4 4 5 5 7 9": (2.14, "stdev(2, 4, 4, 4, 5, 5, 7, 9) = 2.14"),
+            "largest of 3 and -8": (3, "max(3, -8) = 3"),
+            "average of 3,7,12": (7.33, "mean(3, 7, 12) = 7.33"),
+            "sum of 1.5, 2.5 and 3": (7, "sum(1.5, 2.5, 3) = 7"),
+            "sum of 1,000, 2,500 and 3": (3503, "sum(1000, 2500, 3) = 3503"),
+            "smallest of minus 3 and 2": (-3, "min(-3, 2) = -3"),
+            "90th percentile of minus 3, 7 and 12": (11, "p90(-3, 7, 12) = 11"),
+        }
+        for command, expected in cases.items():
+            with self.subTest(command=command):
+                self.assertEqual(self.parser.parse_command(command), expected)
+
+    def test_arithmetic_after_a_list(self):
+        cases = {
+            "the max of 3 and 8 plus 2": (10, "max(3, 8) + 2 = 10"),
+            "the max of 9 and 3 plus 2": (11, "max(9, 3) + 2 = 11"),
+            "sum of 1, 2 and 3 divided by 2": (3, "sum(1, 2, 3) / 2 = 3"),
+            "90th percentile of 3, 7, 12 and 40 times minus 1": (-31.6, "p90(3, 7, 12, 40) * -1 = -31.6"),
+            "smallest of 5 and minus 3 plus 2 times 4": (5, "min(5, -3) + 2 * 4 = 5"),
+        }
+        for command, expected in cases.items():
+            with self.subTest(command=command):
+                self.assertEqual(self.parser.parse_command(command), expected)
+
+    def test_spoken_lists_in_other_locales(self):
+        cases = {
+            ("es", "el promedio de 3, 7 y 12"): (7.33, "mean(3, 7, 12) = 7.33"),
+            ("es", "la suma de 10, 20 y 30"): (60, "sum(10, 20, 30) = 60"),
+            ("es", "desviación estándar de 2 4 4 4 5 5 7 9"): (2.14, "stdev(2, 4, 4, 4, 5, 5, 7, 9) = 2.14"),
+            ("de", "das 90. Perzentil von 3, 7, 12 und 40"): (31.6, "p90(3, 7, 12, 40) = 31.6"),
+            ("de", "das Maximum von 3 und minus 8"): (3, "max(3, -8) = 3"),
+            ("hi", "3, 7, 12 और 40 की माध्यिका"): (9.5, "median(3, 7, 12, 40) = 9.5"),
+            ("hi", "3, 7, 12 और 40 का 90 प्रतिशतक"): (31.6, "p90(3, 7, 12, 40) = 31.6"),
+        }
+        for (locale, command), expected in cases.items():
+            with self.subTest(locale=locale, command=command):
+                self.assertEqual(self.parser.parse_command(command, locale=locale), expected)
+
+    def test_errors(self):
+        self.assertEqual(self.parser.parse_command("variance of 5")[0], NOT_ENOUGH)
+        self.assertEqual(self.parser.parse_command("average of")[0], "Error: Could not find values for mean")
+        self.assertEqual(self.parser.parse_command("percentile of 3 and 4")[0], "Error: Could not find which percentile")
+
+
+if __name__ == "__main__":
+    unittest.main()
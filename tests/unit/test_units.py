@@ -0,0 +1,121 @@
+import io
+import json
+import unittest
+
+import numpy as np
+
+import batch_eval
+import units
+from calculator import Calculator, ERROR_INCOMPATIBLE_UNITS, ERROR_MESSAGES
+from command_parser import CommandParser
+from vector_calculator import VectorCalculator
+
+
+class TestConversionTable(unittest.TestCase):
+    def test_every_pair_of_a_dimension_is_precomputed(self):
+        for dimension, (base, definitions) in units.DEFINITIONS.items():
+            members = [base, *definitions]
+            for a in members:
+                for b in members:
+                    self.assertIn((a, b), units.CONVERSIONS)
+        self.assertEqual(len(units.CONVERSIONS),
+                         sum((len(d) + 1) ** 2 for _, d in units.DEFINITIONS.values()))
+
+    def test_chained_definitions_compose(self):
+        self.assertAlmostEqual(units.conversion("mile", "foot")[0], 5280)
+        self.assertAlmostEqual(units.conversion("teaspoon", "milliliter")[0], 4.92892159375)
+        scale, offset = units.conversion("fahrenheit", "kelvin")
+        self.assertAlmostEqual(scale * 32 + offset, 273.15)
+
+    def test_round_trips(self):
+        for (a, b), (scale, offset) in units.CONVERSIONS.items():
+            back_scale, back_offset = units.CONVERSIONS[b, a]
+            self.assertAlmostEqual((37.5 * scale + offset) * back_scale + back_offset, 37.5, places=6)
+
+    def test_different_dimensions_do_not_convert(self):
+        self.assertIsNone(units.conversion("mile", "kilogram"))
+        self.assertEqual(Calculator.convert(5, "mile", "kilogram"), ERROR_MESSAGES[ERROR_INCOMPATIBLE_UNITS])
+
+    def test_unconnected_definitions_are_rejected(self):
+        with self.assertRaises(ValueError):
+            units._to_base("meter", {"foot": (12.0, 0.0, "inch")})
+
+    def test_calculator_convert(self):
+        self.assertEqual(Calculator.convert(5, "mile", "kilometer"), 8.05)
+        self.assertEqual(Calculator.convert(72, "fahrenheit", "celsius"), 22.22)
+        self.assertEqual(Calculator.convert(-40, "celsius", "fahrenheit"), -40)
+        self.assertEqual(Calculator.convert(1, "kibibyte", "bit"), 8192)
+
+
+class TestVectorConversion(unittest.TestCase):
+    def test_matches_scalar(self):
+        x = np.random.default_rng(7).uniform(-1000, 1000, 2000).round(3)
+        for a, b in (("mile", "kilometer"), ("fahrenheit", "celsius"), ("gigabyte", "mebibyte"), ("cup", "tablespoon")):
+            with self.subTest(pair=(a, b)):
+                expected = [Calculator.convert(float(v), a, b) for v in x]
+                self.assertEqual(list(VectorCalculator.convert(x, a, b).messages()), expected)
+
+    def test_incompatible_units_flag_every_element(self):
+        result = VectorCalculator.convert([1, 2], "hour", "liter")
+        self.assertEqual(list(result.errors), [ERROR_INCOMPATIBLE_UNITS] * 2)
+        self.assertTrue(np.isnan(result.values).all())
+
+
+class TestConversionCommands(unittest.TestCase):
+    def setUp(self):
+        self.parser = CommandParser()
+
+    def test_spoken_conversions(self):
+        cases = {
+            "convert 5 miles to kilometers": (8.05, "5 mi in km = 8.05"),
+            "What is 72 degrees Fahrenheit in Celsius?": (22.22, "72 °F in °C = 22.22"),
+            "how many feet in 3 miles": (15840, "3 mi in ft = 15840"),
+            "convert five kg into pounds": (11.02, "5 kg in lb = 11.02"),
+            "2 hours in minutes": (120, "2 h in min = 120"),
+        }
+        for command, expected in cases.items():
+            with self.subTest(command=command):
+                self.assertEqual(self.parser.parse_command(command), expected)
+
+    def test_errors(self):
+        self.assertEqual(self.parser.parse_command("convert 5 miles to kilograms")[0],
+                         ERROR_MESSAGES[ERROR_INCOMPATIBLE_UNITS])
+        self.assertEqual(self.parser.parse_command("convert miles to km")[0], "Error: Could not find value to convert")
+        self.assertEqual(self.parser.parse_command("convert 5 miles")[0],
+                         "Error: Could not find units to convert between")
+
+    def test_arithmetic_outranks_units(self):
+        self.assertEqual(self.parser.parse_command("what is 2 plus 3 meters"), (5, "2 + 3 = 5"))
+        self.assertEqual(self.parser.parse_command("5 meters plus 3"), (8, "5 + 3 = 8"))
+        self.assertEqual(self.parser.parse_command("10 km divided by 4"), (2.5, "10 / 4 = 2.50"))
+
+    def test_unit_words_are_not_corrected(self):
+        stream = self.parser.tokenize("convert 5 miles to kilometers")
+        self.assertEqual(stream.corrections, ())
+        self.assertEqual(stream.tokens, ["convert", "5", "mile", "to", "kilometer"])
+
+    def test_spoken_conversions_in_other_locales(self):
+        cases = {
+            ("es", "convierte cinco millas a kilómetros"): (8.05, "5 mi in km = 8.05"),
+            ("es", "cuántos pies hay en 3 millas"): (15840, "3 mi in ft = 15840"),
+            ("de", "5 Meilen in Kilometer umrechnen"): (8.05, "5 mi in km = 8.05"),
+            ("de", "zwei Stunden in Minuten"): (120, "2 h in min = 120"),
+            ("hi", "5 मील को किलोमीटर में बदलें"): (8.05, "5 mi in km = 8.05"),
+            ("hi", "72 डिग्री फ़ारेनहाइट को सेल्सियस में बदलें"): (22.22, "72 °F in °C = 22.22"),
+        }
+        for (locale, command), expected in cases.items():
+            with self.subTest(locale=locale, command=command):
+                self.assertEqual(self.parser.parse_command(command, locale=locale), expected)
+
+    def test_abbreviations_work_in_other_locales(self):
+        self.assertEqual(self.parser.parse_command("10 km a mi", locale="es")[0], 6.21)
+
+    def test_batch(self):
+        sink = io.BytesIO()
+        batch_eval.run(io.BytesIO(b"convert 5 miles to kilometers\n72 f in c\n"), sink, False)
+        results = [json.loads(line) for line in sink.getvalue().decode().splitlines()]
+        self.assertEqual([r["result"] for r in results], [8.05, 22.22])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import math
+import unittest
+
+import numpy as np
+
+from calculator import (Calculator, ERROR_DIVISION_BY_ZERO, ERROR_LOG_NON_POSITIVE, ERROR_NONE,
+                        ERROR_TANGENT_UNDEFINED)
+from vector_calculator import VectorCalculator
+
+
+class TestVectorCalculator(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.x = np.concatenate([rng.uniform(-1000, 1000, 2000).round(3),
+                                 np.arange(-360, 361, 15, dtype=float),
+                                 [0.0, 1.0, 100.0, 0.285, 2.675, 1.005]])
+        self.y = np.concatenate([rng.uniform(-50, 50, 2000).round(2),
+                                 np.arange(-24, 25, 1, dtype=float),
+                                 [0.0, 3.0, 7.0, 1.0, 1.0, 1.0]])
+
+    def assertMatchesScalar(self, result, scalar, *operands):
+        expected = [scalar(*(float(op[i]) for op in operands)) for i in range(len(operands[0]))]
+        self.assertEqual(list(result.messages()), expected)
+
+    def test_unary_operations_match_scalar(self):
+        for name in ("sine", "cosine", "tangent", "cube_root", "square_root", "logarithm"):
+            with self.subTest(name=name):
+                self.assertMatchesScalar(getattr(VectorCalculator, name)(self.x),
+                                         getattr(Calculator, name), self.x)
+
+    def test_binary_operations_match_scalar(self):
+        for name in ("add", "subtract", "multiply", "divide"):
+            with self.subTest(name=name):
+                self.assertMatchesScalar(getattr(VectorCalculator, name)(self.x, self.y),
+                                         getattr(Calculator, name), self.x, self.y)
+
+    def test_exponentiation_matches_scalar(self):
+        x = np.abs(self.x[:500]) / 100
+        y = self.y[:500] / 10
+        self.assertMatchesScalar(VectorCalculator.exponentiation(x, y), Calculator.exponentiation, x, y)
+
+    def test_error_mask(self):
+        result = VectorCalculator.divide([1, 2, 3], [1, 0, 2])
+        self.assertEqual(list(result.errors), [ERROR_NONE, ERROR_DIVISION_BY_ZERO, ERROR_NONE])
+        self.assertTrue(math.isnan(result.values[1]))
+        self.assertEqual(result.values[2], 1.5)
+
+        result = VectorCalculator.logarithm([100, 0, -5])
+        self.assertEqual(list(result.errors), [ERROR_NONE, ERROR_LOG_NON_POSITIVE, ERROR_LOG_NON_POSITIVE])
+
+    def test_undefined_tangent_is_flagged(self):
+        result = VectorCalculator.tangent([90, -270, 45, 180, 90.5])
+        self.assertEqual(list(result.messages()),
+                         ["Error: Tangent is undefined", "Error: Tangent is undefined", 1.0, 0.0,
+                          Calculator.tangent(90.5)])
+        self.assertEqual(list(result.errors[:2]), [ERROR_TANGENT_UNDEFINED] * 2)
+
+    def test_invalid_exponentiation_is_flagged(self):
+        result = VectorCalculator.exponentiation([-8, 0, 2], [0.5, -1, 3])
+        self.assertEqual(list(result.errors[:2] != ERROR_NONE), [True, True])
+        self.assertEqual(result.values[2], 8)
+
+if __name__ == '__main__':
+    unittest.main()
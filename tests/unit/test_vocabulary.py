@@ -0,0 +1,102 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from command_parser import CONNECTIVE_WORDS, DISPATCH_PAIRS, DISPATCH_TABLE, CommandParser, PrefixTokenizer
+from vocabulary import LOCALE_DIR, available_locales, load_locale, normalize_locale
+
+
+class TestLocaleFiles(unittest.TestCase):
+    def test_normalize_locale(self):
+        self.assertEqual(normalize_locale('es-ES'), 'es')
+        self.assertEqual(normalize_locale('DE_de'), 'de')
+        self.assertEqual(normalize_locale('hi'), 'hi')
+        for tag in ('', '../en', 'english', None, 5):
+            self.assertIsNone(normalize_locale(tag))
+
+    def test_available_locales(self):
+        self.assertEqual(available_locales(), {'en', 'es', 'de', 'hi'})
+
+    def test_extends(self):
+        spanish = load_locale('es')
+        self.assertEqual(spanish['words']['+'], 'plus')
+        self.assertEqual(spanish['words']['más'], 'plus')
+        self.assertIsNone(load_locale('en')['numbers'])
+        self.assertEqual(spanish['numbers']['veinticinco'], 'twenty five')
+
+    def test_every_locale_maps_to_known_tokens(self):
+        tokens = {word for _, words in DISPATCH_TABLE + DISPATCH_PAIRS for word in words}
+        tokens |= set(CONNECTIVE_WORDS) | {'from'} | CommandParser()._numbers.words
+        for code in sorted(available_locales()):
+            data = load_locale(code)
+            for word, token in list(data['words'].items()) + list((data['numbers'] or {}).items()):
+                with self.subTest(locale=code, word=word):
+                    self.assertLessEqual(set(token.split()), tokens)
+
+
+class TestLocaleParsing(unittest.TestCase):
+    CASES = {
+        'es': [('cuánto es cinco más tres', 8), ('veinticinco por cuatro', 100), ('diez dividido por dos', 5),
+               ('raíz cuadrada de dieciséis', 4), ('dos elevado a la potencia de diez', 1024),
+               ('trescientos cuarenta y cinco menos cinco', 340), ('tres coma cinco por dos', 7),
+               ('cinco mas trez', 8)],
+        'de': [('was ist fünf plus drei', 8), ('fünfundzwanzig mal vier', 100), ('zehn geteilt durch vier', 2.5),
+               ('wurzel aus sechzehn', 4), ('subtrahiere drei von zehn', 7)],
+        'hi': [('पांच जमा तीन', 8), ('पच्चीस गुणा चार', 100), ('दस भाग दो', 5), ('दो लाख प्लस एक', 200001)],
+    }
+
+    def setUp(self):
+        self.parser = CommandParser()
+
+    def test_commands(self):
+        for locale, cases in self.CASES.items():
+            for command, expected in cases:
+                with self.subTest(locale=locale, command=command):
+                    self.assertEqual(self.parser.parse_command(command, locale=locale)[0], expected)
+
+    def test_locales_compile_on_first_use(self):
+        self.assertEqual(self.parser.loaded_locales, ['en'])
+        self.parser.tokenize('cinco más tres', locale='es')
+        self.assertEqual(self.parser.loaded_locales, ['en', 'es'])
+        compiled = self.parser._locale('es')
+        self.parser.tokenize('seis por dos', locale='es')
+        self.assertIs(self.parser._locale('es'), compiled)
+
+    def test_unsupported_locale(self):
+        with self.assertRaises(ValueError):
+            self.parser.tokenize('cinq plus trois', locale='fr')
+
+    def test_locales_share_canonical_tokens(self):
+        english = self.parser.tokenize('what is twelve times four')
+        for command, locale in (('cuánto es doce por cuatro', 'es'), ('was ist zwölf mal vier', 'de')):
+            stream = self.parser.tokenize(command, locale=locale)
+            self.assertEqual(stream.key, english.key)
+            self.assertEqual(stream.handler, english.handler)
+
+    def test_default_locale_keeps_english_words(self):
+        self.assertEqual(self.parser.tokenize('cinco más tres').tokens, ['cinco', 'más', 'tres'])
+        self.assertEqual(self.parser.tokenize('five plus three', locale='es').tokens, ['5', 'plus', '3'])
+
+    def test_prefix_tokenizer_with_locale(self):
+        tokenizer = PrefixTokenizer(self.parser, 'es')
+        words = 'cuánto es diez dividido por dos'.split()
+        for end in range(1, len(words) + 1):
+            prefix = ' '.join(words[:end])
+            with self.subTest(prefix=prefix):
+                self.assertEqual(tokenizer.update(prefix).tokens, self.parser.tokenize(prefix, locale='es').tokens)
+
+    def test_locale_directory(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        for name in ('_symbols.json', 'en.json'):
+            shutil.copy(os.path.join(LOCALE_DIR, name), directory)
+        with open(os.path.join(directory, 'it.json'), 'w', encoding='utf-8') as f:
+            json.dump({'extends': '_symbols', 'words': {'più': 'plus'}, 'numbers': {'cinque': 'five', 'tre': 'three'}}, f)
+        parser = CommandParser(locale_dir=directory)
+        self.assertEqual(parser.locales, {'en', 'it'})
+        self.assertEqual(parser.parse_command('cinque più tre', locale='it')[0], 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from command_parser import CommandParser
+from worksheet import Worksheet, WorksheetStore
+
+SESSION = 'session-0001'
+
+
+class TestWorksheet(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.parser = CommandParser()
+
+    def setUp(self):
+        self.sheet = Worksheet()
+
+    def enter(self, *commands):
+        return [self.sheet.enter(command, self.parser) for command in commands][-1]
+
+    def results(self):
+        return {cell.id: cell.result for cell in self.sheet.cells.values()}
+
+    def test_definitions_and_references(self):
+        self.enter('let x be 5', 'set rate to 3', 'let total equal x times rate', 'total divided by x')
+        self.assertEqual(self.results(), {1: 5.0, 2: 3.0, 3: 15.0, 4: 3.0})
+        self.assertEqual(self.sheet.cells[3].history_entry, 'total = 5 * 3 = 15')
+        self.assertEqual(self.sheet.cells[1].history_entry, 'x = 5')
+
+    def test_decimals_and_grouped_numbers(self):
+        self.enter('let x be 1.5', 'x times 2', 'let rate be 2,500', 'rate plus 1')
+        self.assertEqual(self.results(), {1: 1.5, 2: 3.0, 3: 2500.0, 4: 2501.0})
+        self.assertEqual(self.sheet.cells[1].history_entry, 'x = 1.5')
+        self.assertEqual(self.results()[4], self.parser.parse_command('2,500 plus 1')[0])
+
+    def test_previous_result(self):
+        changed = self.enter('2 plus 3', 'ans times 4')
+        self.assertEqual(changed[0]['result'], 20.0)
+        self.assertEqual(self.sheet.enter('ans plus 1', self.parser)[0]['result'], 21.0)
+
+    def test_undefined_name(self):
+        changed = self.enter('y plus 1')
+        self.assertEqual(changed[0]['result'], 'Error: y is not defined')
+        # Defining it later fixes the reader
+        changed = self.enter('let y be 10')
+        self.assertEqual([(cell['id'], cell['result']) for cell in changed], [(1, 11.0), (2, 10.0)])
+
+    def test_parser_words_cannot_be_names(self):
+        with self.assertRaises(ValueError):
+            self.enter('let plus be 4')
+        with self.assertRaises(ValueError):
+            self.enter('let ans be 4')
+
+    def test_redefinition_recomputes_only_dependents(self):
+        self.enter('let x be 5', 'let y be 7', 'x times 2', 'y times 2', 'ans plus x')
+        evaluate = mock.Mock(wraps=self.parser.evaluate_cached)
+        with mock.patch.object(self.parser, 'evaluate_cached', evaluate):
+            changed = self.enter('let x be 6')
+        self.assertEqual([cell['id'] for cell in changed], [1, 3, 5])
+        self.assertEqual(self.results(), {1: 6.0, 2: 7.0, 3: 12.0, 4: 14.0, 5: 20.0})
+        # x is a bare number; cells 3 and 5 are evaluated once each, cell 4 not at all
+        self.assertEqual(evaluate.call_count, 2)
+        self.assertTrue(all(cell['version'] == self.sheet.version for cell in changed))
+
+    def test_unchanged_result_stops_recomputation(self):
+        self.enter('let x be 5', 'let nought equal x minus x', 'nought plus 1')
+        version = self.sheet.version
+        evaluate = mock.Mock(wraps=self.parser.evaluate_cached)
+        with mock.patch.object(self.parser, 'evaluate_cached', evaluate):
+            changed = self.enter('let x be 9')
+        # nought is re-evaluated (its history entry changes) but its value is
+        # the same, so its reader is skipped
+        self.assertEqual([cell['id'] for cell in changed], [1, 2])
+        self.assertEqual(evaluate.call_count, 1)
+        self.assertEqual(self.sheet.cells[3].version, version)
+
+    def test_circular_reference(self):
+        self.enter('let p be q plus 1', 'let q be p plus 1', 'p times 2')
+        self.assertEqual(self.sheet.cells[1].result, 'Error: Circular reference')
+        self.assertEqual(self.sheet.cells[2].result, 'Error: Circular reference')
+        self.assertEqual(self.sheet.cells[3].result, 'Error: p has no value')
+
+        changed = self.sheet.edit(2, 'let q be 4', self.parser)
+        self.assertEqual([(cell['id'], cell['result']) for cell in changed], [(1, 5.0), (2, 4.0), (3, 10.0)])
+
+    def test_edit_and_rename(self):
+        self.enter('let x be 5', 'x plus 1')
+        changed = self.sheet.edit(1, 'let z be 5', self.parser)
+        self.assertEqual([(cell['id'], cell['result']) for cell in changed],
+                         [(1, 5.0), (2, 'Error: x is not defined')])
+        with self.assertRaises(KeyError):
+            self.sheet.edit(9, 'let x be 1', self.parser)
+        self.enter('let w be 1')
+        with self.assertRaises(ValueError):
+            self.sheet.edit(3, 'let z be 2', self.parser)
+
+    def test_remove(self):
+        self.enter('let x be 5', 'x plus 1', '2 times 2', 'ans plus 1')
+        self.assertEqual(self.sheet.cells[4].result, 5.0)
+        # The cell below a removed one reads the one above that
+        changed = self.sheet.remove(3, self.parser)
+        self.assertEqual(changed, [{'id': 3, 'removed': True, 'version': self.sheet.version},
+                                   {**self.sheet.cells[4].as_dict(), 'result': 7.0}])
+
+        changed = self.sheet.remove(1, self.parser)
+        self.assertEqual([(cell['id'], cell.get('result')) for cell in changed],
+                         [(1, None), (2, 'Error: x is not defined'), (4, 'Error: ans has no value')])
+        self.assertTrue(all(cell['version'] == self.sheet.version for cell in changed))
+
+    def test_changes_since(self):
+        self.enter('let x be 5', 'x plus 1', '7 times 2')
+        version = self.sheet.version
+        self.enter('let x be 6')
+        self.sheet.remove(3, self.parser)
+        changes = self.sheet.changes(version)
+        self.assertEqual([(cell['id'], cell.get('result', 'removed')) for cell in changes],
+                         [(1, 6.0), (2, 7.0), (3, 'removed')])
+        self.assertEqual(len(self.sheet.changes()), 3)
+        self.assertEqual(self.sheet.changes(self.sheet.version), [])
+
+    def test_round_trip(self):
+        self.enter('let x be 5', 'x plus 1', 'ans times 2')
+        sheet = Worksheet.from_dict(self.sheet.as_dict())
+        self.assertEqual(sheet.changes(), self.sheet.changes())
+        sheet.enter('let x be 1', self.parser)
+        self.assertEqual(sheet.cells[3].result, 4.0)
+
+
+class TestWorksheetStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.parser = CommandParser()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_directory_store_persists_between_stores(self):
+        with WorksheetStore(self.directory).open(SESSION) as sheet:
+            sheet.enter('let x be 3', self.parser)
+            sheet.enter('x times x', self.parser)
+        with WorksheetStore(self.directory).open(SESSION) as sheet:
+            changed = sheet.enter('let x be 4', self.parser)
+        self.assertEqual([cell['result'] for cell in changed], [4.0, 16.0])
+        with WorksheetStore(self.directory).open(SESSION) as sheet:
+            self.assertEqual(sheet.version, 3)
+
+    def test_clear(self):
+        for store in (WorksheetStore(), WorksheetStore(self.directory)):
+            with store.open(SESSION) as sheet:
+                sheet.enter('let x be 3', self.parser)
+            store.clear(SESSION)
+            with store.open(SESSION) as sheet:
+                self.assertEqual(sheet.cells, {})
+
+    def test_memory_store_keeps_recent_sessions(self):
+        store = WorksheetStore(max_sheets=2)
+        for session in ('session-a1', 'session-b2', 'session-c3'):
+            with store.open(session) as sheet:
+                sheet.enter('1 plus 1', self.parser)
+        with store.open('session-a1') as sheet:
+            self.assertEqual(sheet.cells, {})
+        with store.open('session-c3') as sheet:
+            self.assertEqual(len(sheet.cells), 1)
+
+    def test_invalid_session(self):
+        for store in (WorksheetStore(), WorksheetStore(self.directory)):
+            with self.assertRaises(ValueError):
+                with store.open('../etc'):
+                    pass
+
+
+if __name__ == '__main__':
+    unittest.main()
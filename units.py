@@ -0,0 +1,183 @@
+"""
+Units of measurement and the conversions between them.
+
+Each unit is defined by an affine map onto a neighbouring unit of the same
+dimension: a value x in the unit is ``factor * x + offset`` of the unit it
+refers to (a foot is 12 inches, a degree Fahrenheit is 5/9 of a degree
+Celsius less 160/9). At import the definitions are walked outward from
+each dimension's base unit and composed into a map onto the base, and
+from those into CONVERSIONS, every same-dimension (from, to) pair with its
+combined (scale, offset). Converting is then one dict lookup and one
+multiply-add, whatever path through the definitions connects the units.
+"""
+
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+# dimension -> (base unit, {unit: (factor, offset, unit it is defined by)})
+DEFINITIONS: Dict[str, Tuple[str, Dict[str, Tuple[float, float, str]]]] = {
+    "length": ("meter", {
+        "millimeter": (0.1, 0.0, "centimeter"),
+        "centimeter": (0.01, 0.0, "meter"),
+        "kilometer": (1000.0, 0.0, "meter"),
+        "inch": (2.54, 0.0, "centimeter"),
+        "foot": (12.0, 0.0, "inch"),
+        "yard": (3.0, 0.0, "foot"),
+        "mile": (1760.0, 0.0, "yard"),
+        "nautical_mile": (1852.0, 0.0, "meter"),
+    }),
+    "mass": ("kilogram", {
+        "milligram": (0.001, 0.0, "gram"),
+        "gram": (0.001, 0.0, "kilogram"),
+        "tonne": (1000.0, 0.0, "kilogram"),
+        "pound": (0.45359237, 0.0, "kilogram"),
+        "ounce": (1 / 16, 0.0, "pound"),
+        "stone": (14.0, 0.0, "pound"),
+    }),
+    "volume": ("liter", {
+        "milliliter": (0.001, 0.0, "liter"),
+        "gallon": (3.785411784, 0.0, "liter"),
+        "quart": (0.25, 0.0, "gallon"),
+        "pint": (0.5, 0.0, "quart"),
+        "cup": (0.5, 0.0, "pint"),
+        "tablespoon": (1 / 16, 0.0, "cup"),
+        "teaspoon": (1 / 3, 0.0, "tablespoon"),
+    }),
+    "temperature": ("kelvin", {
+        "celsius": (1.0, 273.15, "kelvin"),
+        "fahrenheit": (5 / 9, -160 / 9, "celsius"),
+    }),
+    "time": ("second", {
+        "millisecond": (0.001, 0.0, "second"),
+        "minute": (60.0, 0.0, "second"),
+        "hour": (60.0, 0.0, "minute"),
+        "day": (24.0, 0.0, "hour"),
+        "week": (7.0, 0.0, "day"),
+        # Julian year, as astronomy uses
+        "year": (365.25, 0.0, "day"),
+    }),
+    "data": ("byte", {
+        "bit": (0.125, 0.0, "byte"),
+        "kilobyte": (1000.0, 0.0, "byte"),
+        "megabyte": (1000.0, 0.0, "kilobyte"),
+        "gigabyte": (1000.0, 0.0, "megabyte"),
+        "terabyte": (1000.0, 0.0, "gigabyte"),
+        "kibibyte": (1024.0, 0.0, "byte"),
+        "mebibyte": (1024.0, 0.0, "kibibyte"),
+        "gibibyte": (1024.0, 0.0, "mebibyte"),
+        "tebibyte": (1024.0, 0.0, "gibibyte"),
+    }),
+}
+
+# Short name of each unit, used in history entries
+SYMBOLS = {
+    "millimeter": "mm", "centimeter": "cm", "meter": "m", "kilometer": "km", "inch": "in",
+    "foot": "ft", "yard": "yd", "mile": "mi", "nautical_mile": "nmi",
+    "milligram": "mg", "gram": "g", "kilogram": "kg", "tonne": "t", "pound": "lb", "ounce": "oz",
+    "stone": "st",
+    "milliliter": "ml", "liter": "l", "gallon": "gal", "quart": "qt", "pint": "pt", "cup": "cup",
+    "tablespoon": "tbsp", "teaspoon": "tsp",
+    "kelvin": "K", "celsius": "°C", "fahrenheit": "°F",
+    "millisecond": "ms", "second": "s", "minute": "min", "hour": "h", "day": "d", "week": "wk",
+    "year": "yr",
+    "bit": "bit", "byte": "B", "kilobyte": "kB", "megabyte": "MB", "gigabyte": "GB", "terabyte": "TB",
+    "kibibyte": "KiB", "mebibyte": "MiB", "gibibyte": "GiB", "tebibyte": "TiB",
+}
+
+# Spoken and written forms of each unit besides its name. Letters that are
+# also words ("in", "a") or too easily misheard ("k", "s") are left out.
+ALIASES = {
+    "millimeter": ("millimeters", "millimetre", "millimetres", "mm"),
+    "centimeter": ("centimeters", "centimetre", "centimetres", "cm"),
+    "meter": ("meters", "metre", "metres", "m"),
+    "kilometer": ("kilometers", "kilometre", "kilometres", "km"),
+    "inch": ("inches",),
+    "foot": ("feet", "ft"),
+    "yard": ("yards", "yd", "yds"),
+    "mile": ("miles", "mi"),
+    "nautical_mile": ("nmi",),
+    "milligram": ("milligrams", "milligramme", "milligrammes", "mg"),
+    "gram": ("grams", "gramme", "grammes", "g"),
+    "kilogram": ("kilograms", "kilogramme", "kilogrammes", "kilo", "kilos", "kg", "kgs"),
+    "tonne": ("tonnes",),
+    "pound": ("pounds", "lb", "lbs"),
+    "ounce": ("ounces", "oz"),
+    "stone": ("stones",),
+    "milliliter": ("milliliters", "millilitre", "millilitres", "ml"),
+    "liter": ("liters", "litre", "litres", "l"),
+    "gallon": ("gallons", "gal"),
+    "quart": ("quarts", "qt"),
+    "pint": ("pints", "pt"),
+    "cup": ("cups",),
+    "tablespoon": ("tablespoons", "tbsp"),
+    "teaspoon": ("teaspoons", "tsp"),
+    "kelvin": ("kelvins",),
+    "celsius": ("centigrade", "c", "°c"),
+    "fahrenheit": ("f", "°f"),
+    "millisecond": ("milliseconds", "ms"),
+    "second": ("seconds", "sec", "secs"),
+    "minute": ("minutes", "min", "mins"),
+    "hour": ("hours", "hr", "hrs"),
+    "day": ("days",),
+    "week": ("weeks",),
+    "year": ("years",),
+    "bit": ("bits",),
+    "byte": ("bytes",),
+    "kilobyte": ("kilobytes", "kb"),
+    "megabyte": ("megabytes", "mb"),
+    "gigabyte": ("gigabytes", "gb"),
+    "terabyte": ("terabytes", "tb"),
+    "kibibyte": ("kibibytes", "kib"),
+    "mebibyte": ("mebibytes", "mib"),
+    "gibibyte": ("gibibytes", "gib"),
+    "tebibyte": ("tebibytes", "tib"),
+}
+
+
+def _to_base(base: str, definitions: Dict[str, Tuple[float, float, str]]) -> Dict[str, Tuple[float, float]]:
+    """Compose the definitions of a dimension into each unit's (scale, offset) onto its base unit."""
+    # Walk from the base outward, so every unit's reference is mapped before it
+    referrers: Dict[str, list] = {}
+    for unit, (_, _, reference) in definitions.items():
+        referrers.setdefault(reference, []).append(unit)
+    maps = {base: (1.0, 0.0)}
+    queue = deque([base])
+    while queue:
+        reference = queue.popleft()
+        ref_scale, ref_offset = maps[reference]
+        for unit in referrers.get(reference, ()):
+            factor, offset, _ = definitions[unit]
+            maps[unit] = (ref_scale * factor, ref_scale * offset + ref_offset)
+            queue.append(unit)
+    unreachable = set(definitions) - set(maps)
+    if unreachable:
+        raise ValueError(f"Units not connected to {base}: {', '.join(sorted(unreachable))}")
+    return maps
+
+
+def _build() -> Tuple[Dict[str, str], Dict[Tuple[str, str], Tuple[float, float]]]:
+    dimensions: Dict[str, str] = {}
+    conversions: Dict[Tuple[str, str], Tuple[float, float]] = {}
+    for dimension, (base, definitions) in DEFINITIONS.items():
+        maps = _to_base(base, definitions)
+        for unit, (scale, offset) in maps.items():
+            dimensions[unit] = dimension
+            for target, (target_scale, target_offset) in maps.items():
+                # base = scale * x + offset and base = target_scale * y + target_offset
+                conversions[unit, target] = (scale / target_scale, (offset - target_offset) / target_scale)
+    return dimensions, conversions
+
+
+# unit -> dimension, and (from, to) -> (scale, offset) for every pair of units of one dimension
+DIMENSIONS, CONVERSIONS = _build()
+
+UNITS = frozenset(DIMENSIONS)
+
+# Every spoken or written form -> unit name
+UNIT_WORDS = {unit: unit for unit in UNITS}
+UNIT_WORDS.update((alias, unit) for unit, aliases in ALIASES.items() for alias in aliases)
+
+
+def conversion(from_unit: str, to_unit: str) -> Optional[Tuple[float, float]]:
+    """Return (scale, offset) converting from_unit to to_unit, or None if they measure different things."""
+    return CONVERSIONS.get((from_unit, to_unit))
@@ -0,0 +1,224 @@
+"""
+Vectorized calculator for bulk evaluation with NumPy.
+
+Every operation mirrors the scalar method of the same name on Calculator,
+but takes arrays of operands (anything np.asarray accepts, broadcast
+together) and returns a VectorResult. Elements the scalar method would
+report as an error string are NaN in ``values`` and carry the matching
+error code from calculator.ERROR_MESSAGES in ``errors``.
+"""
+
+import math
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from calculator import (
+    COSINE_TABLE,
+    Calculator,
+    ERROR_DIVISION_BY_ZERO,
+    ERROR_INCOMPATIBLE_UNITS,
+    ERROR_INVALID_OPERATION,
+    ERROR_LOG_NON_POSITIVE,
+    ERROR_MESSAGES,
+    ERROR_NONE,
+    ERROR_SQRT_NEGATIVE,
+    ERROR_TANGENT_UNDEFINED,
+    SINE_TABLE,
+    RESULT_DECIMALS,
+    TANGENT_TABLE,
+)
+from units import conversion
+
+# Calculator's integer-degree tables as arrays indexed by degree
+_SINE_VALUES = np.array([SINE_TABLE[d] for d in range(360)])
+_COSINE_VALUES = np.array([COSINE_TABLE[d] for d in range(360)])
+_TANGENT_VALUES = np.array([v if isinstance(v, float) else np.nan for v in
+                            (TANGENT_TABLE[d] for d in range(360))])
+_TANGENT_ERRORS = np.where(np.isnan(_TANGENT_VALUES), ERROR_TANGENT_UNDEFINED, ERROR_NONE).astype(np.int8)
+
+
+class VectorResult(NamedTuple):
+    """Result values with a parallel array of error codes (0 means success)."""
+
+    values: np.ndarray
+    errors: np.ndarray
+
+    def messages(self) -> np.ndarray:
+        """Return the scalar-style result of every element: its value or error string."""
+        out = self.values.astype(object)
+        for code, message in ERROR_MESSAGES.items():
+            out[self.errors == code] = message
+        return out
+
+
+def _asarray(x) -> np.ndarray:
+    return np.atleast_1d(np.asarray(x, dtype=np.float64))
+
+
+def _result(values: np.ndarray, errors: np.ndarray) -> VectorResult:
+    values = np.where(errors == ERROR_NONE, values, np.nan)
+    return VectorResult(values, errors)
+
+
+def _no_errors(values: np.ndarray) -> VectorResult:
+    return VectorResult(values, np.zeros(values.shape, dtype=np.int8))
+
+
+def _round(values: np.ndarray, decimals: int, scalar: Callable, *operands: np.ndarray) -> np.ndarray:
+    """Round like Python's round(), falling back to the scalar method near ties.
+
+    np.round scales by 10**decimals before rounding, which can land on the
+    other side of a .5 tie than the correctly rounded round() does. Those
+    elements, and ones too large for rounding to hide last-bit differences
+    between NumPy's and libm's transcendental functions, are recomputed with
+    the scalar method so results match Calculator exactly.
+    """
+    with np.errstate(over="ignore", invalid="ignore"):
+        scaled = values * 10.0 ** decimals
+        rounded = np.round(values, decimals)
+        frac = np.abs(scaled - np.trunc(scaled))
+        suspect = (np.abs(frac - 0.5) < 1e-6) | ((np.abs(scaled) >= 2.0 ** 52) & np.isfinite(values))
+    if suspect.any():
+        rounded = rounded.copy()
+        args = [np.broadcast_to(op, values.shape) for op in operands]
+        for index in zip(*np.nonzero(suspect)):
+            rounded[index] = scalar(*(float(arg[index]) for arg in args))
+    return rounded
+
+
+def _integer_degrees(x: np.ndarray):
+    """Return the mask of integral angles in x and those angles reduced to 0-359."""
+    integral = np.isfinite(x) & (x == np.trunc(x))
+    return integral, np.mod(x[integral], 360).astype(np.intp)
+
+
+class VectorCalculator:
+    """NumPy counterpart of Calculator for arrays of operands."""
+
+    @staticmethod
+    def add(x, y) -> VectorResult:
+        """Return the element-wise sum of x and y."""
+        return _no_errors(np.add(_asarray(x), _asarray(y)))
+
+    @staticmethod
+    def subtract(x, y) -> VectorResult:
+        """Return the element-wise difference of x and y."""
+        return _no_errors(np.subtract(_asarray(x), _asarray(y)))
+
+    @staticmethod
+    def multiply(x, y) -> VectorResult:
+        """Return the element-wise product of x and y."""
+        return _no_errors(np.multiply(_asarray(x), _asarray(y)))
+
+    @staticmethod
+    def divide(x, y, decimal_points: int = 2) -> VectorResult:
+        """Return the element-wise quotient of x and y, flagging division by zero."""
+        x, y = np.broadcast_arrays(_asarray(x), _asarray(y))
+        errors = np.where(y == 0, ERROR_DIVISION_BY_ZERO, ERROR_NONE).astype(np.int8)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = x / y
+        values = _round(values, decimal_points,
+                        lambda a, b: Calculator.divide(a, b, decimal_points) if b else math.nan, x, y)
+        return _result(values, errors)
+
+    @staticmethod
+    def logarithm(x, base: float = 10) -> VectorResult:
+        """Return the element-wise logarithm of x to the given base."""
+        x, base = np.broadcast_arrays(_asarray(x), _asarray(base))
+        errors = np.where(x <= 0, ERROR_LOG_NON_POSITIVE, ERROR_NONE).astype(np.int8)
+        errors[(errors == ERROR_NONE) & ((base <= 0) | (base == 1))] = ERROR_INVALID_OPERATION
+        valid = errors == ERROR_NONE
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = np.log(x) / np.log(base)
+        values = _round(np.where(valid, values, 0.0), 2,
+                        lambda a, b: Calculator.logarithm(a, b) if a > 0 else math.nan, x, base)
+        return _result(values, errors)
+
+    @staticmethod
+    def square_root(x) -> VectorResult:
+        """Return the element-wise square root of x."""
+        x = _asarray(x)
+        errors = np.where(x < 0, ERROR_SQRT_NEGATIVE, ERROR_NONE).astype(np.int8)
+        with np.errstate(invalid="ignore"):
+            values = np.sqrt(x)
+        values = _round(np.where(errors == ERROR_NONE, values, 0.0), 2,
+                        lambda a: Calculator.square_root(a) if a >= 0 else math.nan, x)
+        return _result(values, errors)
+
+    @staticmethod
+    def cube_root(x) -> VectorResult:
+        """Return the element-wise cube root of x, negative for negative x."""
+        x = _asarray(x)
+        magnitude = _round(np.abs(x) ** (1 / 3), 2, lambda a: Calculator.cube_root(abs(a)), x)
+        return _no_errors(np.where(x < 0, -magnitude, magnitude))
+
+    @staticmethod
+    def exponentiation(x, y) -> VectorResult:
+        """Return x raised to the power of y element-wise.
+
+        Elements where the scalar method raises (a negative base with a
+        fractional exponent, zero to a negative power, overflow) are
+        flagged as invalid operations.
+        """
+        x, y = np.broadcast_arrays(_asarray(x), _asarray(y))
+        with np.errstate(all="ignore"):
+            values = np.power(x, y)
+        invalid = ~np.isfinite(values) & np.isfinite(x) & np.isfinite(y)
+        errors = np.where(invalid, ERROR_INVALID_OPERATION, ERROR_NONE).astype(np.int8)
+        values = _round(np.where(invalid, 0.0, values), 2, Calculator.exponentiation, x, y)
+        return _result(values, errors)
+
+    @staticmethod
+    def exponential(x) -> VectorResult:
+        """Return e raised to the power of x element-wise, flagging overflow."""
+        x = _asarray(x)
+        with np.errstate(over="ignore"):
+            values = np.exp(x)
+        invalid = np.isinf(values) & np.isfinite(x)
+        errors = np.where(invalid, ERROR_INVALID_OPERATION, ERROR_NONE).astype(np.int8)
+        values = _round(np.where(invalid, 0.0, values), 2, Calculator.exponential, x)
+        return _result(values, errors)
+
+    @staticmethod
+    def sine(x) -> VectorResult:
+        """Return the element-wise sine of x (in degrees)."""
+        x = _asarray(x)
+        values = _round(np.sin(np.radians(x)), 2, Calculator.sine, x)
+        integral, degrees = _integer_degrees(x)
+        values[integral] = _SINE_VALUES[degrees]
+        return _no_errors(values)
+
+    @staticmethod
+    def cosine(x) -> VectorResult:
+        """Return the element-wise cosine of x (in degrees)."""
+        x = _asarray(x)
+        values = _round(np.cos(np.radians(x)), 2, Calculator.cosine, x)
+        integral, degrees = _integer_degrees(x)
+        values[integral] = _COSINE_VALUES[degrees]
+        return _no_errors(values)
+
+    @staticmethod
+    def tangent(x) -> VectorResult:
+        """Return the element-wise tangent of x (in degrees), flagging 90 + 180k as undefined."""
+        x = _asarray(x)
+        integral, degrees = _integer_degrees(x)
+        errors = np.zeros(x.shape, dtype=np.int8)
+        errors[integral] = _TANGENT_ERRORS[degrees]
+        values = np.tan(np.radians(x))
+        # Undefined points are integral, so the scalar fallback never sees them
+        values = _round(np.where(errors == ERROR_NONE, values, 0.0), 2, Calculator.tangent, x)
+        values[integral] = _TANGENT_VALUES[degrees]
+        return _result(values, errors)
+
+    @staticmethod
+    def convert(x, from_unit: str, to_unit: str) -> VectorResult:
+        """Return x in from_unit expressed in to_unit element-wise; every element fails for incompatible units."""
+        x = _asarray(x)
+        factors = conversion(from_unit, to_unit)
+        if factors is None:
+            return _result(x, np.full(x.shape, ERROR_INCOMPATIBLE_UNITS, dtype=np.int8))
+        scale, offset = factors
+        values = _round(x * scale + offset, RESULT_DECIMALS,
+                        lambda a: Calculator.convert(a, from_unit, to_unit), x)
+        return _no_errors(values)
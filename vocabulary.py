@@ -0,0 +1,82 @@
+"""
+Locale vocabularies for the command parser.
+
+Each locale is a JSON file in ``locales/`` named after its language code:
+
+    {
+        "name": "Español",
+        "extends": "_symbols",
+        "words": {"más": "plus", "por": "times", "raíz": "root", ...},
+        "phrases": {"dividido por": "dividido entre", ...},
+        "filler": ["qué", "es", ...],
+        "numbers": {"cinco": "five", "veinticinco": "twenty five", ...}
+    }
+
+"words" maps what people say to the parser's canonical tokens, the English
+keywords of DISPATCH_TABLE and OPERAND_FORMS; a value of several tokens
+("hundred thousand") stands for all of them. Words are listed most useful
+first, which decides ties when correcting misheard words. "phrases" are
+rewritten before the command is split into words, for word sequences that
+mean something other than their words ("dividido por" is not "dividido"
+and "times"). "filler" words are dropped. "numbers" maps spoken numbers
+to the English number words understood by number_words.py; a locale
+without it uses those directly. Numerals work in every locale.
+
+"extends" names a file whose entries are included, with this file's taking
+precedence. Files whose names start with an underscore only exist to be
+extended and are not locales themselves.
+
+Because every locale becomes the same canonical tokens, dispatch, the
+expression compiler and the result cache are shared between them.
+"""
+
+import json
+import os
+import re
+from typing import Any, Dict, FrozenSet, Optional
+
+LOCALE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales")
+
+DEFAULT_LOCALE = "en"
+
+_CODE_PATTERN = re.compile(r"^[a-z]{2,3}$")
+
+
+def normalize_locale(tag: Any) -> Optional[str]:
+    """Return the language code of a locale tag ("es-ES" -> "es"), or None if it is not one."""
+    if not isinstance(tag, str):
+        return None
+    code = tag.replace("_", "-").split("-", 1)[0].lower()
+    return code if _CODE_PATTERN.match(code) else None
+
+
+def available_locales(directory: str = LOCALE_DIR) -> FrozenSet[str]:
+    """Return the codes of the locales in directory, without loading them."""
+    return frozenset(name[:-len(".json")] for name in os.listdir(directory)
+                     if name.endswith(".json") and _CODE_PATTERN.match(name[:-len(".json")]))
+
+
+def load_locale(code: str, directory: str = LOCALE_DIR) -> Dict[str, Any]:
+    """Read a locale file and the files it extends.
+
+    Returns {"name", "words", "phrases", "filler", "numbers"}, where
+    "numbers" is None for a locale using the English number words.
+    """
+    with open(os.path.join(directory, code + ".json"), encoding="utf-8") as f:
+        data = json.load(f)
+    if "extends" in data:
+        base = load_locale(data["extends"], directory)
+    else:
+        base = {"name": code, "words": {}, "phrases": {}, "filler": [], "numbers": None}
+
+    words = dict(data.get("words", {}))
+    # The base's words come after this file's, which are more specific
+    words.update((word, token) for word, token in base["words"].items() if word not in words)
+    numbers = data.get("numbers", base["numbers"])
+    return {
+        "name": data.get("name", base["name"]),
+        "words": words,
+        "phrases": {**base["phrases"], **data.get("phrases", {})},
+        "filler": list(data.get("filler", ())) + [word for word in base["filler"] if word not in words],
+        "numbers": dict(numbers) if numbers is not None else None,
+    }
@@ -0,0 +1,407 @@
+"""
+Worksheets: per-session sequences of commands that can name and reuse results.
+
+    let x be 5                  x = 5
+    let total equal x times 3   total = 15
+    ans plus 1                  16    ("ans" is the result of the cell above)
+    total divided by x          3
+
+Each command is a cell. A definition ("let NAME be ...", "set NAME to ...",
+"NAME equals ...") names its cell, and other cells can use the name where
+they would use a number. Names are resolved across the whole sheet, as in a
+spreadsheet. Entering a definition for a name that already exists changes
+that cell instead of adding a new one.
+
+Every cell records the names it reads, and the sheet keeps the reverse
+index from each name to the cells that read it. Changing a cell therefore
+recomputes only the cells that depend on it, directly or through other
+cells, in dependency order. A dependent whose inputs all came out unchanged
+is skipped. Cells whose result changes are stamped with the sheet's new
+version, so a client that remembers the last version it saw can fetch just
+the cells changed since then. Cells that depend on each other in a cycle
+get an error.
+
+WorksheetStore keeps sheets in process memory or, given a directory, in one
+JSON file per session shared by all workers.
+"""
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from command_parser import clean_command
+from history_store import valid_session
+from number_words import format_number
+
+try:
+    import fcntl
+except ImportError:  # Not on Windows; sheets in a directory are then only safe with one worker
+    fcntl = None
+
+if TYPE_CHECKING:
+    from command_parser import CommandParser
+
+# The word that refers to the cell above
+PREVIOUS = "ans"
+
+# Cells per sheet, and sheets kept when they live in memory
+MAX_CELLS = 500
+MAX_SHEETS = 1000
+
+_DEFINITION = re.compile(
+    r"^(?:(?:let|set)\s+(?P<name>[a-z][a-z0-9_]*)\s+(?:be|equal|equals|to|is|=)"
+    r"|(?P<bare>[a-z][a-z0-9_]*)\s+(?:equals|=))\s+(?P<expression>.+)$")
+_IDENTIFIER = re.compile(r"^[a-z][a-z0-9_]*$")
+
+Result = Union[float, str]
+
+
+def _words(text: str) -> List[str]:
+    """Split text as CommandParser.tokenize() does before canonicalizing."""
+    return clean_command(text).split()
+
+
+class Cell:
+    """One command of a worksheet and its current result."""
+
+    __slots__ = ("id", "command", "name", "expression", "reads", "result", "history_entry", "version")
+
+    def __init__(self, cell_id: int, command: str, name: Optional[str], expression: str,
+                 reads: Tuple[str, ...], result: Result = "", history_entry: str = "", version: int = 0):
+        self.id = cell_id
+        self.command = command
+        self.name = name
+        self.expression = expression
+        # Names this cell reads; the cell above is "#<id>"
+        self.reads = reads
+        self.result = result
+        self.history_entry = history_entry
+        self.version = version
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The cell as the API returns it."""
+        return {"id": self.id, "command": self.command, "name": self.name, "result": self.result,
+                "history_entry": self.history_entry, "version": self.version}
+
+
+class Worksheet:
+    """Cells of one session, with the index of which cells read which names."""
+
+    def __init__(self):
+        self.cells: Dict[int, Cell] = {}
+        self.version = 0
+        self.next_id = 1
+        # Removed cell id -> version it was removed in
+        self.removed: Dict[int, int] = {}
+        self._definitions: Dict[str, int] = {}
+        self._readers: Dict[str, Set[int]] = {}
+
+    def enter(self, command: str, parser: "CommandParser") -> List[Dict[str, Any]]:
+        """Add a command as a new cell, or redefine an existing name; return the changed cells."""
+        name, expression = self._parse(command, parser)
+        if name is not None and name in self._definitions:
+            return self.edit(self._definitions[name], command, parser)
+        if len(self.cells) >= MAX_CELLS:
+            raise ValueError(f"A worksheet holds at most {MAX_CELLS} cells")
+
+        cell = Cell(self.next_id, command, None, "", ())
+        self.next_id += 1
+        self.cells[cell.id] = cell
+        self._assign(cell, command, name, expression, parser)
+        return self._recompute({cell.id}, parser, forced=cell.id)
+
+    def edit(self, cell_id: int, command: str, parser: "CommandParser") -> List[Dict[str, Any]]:
+        """Replace a cell's command; return the changed cells. Raises KeyError for an unknown cell."""
+        cell = self.cells[cell_id]
+        name, expression = self._parse(command, parser)
+        if name is not None and self._definitions.get(name, cell_id) != cell_id:
+            raise ValueError(f"{name} is already defined")
+        # Readers of a name this cell no longer defines must see it disappear
+        start = {cell_id} | self._readers_of(cell)
+        self._unregister(cell)
+        self._assign(cell, command, name, expression, parser)
+        return self._recompute(start | self._readers_of(cell), parser, forced=cell_id)
+
+    def remove(self, cell_id: int, parser: "CommandParser") -> List[Dict[str, Any]]:
+        """Delete a cell; return it (marked removed) and the cells that changed because of it."""
+        cell = self.cells.pop(cell_id)
+        self._unregister(cell)
+        readers = self._readers_of(cell)
+        # "ans" below the removed cell now means the cell above it
+        below = self._readers.pop(f"#{cell_id}", set())
+        if below:
+            previous = f"#{max((other for other in self.cells if other < cell_id), default=0)}"
+            for reader in below:
+                other = self.cells[reader]
+                other.reads = tuple(previous if key == f"#{cell_id}" else key for key in other.reads)
+            self._readers.setdefault(previous, set()).update(below)
+        changed = self._recompute(readers, parser)
+        if not changed:
+            self.version += 1
+        self.removed[cell_id] = self.version
+        if len(self.removed) > MAX_CELLS:
+            del self.removed[min(self.removed, key=self.removed.get)]
+        return [{"id": cell_id, "removed": True, "version": self.version}] + changed
+
+    def changes(self, since: int = 0) -> List[Dict[str, Any]]:
+        """Return the cells changed or removed after version since, in sheet order."""
+        changed = [cell.as_dict() for cell in self.cells.values() if cell.version > since]
+        changed += [{"id": cell_id, "removed": True, "version": version}
+                    for cell_id, version in self.removed.items() if version > since]
+        changed.sort(key=lambda cell: cell["id"])
+        return changed
+
+    def _parse(self, command: str, parser: "CommandParser") -> Tuple[Optional[str], str]:
+        """Return (name, expression) for a definition, or (None, command)."""
+        match = _DEFINITION.match(" ".join(_words(command)))
+        if match is None:
+            return None, command
+        name = match.group("name") or match.group("bare")
+        if name == PREVIOUS or name in parser.vocabulary:
+            raise ValueError(f"'{name}' cannot be used as a name")
+        return name, match.group("expression")
+
+    def _assign(self, cell: Cell, command: str, name: Optional[str], expression: str,
+                parser: "CommandParser") -> None:
+        """Set a cell's command and register the names it defines and reads."""
+        vocabulary = parser.vocabulary
+        previous = max((cell_id for cell_id in self.cells if cell_id < cell.id), default=0)
+        reads = []
+        for word in _words(expression):
+            if word == PREVIOUS:
+                key = f"#{previous}"
+            elif _IDENTIFIER.match(word) and word not in vocabulary:
+                key = word
+            else:
+                continue
+            if key not in reads:
+                reads.append(key)
+        cell.command, cell.name, cell.expression, cell.reads = command, name, expression, tuple(reads)
+
+        if name is not None:
+            self._definitions[name] = cell.id
+        for key in cell.reads:
+            self._readers.setdefault(key, set()).add(cell.id)
+
+    def _unregister(self, cell: Cell) -> None:
+        if cell.name is not None:
+            del self._definitions[cell.name]
+        for key in cell.reads:
+            readers = self._readers[key]
+            readers.discard(cell.id)
+            if not readers:
+                del self._readers[key]
+
+    def _readers_of(self, cell: Cell) -> Set[int]:
+        """Return the cells reading anything the cell provides: its name and its position."""
+        readers = set(self._readers.get(f"#{cell.id}", ()))
+        if cell.name is not None:
+            readers |= self._readers.get(cell.name, set())
+        return readers
+
+    def _provider(self, key: str) -> Optional[int]:
+        """Return the id of the cell a read key refers to, if it exists."""
+        if key.startswith("#"):
+            cell_id = int(key[1:])
+            return cell_id if cell_id in self.cells else None
+        return self._definitions.get(key)
+
+    def _recompute(self, start: Set[int], parser: "CommandParser",
+                   forced: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Re-evaluate the start cells and everything depending on them; return the changed cells.
+
+        forced is reported as changed even if its result is the same (its
+        command changed).
+        """
+        # Everything reachable through the reverse index
+        affected: Set[int] = set()
+        stack = list(start)
+        while stack:
+            cell_id = stack.pop()
+            if cell_id in affected or cell_id not in self.cells:
+                continue
+            affected.add(cell_id)
+            stack.extend(self._readers_of(self.cells[cell_id]))
+
+        inputs = {cell_id: [provider for provider in map(self._provider, self.cells[cell_id].reads)
+                            if provider in affected]
+                  for cell_id in affected}
+        order, cyclic = _topological_order(sorted(affected), inputs)
+
+        version = self.version + 1
+        changed: List[Cell] = []
+        # Cells whose value changed; readers only see the value
+        changed_ids: Set[int] = set()
+        for cell_id in order:
+            # Unchanged inputs mean an unchanged result
+            if cell_id not in start and cell_id not in cyclic and changed_ids.isdisjoint(inputs[cell_id]):
+                continue
+            cell = self.cells[cell_id]
+            if cell_id in cyclic:
+                result, history_entry = "Error: Circular reference", ""
+            else:
+                result, history_entry = self._evaluate(cell, parser)
+            if result != cell.result:
+                changed_ids.add(cell_id)
+            if cell_id == forced or (result, history_entry) != (cell.result, cell.history_entry):
+                cell.result, cell.history_entry, cell.version = result, history_entry, version
+                changed.append(cell)
+        if changed:
+            self.version = version
+        changed.sort(key=lambda cell: cell.id)
+        return [cell.as_dict() for cell in changed]
+
+    def _evaluate(self, cell: Cell, parser: "CommandParser") -> Tuple[Result, str]:
+        bindings: Dict[str, float] = {}
+        for key in cell.reads:
+            word = PREVIOUS if key.startswith("#") else key
+            provider = self._provider(key)
+            if provider is None:
+                return ("Error: No previous result" if word == PREVIOUS else f"Error: {word} is not defined"), ""
+            value = self.cells[provider].result
+            if isinstance(value, str):
+                return f"Error: {word} has no value", ""
+            bindings[word] = value
+
+        stream = parser.tokenize(cell.expression, bindings)
+        if stream.handler is None and len(stream.tokens) == 1:
+            # A bare number ("let x be 5", "let y be x")
+            try:
+                value = float(stream.tokens[0])
+            except ValueError:
+                pass
+            else:
+                written = format_number(value)
+                return value, f"{cell.name} = {written}" if cell.name else written
+        outcome = parser.evaluate_cached(stream)
+        history_entry = outcome.history_entry
+        if cell.name and history_entry:
+            history_entry = f"{cell.name} = {history_entry}"
+        return outcome.result, history_entry
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The whole sheet, for storage."""
+        return {
+            "version": self.version,
+            "next_id": self.next_id,
+            "removed": {str(cell_id): version for cell_id, version in self.removed.items()},
+            "cells": [{**cell.as_dict(), "expression": cell.expression, "reads": list(cell.reads)}
+                      for cell in self.cells.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Worksheet":
+        sheet = cls()
+        sheet.version = data["version"]
+        sheet.next_id = data["next_id"]
+        sheet.removed = {int(cell_id): version for cell_id, version in data["removed"].items()}
+        for item in data["cells"]:
+            cell = Cell(item["id"], item["command"], item["name"], item["expression"], tuple(item["reads"]),
+                        item["result"], item["history_entry"], item["version"])
+            sheet.cells[cell.id] = cell
+            if cell.name is not None:
+                sheet._definitions[cell.name] = cell.id
+            for key in cell.reads:
+                sheet._readers.setdefault(key, set()).add(cell.id)
+        return sheet
+
+
+def _topological_order(cells: List[int], inputs: Dict[int, List[int]]) -> Tuple[List[int], Set[int]]:
+    """Order cells so each comes after its inputs; return (order, cells on a cycle)."""
+    order: List[int] = []
+    cyclic: Set[int] = set()
+    done: Set[int] = set()
+    for root in cells:
+        if root in done:
+            continue
+        path = [root]
+        pending = [iter(inputs[root])]
+        while pending:
+            for provider in pending[-1]:
+                if provider in done:
+                    continue
+                if provider in path:
+                    cyclic.update(path[path.index(provider):])
+                    continue
+                path.append(provider)
+                pending.append(iter(inputs[provider]))
+                break
+            else:
+                pending.pop()
+                cell_id = path.pop()
+                done.add(cell_id)
+                order.append(cell_id)
+    return order, cyclic
+
+
+class WorksheetStore:
+    """Worksheets by session, in memory or in a directory shared by several workers."""
+
+    def __init__(self, directory: Optional[str] = None, max_sheets: int = MAX_SHEETS):
+        self.directory = directory
+        self.max_sheets = max_sheets
+        self._lock = threading.Lock()
+        # In memory: session -> sheet, least recently used first
+        self._sheets: "OrderedDict[str, Worksheet]" = OrderedDict()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @contextmanager
+    def _locked(self, session: str) -> Iterator[str]:
+        """Hold the session's file lock; yields the path of its worksheet file."""
+        if not valid_session(session):
+            raise ValueError(f"Invalid session ID: {session!r}")
+        path = os.path.join(self.directory, session + ".json")
+        with open(path + ".lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield path
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @contextmanager
+    def open(self, session: str) -> Iterator[Worksheet]:
+        """Lock a session's worksheet for reading or changing it; changes are saved on exit."""
+        if self.directory is None:
+            if not valid_session(session):
+                raise ValueError(f"Invalid session ID: {session!r}")
+            with self._lock:
+                sheet = self._sheets.pop(session, None) or Worksheet()
+                self._sheets[session] = sheet
+                if len(self._sheets) > self.max_sheets:
+                    self._sheets.popitem(last=False)
+                yield sheet
+            return
+
+        with self._locked(session) as path:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    sheet = Worksheet.from_dict(json.load(f))
+            except FileNotFoundError:
+                sheet = Worksheet()
+            version = sheet.version
+            yield sheet
+            if sheet.version != version:
+                with open(path + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump(sheet.as_dict(), f)
+                os.replace(path + ".tmp", path)
+
+    def clear(self, session: str) -> None:
+        """Delete a session's worksheet."""
+        if self.directory is None:
+            if not valid_session(session):
+                raise ValueError(f"Invalid session ID: {session!r}")
+            with self._lock:
+                self._sheets.pop(session, None)
+            return
+        with self._locked(session) as path:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass